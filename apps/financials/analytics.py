@@ -0,0 +1,141 @@
+"""
+Fee collection analytics.
+
+Totals and per-status student counts come from one conditional
+aggregation over the filtered fee records. Breakdowns by class or fee
+structure group that same aggregation; breakdowns by payment method or
+week and the daily collection series group PaymentHistory instead.
+
+Responses are cached per scope and filters. Every cache key carries a
+version token for its term (or for all terms), and the token is replaced
+whenever fee records or payments of that term change.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncWeek
+
+# Breakdowns over fee records: dimension -> (key, name) values() paths
+RECORD_GROUPS = {
+    'class': ('student__current_class_id', 'student__current_class__name'),
+    'fee_structure': ('fee_structure_id', 'fee_structure__name'),
+}
+# Breakdowns over recorded payments
+PAYMENT_GROUPS = ('payment_method', 'week')
+GROUP_BY_CHOICES = list(RECORD_GROUPS) + list(PAYMENT_GROUPS)
+
+VERSION_KEY = 'fees:analytics-version:{term}'
+CACHE_KEY = 'fees:analytics:{scope}:{version}:{term}:{class_id}:{group_by}'
+
+
+def cache_ttl():
+    """Seconds an analytics response is served from the cache"""
+    return getattr(settings, 'FEES_ANALYTICS_CACHE_TTL', 300)
+
+
+def _version(term):
+    key = VERSION_KEY.format(term=term)
+    cache.add(key, uuid4().hex, None)
+    return cache.get(key)
+
+
+def cache_key(scope, term_id=None, class_id=None, group_by=None):
+    """Cache key for one scope (who is asking) and set of filters"""
+    return CACHE_KEY.format(
+        scope=scope,
+        version=_version(term_id or 'all'),
+        term=term_id or 'all',
+        class_id=class_id or 'all',
+        group_by=group_by or 'none'
+    )
+
+
+def invalidate_fee_analytics(term_ids):
+    """Retire cached analytics of the given terms once the current transaction commits"""
+    terms = {term_id for term_id in term_ids if term_id} | {'all'}
+
+    def replace_versions():
+        cache.set_many({VERSION_KEY.format(term=term): uuid4().hex for term in terms}, None)
+
+    transaction.on_commit(replace_versions)
+
+
+def _record_aggregates():
+    return {
+        'total_fees_due': Sum('amount_due'),
+        'total_collected': Sum('amount_paid'),
+        'total_students': Count('student', distinct=True),
+        'students_cleared': Count('student', distinct=True, filter=Q(status='cleared')),
+        'students_pending': Count('student', distinct=True, filter=Q(status='pending')),
+        'students_partial': Count('student', distinct=True, filter=Q(status='partial')),
+    }
+
+
+def _summarise(row):
+    """Fill in outstanding amount and collection rate for an aggregate row"""
+    total_due = row['total_fees_due'] or 0
+    total_collected = row['total_collected'] or 0
+    row['total_fees_due'] = total_due
+    row['total_collected'] = total_collected
+    row['outstanding_amount'] = total_due - total_collected
+    row['collection_rate'] = round(total_collected / total_due * 100, 2) if total_due > 0 else 0
+    return row
+
+
+def _payment_aggregates():
+    return {
+        'total_collected': Sum('amount'),
+        'payments_count': Count('id'),
+        'students_count': Count('fee_record__student', distinct=True),
+    }
+
+
+def _payment_breakdown(payments, group_by):
+    from .models import PaymentHistory
+
+    if group_by == 'week':
+        rows = payments.annotate(key=TruncWeek('payment_date')).values('key')
+    else:
+        rows = payments.values(key=F('payment_method'))
+        labels = dict(PaymentHistory._meta.get_field('payment_method').choices)
+
+    breakdown = list(rows.annotate(**_payment_aggregates()).order_by('key'))
+    for row in breakdown:
+        row['name'] = row['key'].isoformat() if group_by == 'week' else labels.get(row['key'], row['key'])
+    return breakdown
+
+
+def collection_analytics(records, group_by=None):
+    """
+    Return (totals, breakdown, daily collections) for a fee record queryset.
+
+    totals has the FeeAnalyticsSerializer fields. breakdown is None unless
+    group_by names one of GROUP_BY_CHOICES. Daily collections cover the
+    payments recorded against the given records.
+    """
+    from .models import PaymentHistory
+
+    totals = _summarise(records.order_by().aggregate(**_record_aggregates()))
+
+    payments = PaymentHistory.objects.filter(fee_record__in=records.values('id')).order_by()
+    daily = list(
+        payments.values('payment_date')
+        .annotate(total_collected=Sum('amount'), payments_count=Count('id'))
+        .order_by('payment_date')
+    )
+
+    breakdown = None
+    if group_by in RECORD_GROUPS:
+        key, name = RECORD_GROUPS[group_by]
+        breakdown = [
+            _summarise(row)
+            for row in records.order_by().values(key=F(key), name=F(name))
+            .annotate(**_record_aggregates()).order_by('name', 'key')
+        ]
+    elif group_by in PAYMENT_GROUPS:
+        breakdown = _payment_breakdown(payments, group_by)
+
+    return totals, breakdown, daily
@@ -0,0 +1,164 @@
+"""
+Bulk fee record generation and payment recording.
+
+Generation loads the existing (student, fee structure) pairs for a term
+with one query, works out the missing pairs in memory and writes them
+with batched bulk_create. Bulk payments lock every fee record they touch
+in one SELECT ... FOR UPDATE, apply the amounts in memory and save with
+one bulk_update and one bulk_create. Either way the query count does
+not grow with the number of students or records.
+"""
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import invalidate_fee_analytics
+from .clearance import refresh_fee_clearance
+from .models import FeeRecord, PaymentHistory
+
+# Days after the term starts that generated fees fall due
+DUE_AFTER_DAYS = 30
+
+PAYMENT_FIELDS = [
+    'amount_paid', 'status', 'payment_date', 'payment_method', 'payment_reference',
+    'remarks', 'recorded_by', 'updated_at',
+]
+
+
+class FeeRecordsNotFound(LookupError):
+    """Some fee records in a payment do not exist or belong to another school"""
+
+    def __init__(self, ids):
+        super().__init__(f"Fee records not found: {', '.join(map(str, ids))}")
+        self.ids = ids
+
+
+def batch_size():
+    """Rows written per bulk INSERT or UPDATE"""
+    return getattr(settings, 'FEES_BULK_CREATE_BATCH_SIZE', 1000)
+
+
+def term_due_date(term):
+    """Due date given to fees generated for a term"""
+    if term.start_date:
+        return term.start_date + timedelta(days=DUE_AFTER_DAYS)
+    return term.start_date
+
+
+def generate_term_fee_records(term, students, fee_structures):
+    """
+    Create the missing fee records of each student for each fee structure.
+
+    Records that already exist for the term are left alone. Concurrent
+    generations for the same term are serialised on the term row.
+    Returns created and skipped counts and the elapsed time.
+    """
+    from apps.academics.models import Term
+
+    started = time.perf_counter()
+    fee_structures = list(fee_structures.only('id', 'amount'))
+    due_date = term_due_date(term)
+
+    with transaction.atomic():
+        Term.objects.select_for_update().filter(id=term.id).first()
+
+        student_ids = list(students.order_by('id').values_list('id', flat=True))
+        existing = set(
+            FeeRecord.objects.filter(
+                term=term,
+                fee_structure__in=fee_structures,
+                student_id__in=students.values('id')
+            ).values_list('student_id', 'fee_structure_id')
+        )
+
+        missing = [
+            FeeRecord(
+                student_id=student_id,
+                fee_structure_id=fee_structure.id,
+                term=term,
+                amount_due=fee_structure.amount,
+                amount_paid=Decimal('0.00'),
+                status=FeeRecord.payment_status(fee_structure.amount, Decimal('0.00')),
+                due_date=due_date
+            )
+            for student_id in student_ids
+            for fee_structure in fee_structures
+            if (student_id, fee_structure.id) not in existing
+        ]
+        FeeRecord.objects.bulk_create(missing, batch_size=batch_size())
+        if missing:
+            refresh_fee_clearance({record.student_id for record in missing})
+            invalidate_fee_analytics([term.id])
+
+    return {
+        'created_count': len(missing),
+        'skipped_count': len(student_ids) * len(fee_structures) - len(missing),
+        'elapsed': round(time.perf_counter() - started, 4),
+    }
+
+
+def record_bulk_payment(school, payments, details, user):
+    """
+    Apply (fee_record_id, amount) payments and record their history.
+
+    details holds the payment_date, payment_method and optional
+    payment_reference and remarks shared by every payment. All records
+    are locked up front in id order, so concurrent payments to the same
+    record queue rather than overwrite each other, and no lock order can
+    deadlock. Raises FeeRecordsNotFound, writing nothing, if any record
+    is not one of the school's. Returns one entry per payment.
+    """
+    reference = details.get('payment_reference', '')
+    remarks = details.get('remarks', '')
+    now = timezone.now()
+
+    with transaction.atomic():
+        records = {
+            record.id: record
+            for record in FeeRecord.objects.select_for_update(of=('self',))
+            .select_related('student__user')
+            .filter(id__in={fee_record_id for fee_record_id, _ in payments}, student__user__school=school)
+            .order_by('id')
+        }
+        missing = sorted({fee_record_id for fee_record_id, _ in payments} - records.keys())
+        if missing:
+            raise FeeRecordsNotFound(missing)
+
+        history = []
+        processed = []
+        for fee_record_id, amount in payments:
+            record = records[fee_record_id]
+            record.amount_paid += amount
+            record.status = FeeRecord.payment_status(record.amount_due, record.amount_paid)
+            record.payment_date = details['payment_date']
+            record.payment_method = details['payment_method']
+            record.payment_reference = reference
+            record.remarks = remarks
+            record.recorded_by = user
+            record.updated_at = now
+            history.append(PaymentHistory(
+                fee_record=record,
+                amount=amount,
+                payment_date=details['payment_date'],
+                payment_method=details['payment_method'],
+                payment_reference=reference,
+                remarks=remarks,
+                recorded_by=user
+            ))
+            processed.append({
+                'fee_record_id': record.id,
+                'student_name': record.student.user.get_full_name(),
+                'amount_paid': amount,
+                'new_status': record.status
+            })
+
+        FeeRecord.objects.bulk_update(records.values(), PAYMENT_FIELDS, batch_size=batch_size())
+        PaymentHistory.objects.bulk_create(history, batch_size=batch_size())
+        refresh_fee_clearance({record.student_id for record in records.values()})
+        invalidate_fee_analytics({record.term_id for record in records.values()})
+
+    return processed
@@ -0,0 +1,90 @@
+"""
+Fee clearance stored on Student.
+
+Student.fee_status and Student.outstanding_balance summarise all of a
+student's fee records that have not been waived. They are recomputed in
+the same transaction as every change to fee records. The student rows
+are locked first, so concurrent payments for one student are summed one
+after the other and cannot overwrite each other's totals.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+ZERO = Decimal('0.00')
+
+CLEARANCE_FIELDS = ['fee_status', 'outstanding_balance']
+
+# Students recomputed per query when rebuilding
+REBUILD_CHUNK_SIZE = 1000
+
+
+def clearance(total_due, total_paid, record_count):
+    """Return (fee_status, outstanding_balance) for a student's fee totals"""
+    # Students who have not been billed yet stay pending, as before
+    if not record_count:
+        return 'pending', ZERO
+    outstanding = max(total_due - total_paid, ZERO)
+    if outstanding == 0:
+        return 'cleared', outstanding
+    if total_paid > 0:
+        return 'partial', outstanding
+    return 'pending', outstanding
+
+
+def student_fee_totals(student_ids):
+    """Map student id -> (total due, total paid, record count) over their unwaived fee records"""
+    from .models import FeeRecord
+
+    rows = (
+        FeeRecord.objects.filter(student_id__in=student_ids)
+        .exclude(status='waived')
+        .order_by()
+        .values('student_id')
+        .annotate(due=Sum('amount_due'), paid=Sum('amount_paid'), records=Count('id'))
+    )
+    return {row['student_id']: (row['due'], row['paid'], row['records']) for row in rows}
+
+
+def refresh_fee_clearance(student_ids):
+    """
+    Recompute the stored fee clearance of the given students.
+
+    Locks the students in id order before reading their fee records, and
+    writes only the students whose clearance changed. Returns that count.
+    """
+    from apps.students.models import Student
+
+    student_ids = sorted(set(student_ids))
+    if not student_ids:
+        return 0
+
+    with transaction.atomic():
+        students = list(
+            Student.objects.select_for_update()
+            .filter(id__in=student_ids)
+            .only('id', *CLEARANCE_FIELDS)
+            .order_by('id')
+        )
+        totals = student_fee_totals(student_ids)
+
+        changed = []
+        for student in students:
+            fee_status, outstanding = clearance(*totals.get(student.id, (ZERO, ZERO, 0)))
+            if (student.fee_status, student.outstanding_balance) != (fee_status, outstanding):
+                student.fee_status = fee_status
+                student.outstanding_balance = outstanding
+                changed.append(student)
+        Student.objects.bulk_update(changed, CLEARANCE_FIELDS)
+
+    return len(changed)
+
+
+def rebuild_fee_clearance(students):
+    """Recompute the clearance of every student in a queryset, a chunk at a time"""
+    student_ids = list(students.order_by('id').values_list('id', flat=True))
+    changed = 0
+    for start in range(0, len(student_ids), REBUILD_CHUNK_SIZE):
+        changed += refresh_fee_clearance(student_ids[start:start + REBUILD_CHUNK_SIZE])
+    return len(student_ids), changed
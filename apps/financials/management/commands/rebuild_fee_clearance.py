@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.financials.clearance import rebuild_fee_clearance
+from apps.students.models import Student
+
+
+class Command(BaseCommand):
+    help = 'Recompute the fee status and outstanding balance stored on each student'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--school',
+            type=int,
+            help='Only rebuild students of this school id'
+        )
+
+    def handle(self, *args, **options):
+        students = Student.objects.all()
+        if options['school']:
+            students = students.filter(user__school_id=options['school'])
+
+        checked, changed = rebuild_fee_clearance(students)
+        self.stdout.write(self.style.SUCCESS(f'✓ Checked {checked} students, corrected {changed}'))
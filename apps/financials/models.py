@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from .analytics import invalidate_fee_analytics
+from .clearance import refresh_fee_clearance
+from apps.schools.sequences import assign_invoice_numbers
 
 class FeeStructure(models.Model):
     """
@@ -151,16 +154,32 @@ class FeeRecord(models.Model):
         """Check if fee is fully paid"""
         return self.amount_paid >= self.amount_due
     
+    @staticmethod
+    def payment_status(amount_due, amount_paid):
+        """Status implied by the amounts due and paid"""
+        if amount_paid >= amount_due:
+            return 'cleared'
+        elif amount_paid > 0:
+            return 'partial'
+        return 'pending'
+    
     def save(self, *args, **kwargs):
         # Auto-update status based on payment
-        if self.amount_paid >= self.amount_due:
-            self.status = 'cleared'
-        elif self.amount_paid > 0:
-            self.status = 'partial'
-        else:
-            self.status = 'pending'
+        self.status = self.payment_status(self.amount_due, self.amount_paid)
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            refresh_fee_clearance([self.student_id])
+        invalidate_fee_analytics([self.term_id])
+    
+    def delete(self, *args, **kwargs):
+        term_id = self.term_id
+        student_id = self.student_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            refresh_fee_clearance([student_id])
+        invalidate_fee_analytics([term_id])
+        return result
 
 class PaymentHistory(models.Model):
     """
@@ -202,6 +221,16 @@ class PaymentHistory(models.Model):
     
     def __str__(self):
         return f"{self.fee_record.student.user.get_full_name()} - {self.amount} - {self.payment_date}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_fee_analytics([self.fee_record.term_id])
+    
+    def delete(self, *args, **kwargs):
+        term_id = self.fee_record.term_id
+        result = super().delete(*args, **kwargs)
+        invalidate_fee_analytics([term_id])
+        return result
 
 class Invoice(models.Model):
     """
@@ -278,23 +307,10 @@ class Invoice(models.Model):
     
     def save(self, *args, **kwargs):
         # Auto-generate invoice number if not provided
-        if not self.invoice_number:
-            school = self.student.user.school
-            year = self.issue_date.year
-            last_invoice = Invoice.objects.filter(
-                student__user__school=school,
-                invoice_number__startswith=f"INV{year}"
-            ).order_by('invoice_number').last()
-            
-            if last_invoice:
-                last_number = int(last_invoice.invoice_number[-6:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            
-            self.invoice_number = f"INV{year}{new_number:06d}"
-        
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.invoice_number:
+                assign_invoice_numbers([self])
+            super().save(*args, **kwargs)
 
 class InvoiceItem(models.Model):
     """
@@ -1,3 +1,4 @@
+from decimal import Decimal, InvalidOperation
 from rest_framework import serializers
 from .models import (
     FeeStructure, FeeRecord, PaymentHistory, Invoice, 
@@ -75,13 +76,26 @@ class BulkPaymentSerializer(serializers.Serializer):
     remarks = serializers.CharField(required=False)
     
     def validate_fee_records(self, value):
-        """Validate fee records structure"""
+        """Validate fee records structure and normalise ids and amounts"""
+        records = []
         for record in value:
             if 'fee_record_id' not in record or 'amount' not in record:
                 raise serializers.ValidationError(
                     "Each fee record must have 'fee_record_id' and 'amount'"
                 )
-        return value
+            try:
+                fee_record_id = int(record['fee_record_id'])
+                amount = Decimal(str(record['amount']))
+            except (TypeError, ValueError, InvalidOperation):
+                raise serializers.ValidationError(
+                    "Each fee record must have a numeric 'fee_record_id' and 'amount'"
+                )
+            if not amount.is_finite() or amount <= 0:
+                raise serializers.ValidationError("Payment amounts must be greater than zero")
+            if amount != amount.quantize(Decimal('0.01')):
+                raise serializers.ValidationError("Payment amounts can have at most two decimal places")
+            records.append({'fee_record_id': fee_record_id, 'amount': amount})
+        return records
 
 class InvoiceItemSerializer(serializers.ModelSerializer):
     """Serializer for InvoiceItem model"""
@@ -191,6 +205,25 @@ class FeeAnalyticsSerializer(serializers.Serializer):
     students_pending = serializers.IntegerField()
     students_partial = serializers.IntegerField()
 
+class FeeAnalyticsGroupSerializer(FeeAnalyticsSerializer):
+    """Serializer for fee analytics of one class or fee structure"""
+    key = serializers.ReadOnlyField()
+    name = serializers.CharField(allow_null=True)
+
+class FeeCollectionSerializer(serializers.Serializer):
+    """Serializer for payments collected by one payment method or in one week"""
+    key = serializers.ReadOnlyField()
+    name = serializers.CharField(allow_null=True)
+    total_collected = serializers.DecimalField(max_digits=15, decimal_places=2)
+    payments_count = serializers.IntegerField()
+    students_count = serializers.IntegerField()
+
+class DailyCollectionSerializer(serializers.Serializer):
+    """Serializer for payments collected on one day"""
+    date = serializers.DateField(source='payment_date')
+    total_collected = serializers.DecimalField(max_digits=15, decimal_places=2)
+    payments_count = serializers.IntegerField()
+
 class PaymentReceiptSerializer(serializers.Serializer):
     """Serializer for payment receipt data"""
     receipt_number = serializers.CharField()
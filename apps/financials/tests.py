@@ -1,3 +1,137 @@
+from datetime import date
+from decimal import Decimal
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from apps.schools.models import School
+from apps.academics.models import AcademicSession, Term, Class
+from apps.students.models import Student
+from .models import FeeRecord, FeeStructure, PaymentHistory
 
-# Create your tests here.
+
+class BulkPaymentTests(TestCase):
+    """Bulk payments update fee records, payment history and student clearance together"""
+    
+    def setUp(self):
+        self.school = self.create_school('Test Academy', 'owner')
+        self.office = User.objects.create_user(
+            username='office', password='office123', role='office_account', school=self.school
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.office)
+        self.url = reverse('bulk_payment')
+        
+        self.student = self.create_student(self.school, 'student1')
+        self.tuition, self.levy = [
+            self.create_fee_record(self.student, name, amount)
+            for name, amount in (('Tuition', Decimal('50000.00')), ('Levy', Decimal('10000.00')))
+        ]
+    
+    def create_school(self, name, owner_username):
+        owner = User.objects.create_user(
+            username=owner_username, password='owner123', role='school_owner'
+        )
+        school = School.objects.create(
+            name=name, address='1 School Road', contact_email='info@test.com',
+            contact_number='0800', owner=owner
+        )
+        self.session = AcademicSession.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31),
+            school=school
+        )
+        self.term = Term.objects.create(
+            name='First Term', academic_session=self.session,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20)
+        )
+        self.class_obj = Class.objects.create(
+            name='JSS 1A', level='JSS 1', school=school, academic_session=self.session
+        )
+        return school
+    
+    def create_student(self, school, username):
+        user = User.objects.create_user(
+            username=username, password='student123', role='student', school=school,
+            first_name='Student', last_name=username
+        )
+        return Student.objects.create(
+            user=user, date_of_birth=date(2012, 1, 1), gender='female',
+            address='1 Home Road', emergency_contact='0800',
+            admission_date=date(2024, 9, 1), current_class=self.class_obj,
+            student_id=f'TES2024{Student.objects.count() + 1:04d}'
+        )
+    
+    def create_fee_record(self, student, name, amount):
+        structure = FeeStructure.objects.create(
+            school=student.user.school, academic_session=self.session, name=name, amount=amount
+        )
+        return FeeRecord.objects.create(
+            student=student, fee_structure=structure, term=self.term,
+            amount_due=amount, due_date=date(2024, 10, 1)
+        )
+    
+    def pay(self, *payments):
+        return self.client.post(self.url, {
+            'fee_records': [
+                {'fee_record_id': fee_record_id, 'amount': amount}
+                for fee_record_id, amount in payments
+            ],
+            'payment_date': '2024-10-01',
+            'payment_method': 'cash',
+            'payment_reference': 'RCPT-1'
+        }, format='json')
+    
+    def test_partial_and_overpayments_set_record_status(self):
+        response = self.pay((self.tuition.id, '20000'), (self.levy.id, '12000.50'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_amount'], Decimal('32000.50'))
+        self.assertEqual(
+            [payment['new_status'] for payment in response.data['payments']], ['partial', 'cleared']
+        )
+        self.tuition.refresh_from_db()
+        self.levy.refresh_from_db()
+        self.assertEqual((self.tuition.amount_paid, self.tuition.status), (Decimal('20000.00'), 'partial'))
+        self.assertEqual((self.levy.amount_paid, self.levy.status), (Decimal('12000.50'), 'cleared'))
+        self.assertEqual(PaymentHistory.objects.filter(payment_reference='RCPT-1').count(), 2)
+        
+        # The levy overpayment does not offset the tuition still owed
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.fee_status, 'partial')
+        self.assertEqual(self.student.outstanding_balance, Decimal('27999.50'))
+    
+    def test_paying_everything_clears_the_student(self):
+        self.pay((self.tuition.id, '50000'), (self.levy.id, '10000'))
+        
+        self.student.refresh_from_db()
+        self.assertEqual(
+            (self.student.fee_status, self.student.outstanding_balance), ('cleared', Decimal('0.00'))
+        )
+    
+    def test_repeated_record_accumulates(self):
+        response = self.pay((self.tuition.id, '30000'), (self.tuition.id, '20000'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.tuition.refresh_from_db()
+        self.assertEqual((self.tuition.amount_paid, self.tuition.status), (Decimal('50000.00'), 'cleared'))
+        self.assertEqual(PaymentHistory.objects.filter(fee_record=self.tuition).count(), 2)
+    
+    def test_missing_records_fail_the_whole_payment(self):
+        other_school = self.create_school('Other Academy', 'other_owner')
+        other_record = self.create_fee_record(
+            self.create_student(other_school, 'student2'), 'Tuition', Decimal('5000.00')
+        )
+        
+        response = self.pay((self.tuition.id, '20000'), (999999, '100'), (other_record.id, '100'))
+        
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['fee_record_ids'], sorted([other_record.id, 999999]))
+        self.tuition.refresh_from_db()
+        self.assertEqual((self.tuition.amount_paid, self.tuition.status), (Decimal('0.00'), 'pending'))
+        self.assertFalse(PaymentHistory.objects.exists())
+    
+    def test_invalid_amounts_are_rejected(self):
+        for amount in ('0', '-5', '10.001', 'abc'):
+            response = self.pay((self.tuition.id, amount))
+            self.assertEqual(response.status_code, 400, amount)
+        self.assertFalse(PaymentHistory.objects.exists())
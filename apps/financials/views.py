@@ -1,9 +1,10 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.db.models import Sum, Q
+from django.db.models import Max, Q, Sum
 from django.utils import timezone
 from decimal import Decimal
 from apps.accounts.views import IsSchoolOwnerOrSuperAdmin, IsOfficeAccount, IsStudent
@@ -11,11 +12,14 @@ from .models import (
     FeeStructure, FeeRecord, PaymentHistory, Invoice, 
     InvoiceItem, DiscountScheme, StudentDiscount
 )
+from .analytics import GROUP_BY_CHOICES, PAYMENT_GROUPS, cache_key, cache_ttl, collection_analytics
+from .billing import FeeRecordsNotFound, generate_term_fee_records, record_bulk_payment
 from .serializers import (
     FeeStructureSerializer, FeeRecordSerializer, FeeRecordUpdateSerializer,
     PaymentHistorySerializer, InvoiceSerializer, InvoiceCreateSerializer,
     DiscountSchemeSerializer, StudentDiscountSerializer, BulkPaymentSerializer,
-    StudentFeeStatusSerializer, FeeAnalyticsSerializer, PaymentReceiptSerializer
+    StudentFeeStatusSerializer, FeeAnalyticsSerializer, PaymentReceiptSerializer,
+    FeeAnalyticsGroupSerializer, FeeCollectionSerializer, DailyCollectionSerializer
 )
 
 class FeeStructureListView(generics.ListCreateAPIView):
@@ -130,19 +134,21 @@ class FeeRecordDetailView(generics.RetrieveUpdateDestroyAPIView):
         old_amount = instance.amount_paid
         new_amount = serializer.validated_data.get('amount_paid', old_amount)
         
-        if new_amount > old_amount:
-            payment_amount = new_amount - old_amount
-            PaymentHistory.objects.create(
-                fee_record=instance,
-                amount=payment_amount,
-                payment_date=serializer.validated_data.get('payment_date', timezone.now().date()),
-                payment_method=serializer.validated_data.get('payment_method', 'cash'),
-                payment_reference=serializer.validated_data.get('payment_reference', ''),
-                remarks=serializer.validated_data.get('remarks', ''),
-                recorded_by=self.request.user
-            )
-        
-        serializer.save(recorded_by=self.request.user)
+        # The payment history and the fee record (with the student's clearance) change together
+        with transaction.atomic():
+            if new_amount > old_amount:
+                payment_amount = new_amount - old_amount
+                PaymentHistory.objects.create(
+                    fee_record=instance,
+                    amount=payment_amount,
+                    payment_date=serializer.validated_data.get('payment_date', timezone.now().date()),
+                    payment_method=serializer.validated_data.get('payment_method', 'cash'),
+                    payment_reference=serializer.validated_data.get('payment_reference', ''),
+                    remarks=serializer.validated_data.get('remarks', ''),
+                    recorded_by=self.request.user
+                )
+            
+            serializer.save(recorded_by=self.request.user)
 
 # Payment processing
 @api_view(['POST'])
@@ -152,53 +158,19 @@ def process_bulk_payment(request):
     serializer = BulkPaymentSerializer(data=request.data)
     if serializer.is_valid():
         data = serializer.validated_data
-        user = request.user
-        
-        payments_processed = []
-        total_amount = Decimal('0.00')
+        payments = [(record['fee_record_id'], record['amount']) for record in data['fee_records']]
         
-        with transaction.atomic():
-            for record_data in data['fee_records']:
-                fee_record = get_object_or_404(
-                    FeeRecord,
-                    id=record_data['fee_record_id'],
-                    student__user__school=user.school
-                )
-                
-                payment_amount = Decimal(str(record_data['amount']))
-                new_total_paid = fee_record.amount_paid + payment_amount
-                
-                # Update fee record
-                fee_record.amount_paid = new_total_paid
-                fee_record.payment_date = data['payment_date']
-                fee_record.payment_method = data['payment_method']
-                fee_record.payment_reference = data.get('payment_reference', '')
-                fee_record.remarks = data.get('remarks', '')
-                fee_record.recorded_by = user
-                fee_record.save()
-                
-                # Create payment history
-                PaymentHistory.objects.create(
-                    fee_record=fee_record,
-                    amount=payment_amount,
-                    payment_date=data['payment_date'],
-                    payment_method=data['payment_method'],
-                    payment_reference=data.get('payment_reference', ''),
-                    remarks=data.get('remarks', ''),
-                    recorded_by=user
-                )
-                
-                payments_processed.append({
-                    'fee_record_id': fee_record.id,
-                    'student_name': fee_record.student.user.get_full_name(),
-                    'amount_paid': payment_amount,
-                    'new_status': fee_record.status
-                })
-                total_amount += payment_amount
+        try:
+            payments_processed = record_bulk_payment(request.user.school, payments, data, request.user)
+        except FeeRecordsNotFound as error:
+            return Response({
+                'error': 'Fee records not found',
+                'fee_record_ids': error.ids
+            }, status=status.HTTP_404_NOT_FOUND)
         
         return Response({
             'message': f'Processed {len(payments_processed)} payments',
-            'total_amount': total_amount,
+            'total_amount': sum((amount for _, amount in payments), Decimal('0.00')),
             'payments': payments_processed
         })
     
@@ -237,36 +209,12 @@ def generate_fee_records(request):
     
     fee_structures = FeeStructure.objects.filter(id__in=fee_structure_ids)
     
-    records_created = []
-    with transaction.atomic():
-        for student in students:
-            for fee_structure in fee_structures:
-                # Check if record already exists
-                existing_record = FeeRecord.objects.filter(
-                    student=student,
-                    fee_structure=fee_structure,
-                    term=term
-                ).first()
-                
-                if not existing_record:
-                    # Calculate due date (default: 30 days from term start)
-                    due_date = term.start_date
-                    if term.start_date:
-                        from datetime import timedelta
-                        due_date = term.start_date + timedelta(days=30)
-                    
-                    fee_record = FeeRecord.objects.create(
-                        student=student,
-                        fee_structure=fee_structure,
-                        term=term,
-                        amount_due=fee_structure.amount,
-                        due_date=due_date
-                    )
-                    records_created.append(fee_record)
+    summary = generate_term_fee_records(term, students, fee_structures)
     
     return Response({
-        'message': f'Generated {len(records_created)} fee records',
-        'records_count': len(records_created)
+        'message': f"Generated {summary['created_count']} fee records",
+        'records_count': summary['created_count'],
+        **summary
     })
 
 # Student fee status and analytics
@@ -276,33 +224,20 @@ def student_fee_status(request):
     """Get fee status for the logged-in student"""
     student = request.user.student_profile
     
-    fee_records = student.fee_records.all()
-    
-    total_due = sum([record.amount_due for record in fee_records])
-    total_paid = sum([record.amount_paid for record in fee_records])
-    outstanding = total_due - total_paid
-    
-    # Determine overall status
-    if outstanding == 0:
-        overall_status = 'cleared'
-    elif total_paid > 0:
-        overall_status = 'partial'
-    else:
-        overall_status = 'pending'
-    
-    # Get last payment date
-    last_payment = fee_records.filter(
-        amount_paid__gt=0
-    ).order_by('-payment_date').first()
+    totals = student.fee_records.exclude(status='waived').aggregate(
+        total_due=Sum('amount_due'),
+        total_paid=Sum('amount_paid'),
+        last_payment_date=Max('payment_date', filter=Q(amount_paid__gt=0))
+    )
     
     status_data = {
         'student_id': student.student_id,
         'student_name': student.user.get_full_name(),
-        'total_fees_due': total_due,
-        'total_paid': total_paid,
-        'outstanding_balance': outstanding,
-        'overall_status': overall_status,
-        'last_payment_date': last_payment.payment_date if last_payment else None
+        'total_fees_due': totals['total_due'] or 0,
+        'total_paid': totals['total_paid'] or 0,
+        'outstanding_balance': student.outstanding_balance,
+        'overall_status': student.fee_status,
+        'last_payment_date': totals['last_payment_date']
     }
     
     serializer = StudentFeeStatusSerializer(status_data)
@@ -311,50 +246,55 @@ def student_fee_status(request):
 @api_view(['GET'])
 @permission_classes([IsSchoolOwnerOrSuperAdmin])
 def fee_analytics(request):
-    """Get fee collection analytics"""
+    """Get fee collection analytics, optionally broken down by class, fee structure, payment method or week"""
     user = request.user
     term_id = request.query_params.get('term')
     class_id = request.query_params.get('class')
+    group_by = request.query_params.get('group_by')
+    
+    if not all((value or '0').isdigit() for value in (term_id, class_id)):
+        return Response(
+            {'error': 'term and class must be ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if group_by and group_by not in GROUP_BY_CHOICES:
+        return Response(
+            {'error': f"group_by must be one of {', '.join(GROUP_BY_CHOICES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     # Build queryset
     if user.is_super_admin:
         queryset = FeeRecord.objects.all()
+        scope = 'all'
     elif user.is_school_owner:
         queryset = FeeRecord.objects.filter(student__user__school__owner=user)
+        scope = f'owner-{user.id}'
     else:
         queryset = FeeRecord.objects.none()
+        scope = 'none'
     
     if term_id:
         queryset = queryset.filter(term_id=term_id)
     if class_id:
         queryset = queryset.filter(student__current_class_id=class_id)
     
-    # Calculate analytics
-    total_due = queryset.aggregate(Sum('amount_due'))['amount_due__sum'] or 0
-    total_collected = queryset.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
-    outstanding = total_due - total_collected
-    
-    collection_rate = (total_collected / total_due * 100) if total_due > 0 else 0
-    
-    # Status counts
-    total_students = queryset.values('student').distinct().count()
-    students_cleared = queryset.filter(status='cleared').values('student').distinct().count()
-    students_pending = queryset.filter(status='pending').values('student').distinct().count()
-    students_partial = queryset.filter(status='partial').values('student').distinct().count()
-    
-    analytics_data = {
-        'total_students': total_students,
-        'total_fees_due': total_due,
-        'total_collected': total_collected,
-        'outstanding_amount': outstanding,
-        'collection_rate': round(collection_rate, 2),
-        'students_cleared': students_cleared,
-        'students_pending': students_pending,
-        'students_partial': students_partial
-    }
+    cached_key = cache_key(scope, term_id, class_id, group_by)
+    analytics_data = cache.get(cached_key)
+    if analytics_data is None:
+        totals, breakdown, daily = collection_analytics(queryset, group_by)
+        
+        analytics_data = dict(FeeAnalyticsSerializer(totals).data)
+        if breakdown is not None:
+            breakdown_serializer = (
+                FeeCollectionSerializer if group_by in PAYMENT_GROUPS else FeeAnalyticsGroupSerializer
+            )
+            analytics_data['group_by'] = group_by
+            analytics_data['breakdown'] = breakdown_serializer(breakdown, many=True).data
+        analytics_data['daily_collections'] = DailyCollectionSerializer(daily, many=True).data
+        cache.set(cached_key, analytics_data, cache_ttl())
     
-    serializer = FeeAnalyticsSerializer(analytics_data)
-    return Response(serializer.data)
+    return Response(analytics_data)
 
 # Invoice Views
 class InvoiceListView(generics.ListCreateAPIView):
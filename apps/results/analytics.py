@@ -0,0 +1,138 @@
+"""
+Result analytics computed with conditional aggregation.
+
+Counts, mean, extremes and per-grade band counts come from a single
+aggregate query. Percentiles use PERCENTILE_CONT on PostgreSQL and an
+equivalent interpolation in Python on other databases.
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Min, Q
+
+PERCENTILES = {
+    'p25': 0.25,
+    'median': 0.5,
+    'p75': 0.75,
+    'p90': 0.9,
+}
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL continuous percentile of an ordered set"""
+    function = 'PERCENTILE_CONT'
+    name = 'PercentileCont'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def percentile(sorted_values, fraction):
+    """Linear interpolation matching PERCENTILE_CONT for sorted values"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return float(sorted_values[lower]) + (float(sorted_values[upper]) - float(sorted_values[lower])) * weight
+
+
+def _database_percentiles():
+    return connection.vendor == 'postgresql'
+
+
+def grade_band_filters(scale, field='average_score'):
+    """Q filter per grade for the bands of a grading scale"""
+    filters = {}
+    upper = None
+    for minimum, grade, _ in scale.boundaries:
+        band = Q(**{f'{field}__gte': minimum})
+        if upper is not None:
+            band &= Q(**{f'{field}__lt': upper})
+        filters[grade] = band
+        upper = minimum
+    filters['F'] = Q(**{f'{field}__lt': upper}) if upper is not None else Q()
+    return filters
+
+
+def distribution_aggregates(scale, field='average_score'):
+    """Aggregate expressions for count, mean, extremes, bands and percentiles"""
+    # Aliases must not shadow model fields or aggregation over them fails
+    aggregates = {
+        'total_students': Count('id'),
+        'mean_score': Avg(field),
+        'max_score': Max(field),
+        'min_score': Min(field),
+    }
+    for grade, band in grade_band_filters(scale, field).items():
+        aggregates[f'grade_{grade}'] = Count('id', filter=band)
+    if _database_percentiles():
+        for name, fraction in PERCENTILES.items():
+            aggregates[name] = PercentileCont(field, fraction)
+    return aggregates
+
+
+def _shape(row, scale):
+    """Fold the flat aggregate row into the analytics payload"""
+    stats = {
+        'total_students': row['total_students'],
+        'average_score': row['mean_score'],
+        'highest_score': row['max_score'],
+        'lowest_score': row['min_score'],
+        'grade_distribution': {
+            grade: row[f'grade_{grade}'] for grade in scale.grades
+        },
+    }
+    for name in PERCENTILES:
+        value = row.get(name)
+        stats[name] = round(Decimal(str(value)), 2) if value is not None else None
+    return stats
+
+
+def _python_percentiles(results, field, group_by=None):
+    """Percentiles per group computed from one ordered projection"""
+    columns = [group_by, field] if group_by else [field]
+    rows = results.order_by(*columns).values_list(*columns)
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[0] if group_by else None, []).append(row[-1])
+    return {
+        key: {name: percentile(values, fraction) for name, fraction in PERCENTILES.items()}
+        for key, values in grouped.items()
+    }
+
+
+def score_distribution(results, scale, field='average_score'):
+    """Distribution statistics for a queryset of results"""
+    row = results.aggregate(**distribution_aggregates(scale, field))
+    if not _database_percentiles():
+        row.update(_python_percentiles(results, field).get(None, {}))
+    return _shape(row, scale)
+
+
+def score_distribution_by(results, scale, group_by, field='average_score', extra_values=()):
+    """
+    Distribution statistics per value of group_by, in one aggregate query.
+
+    Returns a list of dicts with the group key, any extra_values columns
+    and the same statistics as score_distribution.
+    """
+    rows = list(
+        results.order_by()
+        .values(group_by, *extra_values)
+        .annotate(**distribution_aggregates(scale, field))
+    )
+    python_percentiles = {} if _database_percentiles() else _python_percentiles(results, field, group_by)
+
+    grouped = []
+    for row in rows:
+        row.update(python_percentiles.get(row[group_by], {}))
+        stats = _shape(row, scale)
+        stats[group_by] = row[group_by]
+        for column in extra_values:
+            stats[column] = row[column]
+        grouped.append(stats)
+    return grouped
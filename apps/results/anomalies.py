@@ -0,0 +1,309 @@
+"""
+Pre-publication checks on submitted scores.
+
+A term's results are read with one query and checked per (class, subject)
+group. Standard scores for the average and for each assessment component
+are computed for every group at once with NumPy when it is installed and
+in pure Python otherwise. Each teacher's class means are compared with
+their history in one more aggregate query. Flags go to ResultAnomaly for
+school owners to review.
+
+Scans run in Celery and are recorded as ResultTasks, so publishing can
+read the flags of the last scan and only queue one when a class has never
+been scanned.
+"""
+import math
+import time
+from collections import Counter
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, StdDev
+
+from .expressions import SCORE_COMPONENTS
+from .models import Result, ResultAnomaly, ResultTask
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+SCORED_COLUMNS = SCORE_COMPONENTS + ['average_score']
+
+COLUMN_LABELS = {
+    'first_ca': 'first CA',
+    'second_ca': 'second CA',
+    'exam_marks': 'exam',
+    'average_score': 'average',
+}
+
+# A component is expected once this share of its class has recorded it
+EXPECTED_COMPONENT_SHARE = 0.8
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def z_threshold():
+    """Standard score beyond which a score is flagged"""
+    return _setting('RESULTS_ANOMALY_Z_THRESHOLD', 2.5)
+
+
+def min_group_size():
+    """Smallest class for which standard scores are meaningful"""
+    return _setting('RESULTS_ANOMALY_MIN_GROUP_SIZE', 5)
+
+
+def shift_threshold():
+    """Change in a teacher's class mean, in historical standard deviations"""
+    return _setting('RESULTS_ANOMALY_SHIFT_THRESHOLD', 1.0)
+
+
+def min_history():
+    """Past results needed before a teacher's history is trusted"""
+    return _setting('RESULTS_ANOMALY_MIN_HISTORY', 20)
+
+
+def _numpy_zscores(codes, values, groups):
+    """Per-row standard scores within groups; NaN values are ignored"""
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    counts = np.bincount(codes, weights=present, minlength=groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(codes, weights=filled, minlength=groups) / counts
+        deviations = np.where(present, values - means[codes], 0.0)
+        stds = np.sqrt(np.bincount(codes, weights=deviations ** 2, minlength=groups) / counts)
+        scores = deviations / stds[codes]
+    valid = present & (counts[codes] >= min_group_size()) & (stds[codes] > 0)
+    return np.where(valid, scores, np.nan).tolist()
+
+
+def _python_zscores(codes, values, groups):
+    """Pure Python version of _numpy_zscores"""
+    members = [[] for _ in range(groups)]
+    for code, value in zip(codes, values):
+        if not math.isnan(value):
+            members[code].append(value)
+
+    stats = []
+    for group in members:
+        if len(group) < min_group_size():
+            stats.append(None)
+            continue
+        mean = sum(group) / len(group)
+        std = math.sqrt(sum((value - mean) ** 2 for value in group) / len(group))
+        stats.append((mean, std) if std else None)
+
+    return [
+        (value - stats[code][0]) / stats[code][1]
+        if stats[code] and not math.isnan(value) else math.nan
+        for code, value in zip(codes, values)
+    ]
+
+
+def _as_float(value):
+    return math.nan if value is None else float(value)
+
+
+def _anomaly(row, kind, detail, score=None, result=True):
+    return ResultAnomaly(
+        term_id=row['term_id'],
+        class_for_term_id=row['class_for_term_id'],
+        subject_id=row['subject_id'],
+        result_id=row['id'] if result else None,
+        teacher_id=row['teacher_id'],
+        kind=kind,
+        score=None if score is None else round(score, 3),
+        detail=detail[:255]
+    )
+
+
+def find_outliers(rows, groups, codes, use_numpy=None):
+    """Flag averages and components far from the rest of their class"""
+    if use_numpy is None:
+        use_numpy = np is not None
+    zscores = _numpy_zscores if use_numpy else _python_zscores
+    threshold = z_threshold()
+
+    flags = []
+    for column in SCORED_COLUMNS:
+        scores = zscores(codes, [_as_float(row[column]) for row in rows], groups)
+        for row, score in zip(rows, scores):
+            if not math.isnan(score) and abs(score) >= threshold:
+                flags.append(_anomaly(
+                    row, ResultAnomaly.OUTLIER,
+                    f"{row['student_name']}: {COLUMN_LABELS[column]} {row[column]} is "
+                    f"{abs(score):.1f} standard deviations {'above' if score > 0 else 'below'} the class",
+                    score
+                ))
+    return flags
+
+
+def find_component_problems(rows, codes):
+    """Flag scores whose recorded components cannot be right"""
+    group_sizes = Counter(codes)
+    recorded = Counter(
+        (code, column) for code, row in zip(codes, rows)
+        for column in SCORE_COMPONENTS if row[column] is not None
+    )
+
+    flags = []
+    for code, row in zip(codes, rows):
+        components = {column: row[column] for column in SCORE_COMPONENTS}
+        out_of_range = [
+            COLUMN_LABELS[column] for column, value in components.items()
+            if value is not None and not 0 <= value <= 100
+        ]
+        if out_of_range:
+            detail = f"{row['student_name']}: {', '.join(out_of_range)} outside 0-100"
+        elif all(value is None for value in components.values()):
+            detail = f"{row['student_name']}: no assessment recorded"
+        else:
+            missing = [
+                COLUMN_LABELS[column] for column, value in components.items()
+                if value is None and group_sizes[code] >= min_group_size()
+                and recorded[(code, column)] >= EXPECTED_COMPONENT_SHARE * group_sizes[code]
+            ]
+            if not missing:
+                continue
+            detail = f"{row['student_name']}: {', '.join(missing)} missing but recorded for the rest of the class"
+        flags.append(_anomaly(row, ResultAnomaly.COMPONENTS, detail))
+    return flags
+
+
+def find_distribution_shifts(term, rows, codes):
+    """Flag classes whose mean moved sharply from the teacher's past results"""
+    current = {}
+    for code, row in zip(codes, rows):
+        entry = current.setdefault(code, {'row': row, 'scores': []})
+        entry['scores'].append(float(row['average_score']))
+
+    teacher_ids = {row['teacher_id'] for row in rows}
+    subject_ids = {row['subject_id'] for row in rows}
+    history = {
+        (entry['teacher_id'], entry['subject_id']): entry
+        for entry in Result.objects.filter(
+            teacher_id__in=teacher_ids,
+            subject_id__in=subject_ids,
+            term__start_date__lt=term.start_date
+        ).values('teacher_id', 'subject_id').annotate(
+            results=Count('id'),
+            mean=Avg('average_score'),
+            std=StdDev('average_score')
+        ).order_by()
+    }
+
+    flags = []
+    for entry in current.values():
+        row = entry['row']
+        past = history.get((row['teacher_id'], row['subject_id']))
+        if not past or past['results'] < min_history() or not past['std']:
+            continue
+        mean = sum(entry['scores']) / len(entry['scores'])
+        shift = (mean - float(past['mean'])) / float(past['std'])
+        if abs(shift) >= shift_threshold():
+            flags.append(_anomaly(
+                row, ResultAnomaly.DISTRIBUTION_SHIFT,
+                f"{row['class_name']} {row['subject_name']}: class mean {mean:.1f} against "
+                f"{float(past['mean']):.1f} in this teacher's past results",
+                shift, result=False
+            ))
+    return flags
+
+
+def _review_key(anomaly):
+    return (
+        anomaly.kind, anomaly.result_id, anomaly.class_for_term_id,
+        anomaly.subject_id, anomaly.teacher_id, anomaly.detail
+    )
+
+
+def detect_anomalies(term, results=None, use_numpy=None):
+    """
+    Check a term's results and replace the unreviewed flags for them.
+
+    results narrows the scan (for example to one class or school). Flags
+    already reviewed are kept and not raised again. Returns counts by kind
+    and the elapsed time.
+    """
+    started = time.perf_counter()
+    results = (results if results is not None else Result.objects.all()).filter(term=term)
+    rows = list(
+        results.order_by('class_for_term_id', 'subject_id', 'id').values(
+            'id', 'term_id', 'class_for_term_id', 'subject_id', 'teacher_id',
+            'first_ca', 'second_ca', 'exam_marks', 'average_score',
+            'student__user__first_name', 'student__user__last_name',
+            'class_for_term__name', 'subject__name'
+        )
+    )
+    group_codes = {}
+    codes = []
+    for row in rows:
+        row['student_name'] = f"{row.pop('student__user__first_name')} {row.pop('student__user__last_name')}".strip()
+        row['class_name'] = row.pop('class_for_term__name')
+        row['subject_name'] = row.pop('subject__name')
+        key = (row['class_for_term_id'], row['subject_id'], row['teacher_id'])
+        codes.append(group_codes.setdefault(key, len(group_codes)))
+
+    flags = (
+        find_outliers(rows, len(group_codes), codes, use_numpy)
+        + find_component_problems(rows, codes)
+        + find_distribution_shifts(term, rows, codes)
+    ) if rows else []
+
+    class_ids = {row['class_for_term_id'] for row in rows}
+    scope = ResultAnomaly.objects.filter(term=term, class_for_term_id__in=class_ids)
+    reviewed = {_review_key(anomaly) for anomaly in scope.filter(is_reviewed=True)}
+    flags = [anomaly for anomaly in flags if _review_key(anomaly) not in reviewed]
+
+    with transaction.atomic():
+        scope.filter(is_reviewed=False).delete()
+        ResultAnomaly.objects.bulk_create(flags, batch_size=500)
+
+    return {
+        'results_checked': len(rows),
+        'flagged': len(flags),
+        'by_kind': dict(Counter(anomaly.kind for anomaly in flags)),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def queue_anomaly_scan(term, class_id=None, school_ids=None, user=None):
+    """
+    Queue an anomaly scan of a term, or one of its classes, once the current transaction commits.
+
+    The scan is recorded against the term's school. Returns the task id.
+    """
+    task_id = str(uuid4())
+    ResultTask.objects.create(
+        school_id=term.academic_session.school_id,
+        term=term,
+        class_for_term_id=class_id,
+        kind=ResultTask.ANOMALY_SCAN,
+        task_id=task_id,
+        requested_by=user
+    )
+
+    def dispatch():
+        from .tasks import detect_result_anomalies_task
+        detect_result_anomalies_task.apply_async((term.id, class_id, school_ids), task_id=task_id)
+
+    transaction.on_commit(dispatch, robust=True)
+    return task_id
+
+
+def unscanned_class_ids(term, class_ids):
+    """Classes among class_ids that no anomaly scan of the term has covered"""
+    scanned = set(
+        ResultTask.objects.filter(term=term, kind=ResultTask.ANOMALY_SCAN)
+        .values_list('class_for_term_id', flat=True)
+    )
+    # A scan without a class covered the whole term
+    if None in scanned:
+        return set()
+    return set(class_ids) - scanned
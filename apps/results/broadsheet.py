@@ -0,0 +1,207 @@
+"""
+Class broadsheet: every student's subject scores for a term.
+
+Scores are fetched with one values_list query and pivoted into a dense
+students x subjects matrix. Means and standard deviations are computed
+with NumPy when it is installed and in pure Python otherwise; both paths
+return the same numbers. Students are ranked on their mean and within each
+subject using the class's tie method.
+"""
+import math
+
+from .models import Result
+from .ranking import default_tie_method, rank_values
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+
+def _round(value):
+    """Round a float statistic to two places, mapping NaN to None"""
+    if value is None or math.isnan(value):
+        return None
+    return round(float(value), 2)
+
+
+def load_scores(term, class_id):
+    """
+    Return (students, subjects, cells) for a class in a term.
+
+    students and subjects are lists of dicts in display order; cells maps
+    (student index, subject index) to the subject average score.
+    """
+    rows = (
+        Result.objects
+        .filter(term=term, class_for_term_id=class_id)
+        .order_by()
+        .values_list(
+            'student_id', 'student__student_id', 'student__user__first_name',
+            'student__user__last_name', 'subject_id', 'subject__name', 'average_score'
+        )
+    )
+
+    students = {}
+    subjects = {}
+    scores = []
+    for student_id, admission_id, first_name, last_name, subject_id, subject_name, score in rows:
+        students.setdefault(student_id, {
+            'id': student_id,
+            'student_id': admission_id,
+            'name': f'{first_name} {last_name}'.strip(),
+        })
+        subjects.setdefault(subject_id, {'id': subject_id, 'name': subject_name})
+        scores.append((student_id, subject_id, float(score)))
+
+    students = sorted(students.values(), key=lambda student: (student['name'], student['id']))
+    subjects = sorted(subjects.values(), key=lambda subject: (subject['name'], subject['id']))
+    student_index = {student['id']: index for index, student in enumerate(students)}
+    subject_index = {subject['id']: index for index, subject in enumerate(subjects)}
+
+    cells = {
+        (student_index[student_id], subject_index[subject_id]): score
+        for student_id, subject_id, score in scores
+    }
+    return students, subjects, cells
+
+
+def _numpy_statistics(shape, cells):
+    """Row and column means and standard deviations using NumPy"""
+    matrix = np.full(shape, np.nan)
+    if cells:
+        rows, columns = zip(*cells.keys())
+        matrix[list(rows), list(columns)] = list(cells.values())
+
+    present = ~np.isnan(matrix)
+    filled = np.where(present, matrix, 0.0)
+
+    def reduce(axis):
+        counts = present.sum(axis=axis)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = filled.sum(axis=axis) / counts
+            deviations = np.where(present, matrix - np.expand_dims(means, axis), 0.0)
+            stds = np.sqrt((deviations ** 2).sum(axis=axis) / counts)
+        return means.tolist(), stds.tolist()
+
+    student_means, student_stds = reduce(1)
+    subject_means, subject_stds = reduce(0)
+    matrix = [[None if math.isnan(value) else value for value in row] for row in matrix.tolist()]
+    return matrix, student_means, student_stds, subject_means, subject_stds
+
+
+def _python_statistics(shape, cells):
+    """Row and column means and standard deviations in pure Python"""
+    matrix = [[None] * shape[1] for _ in range(shape[0])]
+    for (row, column), score in cells.items():
+        matrix[row][column] = score
+
+    def describe(values):
+        values = [value for value in values if value is not None]
+        if not values:
+            return math.nan, math.nan
+        mean = sum(values) / len(values)
+        return mean, math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+    student_stats = [describe(row) for row in matrix]
+    subject_stats = [describe(column) for column in zip(*matrix)] if shape[0] else []
+    return (
+        matrix,
+        [mean for mean, _ in student_stats], [std for _, std in student_stats],
+        [mean for mean, _ in subject_stats], [std for _, std in subject_stats],
+    )
+
+
+def _column_positions(scores, column, method):
+    """{student index: position} for the students with a score in one subject column"""
+    ranked = sorted(
+        (index for index, row in enumerate(scores) if row[column] is not None),
+        key=lambda index: -scores[index][column]
+    )
+    return dict(zip(ranked, rank_values([scores[index][column] for index in ranked], method)))
+
+
+def build_broadsheet(term, class_id, method=None, use_numpy=None):
+    """
+    Pivot a class's term scores and compute broadsheet statistics.
+
+    Returns a dict with the subjects, one row per student (scores and
+    subject positions in subject order, mean, standard deviation and
+    position by mean) and per-subject statistics.
+    """
+    method = method or default_tie_method()
+    if use_numpy is None:
+        use_numpy = np is not None
+
+    students, subjects, cells = load_scores(term, class_id)
+    shape = (len(students), len(subjects))
+    statistics = _numpy_statistics if use_numpy else _python_statistics
+    matrix, student_means, student_stds, subject_means, subject_stds = statistics(shape, cells)
+
+    student_means = [_round(mean) for mean in student_means]
+    ranked = sorted(
+        (index for index, mean in enumerate(student_means) if mean is not None),
+        key=lambda index: -student_means[index]
+    )
+    positions = dict(zip(ranked, rank_values([student_means[index] for index in ranked], method)))
+    scores = [[_round(score) for score in row] for row in matrix]
+    subject_positions = [_column_positions(scores, column, method) for column in range(len(subjects))]
+
+    rows = [{
+        'student_id': student['student_id'],
+        'name': student['name'],
+        'scores': scores[index],
+        'subject_positions': [positions_in_subject.get(index) for positions_in_subject in subject_positions],
+        'mean': student_means[index],
+        'std_dev': _round(student_stds[index]),
+        'position': positions.get(index),
+    } for index, student in enumerate(students)]
+
+    subject_columns = list(zip(*matrix)) if students else [[] for _ in subjects]
+    subject_stats = [{
+        'subject': subject['name'],
+        'students': sum(1 for score in subject_columns[index] if score is not None),
+        'mean': _round(subject_means[index]),
+        'std_dev': _round(subject_stds[index]),
+    } for index, subject in enumerate(subjects)]
+
+    return {
+        'subjects': [subject['name'] for subject in subjects],
+        'rows': rows,
+        'subject_stats': subject_stats,
+        'tie_method': method,
+    }
+
+
+def broadsheet_csv_rows(broadsheet):
+    """Header and rows for the CSV form of a broadsheet"""
+    subjects = broadsheet['subjects']
+    header = (
+        ['Student ID', 'Name'] + subjects + [f'{subject} Position' for subject in subjects]
+        + ['Mean', 'Std Dev', 'Position']
+    )
+    padding = [''] * len(subjects) + ['', '', '']
+
+    def rows():
+        for row in broadsheet['rows']:
+            yield (
+                [row['student_id'], row['name']] + row['scores'] + row['subject_positions']
+                + [row['mean'], row['std_dev'], row['position']]
+            )
+        yield ['', 'Subject mean'] + [stats['mean'] for stats in broadsheet['subject_stats']] + padding
+        yield ['', 'Subject std dev'] + [stats['std_dev'] for stats in broadsheet['subject_stats']] + padding
+
+    return header, rows()
+
+
+def broadsheet_ndjson_rows(broadsheet):
+    """One document per student followed by one per subject"""
+    for row in broadsheet['rows']:
+        yield dict(
+            row,
+            type='student',
+            scores=dict(zip(broadsheet['subjects'], row['scores'])),
+            subject_positions=dict(zip(broadsheet['subjects'], row['subject_positions']))
+        )
+    for stats in broadsheet['subject_stats']:
+        yield dict(stats, type='subject')
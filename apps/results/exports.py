@@ -0,0 +1,98 @@
+"""
+Streaming exports of subject results and term results.
+
+Rows are read as .values() projections with iterator(chunk_size), which
+uses a server-side cursor on PostgreSQL, and written out one line at a
+time, so memory stays flat however many rows an export covers.
+"""
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from .models import Result, TermResult
+
+# (column, values() path) pairs in output order
+RESULT_COLUMNS = [
+    ('student_id', 'student__student_id'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('class', 'class_for_term__name'),
+    ('term', 'term__name'),
+    ('session', 'term__academic_session__name'),
+    ('subject', 'subject__name'),
+    ('first_ca', 'first_ca'),
+    ('second_ca', 'second_ca'),
+    ('exam_marks', 'exam_marks'),
+    ('total_score', 'total_score'),
+    ('average_score', 'average_score'),
+    ('grade', 'grade'),
+    ('grade_point', 'grade_point'),
+    ('subject_position', 'subject_position'),
+    ('subject_class_average', 'subject_class_average'),
+    ('remarks', 'remarks'),
+]
+
+TERM_RESULT_COLUMNS = [
+    ('student_id', 'student__student_id'),
+    ('first_name', 'student__user__first_name'),
+    ('last_name', 'student__user__last_name'),
+    ('class', 'class_for_term__name'),
+    ('term', 'term__name'),
+    ('session', 'term__academic_session__name'),
+    ('total_subjects', 'total_subjects'),
+    ('total_score', 'total_score'),
+    ('average_score', 'average_score'),
+    ('gpa', 'gpa'),
+    ('position', 'position'),
+    ('is_published', 'is_published'),
+    ('published_at', 'published_at'),
+]
+
+EXPORTS = {
+    'results': (Result, RESULT_COLUMNS, ['class_for_term__name', 'student__student_id', 'subject__name']),
+    'term-results': (TermResult, TERM_RESULT_COLUMNS, ['class_for_term__name', 'position', 'student__student_id']),
+}
+
+
+def chunk_size():
+    """Rows fetched from the database per round trip"""
+    return getattr(settings, 'RESULTS_EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_queryset(kind, owner=None, term_id=None, class_id=None, subject_id=None):
+    """
+    Filtered queryset for an export, limited to an owner's schools when given.
+
+    Term results are filtered by subject through the students' subject
+    results for the same term.
+    """
+    model, _, ordering = EXPORTS[kind]
+    queryset = model.objects.all()
+    if owner is not None:
+        queryset = queryset.filter(class_for_term__school__owner=owner)
+    if term_id:
+        queryset = queryset.filter(term_id=term_id)
+    if class_id:
+        queryset = queryset.filter(class_for_term_id=class_id)
+    if subject_id:
+        if model is Result:
+            queryset = queryset.filter(subject_id=subject_id)
+        else:
+            queryset = queryset.filter(Exists(Result.objects.filter(
+                student_id=OuterRef('student_id'),
+                term_id=OuterRef('term_id'),
+                subject_id=subject_id
+            )))
+    return queryset.order_by(*ordering)
+
+
+def export_rows(kind, queryset):
+    """Return (header, rows) where rows lazily yields one dict per record"""
+    _, columns, _ = EXPORTS[kind]
+    header = [column for column, _ in columns]
+    paths = [path for _, path in columns]
+
+    def rows():
+        for values in queryset.values_list(*paths).iterator(chunk_size=chunk_size()):
+            yield dict(zip(header, values))
+
+    return header, rows()
@@ -0,0 +1,66 @@
+"""
+Database expressions for computing result scores in SQL
+"""
+from django.db.models import Case, DecimalField, F, FloatField, Func, IntegerField, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+SCORE_COMPONENTS = ['first_ca', 'second_ca', 'exam_marks']
+
+SCORE_FIELD = DecimalField(max_digits=10, decimal_places=4)
+
+
+class Divide(Func):
+    """Decimal division that does not truncate to an integer on SQLite"""
+    arg_joiner = ' / '
+    template = '(%(expressions)s)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        numerator, denominator = self.get_source_expressions()
+        clone = self.copy()
+        clone.set_source_expressions([Cast(numerator, FloatField()), denominator])
+        return super(Divide, clone).as_sql(compiler, connection, **extra_context)
+
+
+def total_score_expression():
+    """Sum of the recorded assessment components of a result row"""
+    return sum(
+        (Coalesce(F(name), Value(0), output_field=SCORE_FIELD) for name in SCORE_COMPONENTS),
+        Value(0, output_field=SCORE_FIELD)
+    )
+
+
+def average_score_expression():
+    """Mean of the recorded components, rounded like Result.compute_scores"""
+    present = sum(
+        (Case(When(**{f'{name}__isnull': False}, then=Value(1)), default=Value(0),
+              output_field=IntegerField()) for name in SCORE_COMPONENTS),
+        Value(0, output_field=IntegerField())
+    )
+    return Round(
+        Coalesce(
+            Divide(total_score_expression(), NullIf(present, Value(0)), output_field=SCORE_FIELD),
+            Value(0),
+            output_field=SCORE_FIELD
+        ),
+        2,
+        output_field=SCORE_FIELD
+    )
+
+
+def grade_expression(boundaries, average='average_score'):
+    """Letter grade for an average score field"""
+    return Case(
+        *[When(**{f'{average}__gte': minimum}, then=Value(grade))
+          for minimum, grade, _ in boundaries],
+        default=Value('F')
+    )
+
+
+def grade_point_expression(boundaries, average='average_score'):
+    """Grade point for an average score field"""
+    return Case(
+        *[When(**{f'{average}__gte': minimum}, then=Value(points))
+          for minimum, _, points in boundaries],
+        default=Value(0),
+        output_field=DecimalField(max_digits=3, decimal_places=1)
+    )
@@ -0,0 +1,145 @@
+"""
+Set-based term result generation.
+
+Computes every student's term totals in one grouped aggregate query and
+persists them with bulk_create/bulk_update instead of per-student saves.
+"""
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Result, TermResult
+
+BATCH_SIZE = 500
+
+TWO_PLACES = Decimal('0.01')
+
+
+def aggregate_term_scores(term, student_ids):
+    """
+    Return {student_id: totals} for a term using one grouped query.
+
+    Totals follow TermResult.calculate_results: the term score is the sum of
+    the stored subject averages, and GPA is the mean subject grade point.
+    """
+    rows = (
+        Result.objects
+        .filter(term=term, student_id__in=student_ids)
+        .values('student_id')
+        .annotate(
+            subjects=Count('id'),
+            score_sum=Sum('average_score'),
+            grade_point_sum=Sum('grade_point'),
+        )
+        .order_by()
+    )
+
+    totals = {}
+    for row in rows:
+        subjects = row['subjects']
+        score_sum = Decimal(str(row['score_sum'] or 0))
+        grade_point_sum = Decimal(str(row['grade_point_sum'] or 0))
+        totals[row['student_id']] = {
+            'total_subjects': subjects,
+            'total_score': score_sum.quantize(TWO_PLACES),
+            'average_score': (score_sum / subjects).quantize(TWO_PLACES),
+            'gpa': (grade_point_sum / subjects).quantize(TWO_PLACES),
+        }
+    return totals
+
+
+def sync_term_results(term, students):
+    """
+    Create or refresh TermResult rows for the given students in a term.
+
+    Published term results are left untouched. Returns a summary dict with
+    the generated term results and per-phase timings in seconds.
+    """
+    timings = {}
+    started = phase = time.perf_counter()
+
+    roster = dict(
+        students.filter(current_class__isnull=False)
+        .values_list('id', 'current_class_id')
+    )
+    skipped_unassigned = students.filter(current_class__isnull=True).count()
+    existing = {
+        term_result.student_id: term_result
+        for term_result in TermResult.objects.filter(
+            term=term, student_id__in=roster.keys()
+        ).only(
+            'id', 'student_id', 'term_id', 'class_for_term_id', 'is_published',
+            'total_subjects', 'total_score', 'average_score', 'gpa'
+        )
+    }
+    timings['load'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    totals = aggregate_term_scores(term, list(roster.keys()))
+    timings['aggregate'] = time.perf_counter() - phase
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    unchanged = []
+    skipped_published = 0
+    for student_id, class_id in roster.items():
+        term_result = existing.get(student_id)
+        student_totals = totals.get(student_id)
+
+        if term_result is None:
+            term_result = TermResult(
+                student_id=student_id,
+                term=term,
+                class_for_term_id=class_id
+            )
+            if student_totals:
+                for field, value in student_totals.items():
+                    setattr(term_result, field, value)
+            to_create.append(term_result)
+            continue
+
+        if term_result.is_published:
+            skipped_published += 1
+            continue
+
+        changed = student_totals and any(
+            getattr(term_result, field) != value
+            for field, value in student_totals.items()
+        )
+        if changed:
+            for field, value in student_totals.items():
+                setattr(term_result, field, value)
+            term_result.updated_at = now
+            to_update.append(term_result)
+        else:
+            unchanged.append(term_result)
+
+    with transaction.atomic():
+        phase = time.perf_counter()
+        created = TermResult.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        timings['create'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        if to_update:
+            TermResult.objects.bulk_update(
+                to_update,
+                ['total_subjects', 'total_score', 'average_score', 'gpa', 'updated_at'],
+                batch_size=BATCH_SIZE
+            )
+        timings['update'] = time.perf_counter() - phase
+
+    timings['total'] = time.perf_counter() - started
+
+    return {
+        'term_results': created + to_update + unchanged,
+        'created_count': len(created),
+        'updated_count': len(to_update),
+        'unchanged_count': len(unchanged),
+        'skipped_published': skipped_published,
+        'skipped_unassigned': skipped_unassigned,
+        'timings': timings,
+    }
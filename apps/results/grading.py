@@ -0,0 +1,175 @@
+"""
+Per-school grading scales.
+
+Each school's ResultTemplate is compiled into an immutable, sorted
+threshold table. Lookups use bisect, and the same table renders as a SQL
+CASE expression so grading can also run inside the database.
+
+Compiled scales are kept per process, each tagged with its school's
+version token from the shared cache. Saving or deleting a template
+replaces the token once the transaction commits, so every process
+recompiles that school's scale on its next lookup.
+"""
+from bisect import bisect_right
+from decimal import Decimal
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .expressions import grade_expression, grade_point_expression
+
+FAIL_GRADE = 'F'
+FAIL_POINT = Decimal('0.0')
+
+GRADE_POINTS = {
+    'A': Decimal('5.0'),
+    'B': Decimal('4.0'),
+    'C': Decimal('3.0'),
+    'D': Decimal('2.0'),
+    'E': Decimal('1.0'),
+}
+
+DEFAULT_MINIMUMS = {'A': 80, 'B': 70, 'C': 60, 'D': 50, 'E': 40}
+
+
+class GradingScale:
+    """Immutable grade lookup table for one school"""
+    __slots__ = ('_minimums', '_grades', '_points')
+
+    def __init__(self, minimums):
+        """Build from a {grade: minimum average} mapping"""
+        bands = sorted((Decimal(str(minimum)), grade) for grade, minimum in minimums.items())
+        object.__setattr__(self, '_minimums', tuple(minimum for minimum, _ in bands))
+        # Index 0 is the band below the lowest threshold
+        object.__setattr__(self, '_grades', (FAIL_GRADE,) + tuple(grade for _, grade in bands))
+        object.__setattr__(self, '_points', (FAIL_POINT,) + tuple(GRADE_POINTS[grade] for _, grade in bands))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GradingScale is immutable')
+
+    def __eq__(self, other):
+        return isinstance(other, GradingScale) and self.boundaries == other.boundaries
+
+    def __hash__(self):
+        return hash(self.boundaries)
+
+    def __repr__(self):
+        return f"GradingScale({dict(zip(self._grades[1:], self._minimums))})"
+
+    @classmethod
+    def from_template(cls, template):
+        """Compile a ResultTemplate's grade_*_min fields"""
+        return cls({
+            grade: getattr(template, f'grade_{grade.lower()}_min')
+            for grade in GRADE_POINTS
+        })
+
+    @property
+    def boundaries(self):
+        """(minimum, grade, grade point) tuples, highest band first"""
+        return tuple(reversed(list(zip(self._minimums, self._grades[1:], self._points[1:]))))
+
+    @property
+    def grades(self):
+        """Grade letters from highest to lowest, including the fail grade"""
+        return tuple(reversed(self._grades))
+
+    def band(self, average):
+        """Return (grade, grade point) for an average score"""
+        index = bisect_right(self._minimums, average)
+        return self._grades[index], self._points[index]
+
+    def grade(self, average):
+        return self.band(average)[0]
+
+    def grade_point(self, average):
+        return self.band(average)[1]
+
+    def grade_case(self, average='average_score'):
+        """SQL CASE expression grading the given average field"""
+        return grade_expression(self.boundaries, average)
+
+    def grade_point_case(self, average='average_score'):
+        """SQL CASE expression for the grade point of the given average field"""
+        return grade_point_expression(self.boundaries, average)
+
+
+DEFAULT_SCALE = GradingScale(DEFAULT_MINIMUMS)
+
+VERSION_KEY = 'results:grading-scale-version:{school}'
+
+# school_id -> (scale, version token), per process
+_school_scales = {}
+
+
+def _versions(school_ids):
+    """Current version token of each school's grading scale"""
+    keys = {VERSION_KEY.format(school=school_id): school_id for school_id in school_ids}
+    tokens = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in tokens]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid4().hex, None)
+        tokens.update(cache.get_many(missing))
+    return {school_id: tokens.get(key) for key, school_id in keys.items()}
+
+
+def get_grading_scales(school_ids):
+    """Return {school_id: compiled grading scale} for several schools"""
+    versions = _versions(set(school_ids))
+    scales = {}
+    stale = []
+    for school_id, version in versions.items():
+        cached = _school_scales.get(school_id)
+        if cached and version is not None and cached[1] == version:
+            scales[school_id] = cached[0]
+        else:
+            stale.append(school_id)
+
+    if stale:
+        from .models import ResultTemplate
+        templates = {
+            template.school_id: template
+            for template in ResultTemplate.objects.filter(school_id__in=stale)
+        }
+        for school_id in stale:
+            template = templates.get(school_id)
+            scale = GradingScale.from_template(template) if template else DEFAULT_SCALE
+            _school_scales[school_id] = (scale, versions[school_id])
+            scales[school_id] = scale
+    return scales
+
+
+def get_grading_scale(school_id):
+    """Return the compiled grading scale for a school"""
+    return get_grading_scales([school_id])[school_id]
+
+
+def get_class_grading_scales(class_ids):
+    """Return {class_id: grading scale of the class's school}"""
+    from apps.academics.models import Class
+    class_schools = dict(Class.objects.filter(id__in=set(class_ids)).values_list('id', 'school_id'))
+    scales = get_grading_scales(set(class_schools.values()))
+    return {
+        class_id: scales[class_schools[class_id]] if class_id in class_schools else DEFAULT_SCALE
+        for class_id in class_ids
+    }
+
+
+def get_class_grading_scale(class_id):
+    """Return the grading scale for the school a class belongs to"""
+    return get_class_grading_scales([class_id])[class_id]
+
+
+def invalidate_grading_scale(school_id=None):
+    """Drop cached scales for one school, or for every school this process has compiled"""
+    school_ids = list(_school_scales) if school_id is None else [school_id]
+    for cached_id in school_ids:
+        _school_scales.pop(cached_id, None)
+
+    def replace_versions():
+        cache.set_many({VERSION_KEY.format(school=cached_id): uuid4().hex for cached_id in school_ids}, None)
+
+    # Other processes recompile once the template change is visible to them
+    transaction.on_commit(replace_versions)
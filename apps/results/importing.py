@@ -0,0 +1,275 @@
+"""
+Chunked import of results sheets.
+
+An upload is saved to storage and handed to a Celery task. The task
+streams the CSV into ResultImportRow in chunks, then applies the staged
+rows chunk by chunk. Student IDs, subject names and teacher assignments
+are resolved against maps loaded once per import, and each chunk is
+written with one batched Result upsert. Progress is saved on the
+ResultImport after every chunk.
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .expressions import SCORE_COMPONENTS
+from .models import Result, ResultImport, ResultImportRow
+
+# Sheet column -> ResultImportRow field
+COLUMNS = {
+    'student_id': 'student_ref',
+    'subject': 'subject_name',
+    'first_ca': 'first_ca',
+    'second_ca': 'second_ca',
+    'exam_marks': 'exam_marks',
+    'remarks': 'remarks',
+}
+
+REQUIRED_COLUMNS = ['student_id', 'subject']
+
+
+class ImportFileError(ValueError):
+    """The uploaded sheet cannot be read as a results CSV"""
+
+
+def chunk_size():
+    """Rows staged and applied per batch"""
+    return getattr(settings, 'RESULTS_IMPORT_CHUNK_SIZE', 1000)
+
+
+def _save_progress(result_import, *fields):
+    result_import.save(update_fields=list(fields))
+
+
+def stage_rows(result_import, size=None):
+    """
+    Stream the uploaded CSV into ResultImportRow, one bulk insert per chunk.
+
+    Only one chunk of rows is held in memory at a time. Returns the number
+    of rows staged.
+    """
+    size = size or chunk_size()
+    result_import.rows.all().delete()
+
+    with result_import.file.open('rb') as handle:
+        reader = csv.DictReader(io.TextIOWrapper(handle, encoding='utf-8-sig', newline=''))
+        headers = {(name or '').strip().lower(): name for name in reader.fieldnames or []}
+        missing = [column for column in REQUIRED_COLUMNS if column not in headers]
+        if missing:
+            raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+
+        total = 0
+        batch = []
+        # Row 1 is the header
+        for row_number, row in enumerate(reader, 2):
+            values = {
+                field: (row.get(headers[column]) or '').strip()
+                for column, field in COLUMNS.items() if column in headers
+            }
+            if not any(values.values()):
+                continue
+            batch.append(ResultImportRow(result_import=result_import, row_number=row_number, **values))
+            if len(batch) >= size:
+                ResultImportRow.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        ResultImportRow.objects.bulk_create(batch)
+        total += len(batch)
+
+    result_import.total_rows = total
+    _save_progress(result_import, 'total_rows')
+    return total
+
+
+def load_lookups(result_import):
+    """
+    Maps used to resolve staged rows, each loaded with one query.
+
+    students maps the admission number to (id, current class id), subjects
+    the lower-cased subject name to its id and teachers (class id, subject
+    id) to the assigned teacher.
+    """
+    from apps.academics.models import Subject, TeacherAssignment
+    from apps.students.models import Student
+
+    school_id = result_import.school_id
+    students = {
+        student_id.upper(): (pk, class_id)
+        for pk, student_id, class_id in Student.objects.filter(
+            user__school_id=school_id, is_active=True
+        ).values_list('id', 'student_id', 'current_class_id')
+    }
+    subjects = {
+        name.strip().lower(): pk
+        for pk, name in Subject.objects.filter(school_id=school_id).values_list('id', 'name')
+    }
+    teachers = {}
+    for class_id, subject_id, teacher_id in TeacherAssignment.objects.filter(
+        class_assigned__school_id=school_id, is_active=True
+    ).order_by('id').values_list('class_assigned_id', 'subject_id', 'teacher_id'):
+        teachers.setdefault((class_id, subject_id), teacher_id)
+    return {'students': students, 'subjects': subjects, 'teachers': teachers}
+
+
+def _parse_score(value):
+    """Return a score from sheet text, raising ValueError when it is invalid"""
+    if value == '':
+        return None
+    try:
+        score = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a number")
+    if not score.is_finite() or not 0 <= score <= 100:
+        raise ValueError(f"{value} is outside 0-100")
+    return score.quantize(Decimal('0.01'))
+
+
+def build_result(row, term_id, lookups):
+    """Return an unsaved Result for a staged row, raising ValueError when it cannot be applied"""
+    student = lookups['students'].get(row.student_ref.upper())
+    if student is None:
+        raise ValueError(f"Student '{row.student_ref}' not found")
+    student_id, class_id = student
+    if class_id is None:
+        raise ValueError(f"Student '{row.student_ref}' is not in a class")
+
+    subject_id = lookups['subjects'].get(row.subject_name.lower())
+    if subject_id is None:
+        raise ValueError(f"Subject '{row.subject_name}' not found")
+
+    teacher_id = lookups['teachers'].get((class_id, subject_id))
+    if teacher_id is None:
+        raise ValueError(f"No teacher is assigned to {row.subject_name} for this student's class")
+
+    scores = {}
+    for component in SCORE_COMPONENTS:
+        try:
+            scores[component] = _parse_score(getattr(row, component))
+        except ValueError as error:
+            raise ValueError(f"{component}: {error}")
+    if all(score is None for score in scores.values()):
+        raise ValueError('No scores given')
+
+    return Result(
+        student_id=student_id,
+        subject_id=subject_id,
+        term_id=term_id,
+        class_for_term_id=class_id,
+        remarks=row.remarks,
+        teacher_id=teacher_id,
+        **scores
+    )
+
+
+def keep_stored_values(results, term_id):
+    """
+    Fill blank cells of unsaved results from the results already stored.
+
+    A sheet only overwrites the scores and remarks it carries, so one with
+    just exam marks leaves existing CA scores alone. results maps
+    (student id, subject id) to the unsaved Result; one query loads the
+    stored values.
+    """
+    if not results:
+        return
+    fields = SCORE_COMPONENTS + ['remarks']
+    stored = Result.objects.filter(
+        term_id=term_id,
+        student_id__in={student_id for student_id, _ in results},
+        subject_id__in={subject_id for _, subject_id in results}
+    ).values_list('student_id', 'subject_id', *fields)
+    for student_id, subject_id, *values in stored:
+        result = results.get((student_id, subject_id))
+        if result is None:
+            continue
+        for field, value in zip(fields, values):
+            if getattr(result, field) in (None, ''):
+                setattr(result, field, value)
+
+
+def apply_rows(result_import, size=None):
+    """
+    Upsert staged rows into Result one chunk at a time.
+
+    When a student and subject appear more than once the last row wins.
+    Blank cells keep the value already stored for that result.
+    Rows that cannot be applied keep their error; applied rows are removed
+    from the staging table. Returns the counts imported and rejected.
+    """
+    size = size or chunk_size()
+    lookups = load_lookups(result_import)
+    staged = ResultImportRow.objects.filter(result_import=result_import).order_by('row_number')
+
+    last_row_number = 0
+    while True:
+        # Keyset pagination, since applied rows are deleted as we go
+        chunk = list(staged.filter(row_number__gt=last_row_number)[:size])
+        if not chunk:
+            break
+        last_row_number = chunk[-1].row_number
+
+        results = {}
+        applied = []
+        rejected = []
+        for row in chunk:
+            try:
+                result = build_result(row, result_import.term_id, lookups)
+            except ValueError as error:
+                row.error = str(error)[:255]
+                rejected.append(row)
+                continue
+            # Upserting one key twice in a statement fails, so the later row wins
+            results[(result.student_id, result.subject_id)] = result
+            applied.append(row)
+
+        with transaction.atomic():
+            keep_stored_values(results, result_import.term_id)
+            Result.objects.upsert(list(results.values()))
+            ResultImportRow.objects.bulk_update(rejected, ['error'])
+            ResultImportRow.objects.filter(id__in=[row.id for row in applied]).delete()
+            result_import.processed_rows += len(chunk)
+            result_import.imported_count += len(applied)
+            result_import.error_count += len(rejected)
+            _save_progress(result_import, 'processed_rows', 'imported_count', 'error_count')
+
+    return {
+        'imported_count': result_import.imported_count,
+        'error_count': result_import.error_count,
+    }
+
+
+def run_import(result_import):
+    """Stage and apply an uploaded sheet, recording progress and the outcome"""
+    result_import.status = ResultImport.STAGING
+    result_import.started_at = timezone.now()
+    result_import.processed_rows = result_import.imported_count = result_import.error_count = 0
+    result_import.error_message = ''
+    _save_progress(
+        result_import, 'status', 'started_at', 'processed_rows',
+        'imported_count', 'error_count', 'error_message'
+    )
+
+    try:
+        stage_rows(result_import)
+        result_import.status = ResultImport.APPLYING
+        _save_progress(result_import, 'status')
+        apply_rows(result_import)
+    except (ImportFileError, UnicodeDecodeError, csv.Error) as error:
+        _finish(result_import, ResultImport.FAILED, str(error))
+    except Exception as error:
+        _finish(result_import, ResultImport.FAILED, f'Import stopped: {error}')
+        raise
+    else:
+        _finish(result_import, ResultImport.COMPLETED)
+    return result_import
+
+
+def _finish(result_import, status, error_message=''):
+    result_import.status = status
+    result_import.error_message = error_message
+    result_import.finished_at = timezone.now()
+    _save_progress(result_import, 'status', 'error_message', 'finished_at')
@@ -0,0 +1,237 @@
+"""
+Term result generation as tracked background jobs.
+
+A request creates a ResultGenerationJob, or joins the queued or running
+job that already covers the same work. A Celery task then generates one
+class at a time, each under a per-(term, class) lock, saving progress and
+timings on the job as classes finish. The incremental recompute takes
+the same locks, so no class is ever generated twice at once.
+
+The locks are transaction-level advisory locks on PostgreSQL and cache
+keys on other databases.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ResultGenerationJob
+
+LOCK_KEY = 'results:generation-lock:{term_id}:{class_id}'
+
+COUNT_FIELDS = [
+    'created_count', 'updated_count', 'unchanged_count', 'skipped_published',
+    'positions_updated', 'subject_positions_updated',
+]
+
+
+class GenerationLockTimeout(Exception):
+    """A class stayed locked by another generation for too long"""
+
+
+def lock_timeout():
+    """Seconds to wait for another generation of the same class"""
+    return getattr(settings, 'RESULTS_GENERATION_LOCK_TIMEOUT', 600)
+
+
+def job_timeout():
+    """Seconds after which an unfinished job is treated as abandoned"""
+    return getattr(settings, 'RESULTS_GENERATION_JOB_TIMEOUT', 3600)
+
+
+def _acquire_cache_lock(key):
+    token = uuid4().hex
+    deadline = time.monotonic() + lock_timeout()
+    while not cache.add(key, token, timeout=lock_timeout()):
+        if time.monotonic() > deadline:
+            raise GenerationLockTimeout(f'Timed out waiting for {key}')
+        time.sleep(0.2)
+    return key, token
+
+
+@contextmanager
+def generation_locks(term_id, class_ids):
+    """
+    Hold the generation lock of every (term, class) pair inside the block.
+
+    On PostgreSQL the block must run in transaction.atomic(); the advisory
+    locks are released when that transaction ends.
+    """
+    # A fixed order means two holders can never deadlock
+    class_ids = sorted(set(class_ids))
+
+    if connection.vendor == 'postgresql':
+        if not connection.in_atomic_block:
+            raise RuntimeError('generation_locks must be used inside transaction.atomic()')
+        with connection.cursor() as cursor:
+            for class_id in class_ids:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [term_id, class_id])
+        yield
+        return
+
+    held = []
+    try:
+        for class_id in class_ids:
+            held.append(_acquire_cache_lock(LOCK_KEY.format(term_id=term_id, class_id=class_id)))
+        yield
+    finally:
+        for key, token in held:
+            if cache.get(key) == token:
+                cache.delete(key)
+
+
+def _expire_abandoned_jobs():
+    """Fail jobs whose worker never finished them, so new requests are not coalesced into them"""
+    ResultGenerationJob.objects.filter(
+        status__in=ResultGenerationJob.ACTIVE_STATUSES,
+        created_at__lt=timezone.now() - timedelta(seconds=job_timeout())
+    ).update(
+        status=ResultGenerationJob.FAILED,
+        error_message='Abandoned before it finished',
+        finished_at=timezone.now()
+    )
+
+
+def start_generation_job(term, school_id, class_id, tie_method, user):
+    """
+    Return (job, created) for a generation request.
+
+    A queued or running job for the whole school, or for the same class,
+    with the same tie method is returned instead of starting another one.
+    New jobs are dispatched once the current transaction commits.
+    """
+    _expire_abandoned_jobs()
+    scope_key = f"{term.id}:{school_id}:{class_id or 'all'}:{tie_method}"
+
+    active = ResultGenerationJob.objects.filter(
+        term=term,
+        school_id=school_id,
+        tie_method=tie_method,
+        status__in=ResultGenerationJob.ACTIVE_STATUSES
+    )
+    covering = Q(class_for_term__isnull=True)
+    if class_id:
+        covering |= Q(class_for_term_id=class_id)
+    existing = active.filter(covering).order_by('created_at').first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = ResultGenerationJob.objects.create(
+                term=term,
+                school_id=school_id,
+                class_for_term_id=class_id,
+                tie_method=tie_method,
+                scope_key=scope_key,
+                requested_by=user,
+                task_id=str(uuid4())
+            )
+    except IntegrityError:
+        # A concurrent request created the same job first
+        existing = active.filter(scope_key=scope_key).first()
+        if existing is None:
+            # ...and it has already finished, so this request starts a fresh one
+            return start_generation_job(term, school_id, class_id, tie_method, user)
+        return existing, False
+
+    def dispatch():
+        from .tasks import generate_term_results_task
+        generate_term_results_task.apply_async((job.id,), task_id=job.task_id)
+
+    transaction.on_commit(dispatch, robust=True)
+    return job, True
+
+
+def generate_class(term, class_id, students, method):
+    """
+    Generate, rank and summarise term results for one class.
+
+    Must run inside transaction.atomic() while holding the class's
+    generation lock. Returns counts and per-phase timings.
+    """
+    from .generation import sync_term_results
+    from .ranking import rank_subject_results, rank_term_results
+    from .summaries import refresh_class_summaries
+    from .trends import refresh_performance_rollup
+
+    summary = sync_term_results(term, students.filter(current_class_id=class_id))
+    timings = summary['timings']
+
+    phase = time.perf_counter()
+    ranking = rank_term_results(term, [class_id], method=method)
+    timings['rank'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    subject_ranking = rank_subject_results(term, [class_id], method=method)
+    timings['subject_rank'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    refresh_class_summaries(term, [class_id])
+    timings['summaries'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    refresh_performance_rollup(term, [class_id])
+    timings['rollup'] = time.perf_counter() - phase
+
+    summary['positions_updated'] = ranking['positions_updated']
+    summary['subject_positions_updated'] = subject_ranking['positions_updated']
+    return summary
+
+
+def run_generation_job(job):
+    """Generate every class in a job's scope, saving progress after each class"""
+    from apps.students.models import Student
+
+    job.status = ResultGenerationJob.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=['status', 'started_at'])
+
+    students = Student.objects.filter(user__school_id=job.school_id, is_active=True)
+    if job.class_for_term_id:
+        students = students.filter(current_class_id=job.class_for_term_id)
+    class_ids = sorted(set(
+        students.filter(current_class__isnull=False)
+        .order_by().values_list('current_class_id', flat=True)
+    ))
+
+    counts = Counter({field: 0 for field in COUNT_FIELDS})
+    counts['skipped_unassigned'] = students.filter(current_class__isnull=True).count()
+    timings = Counter()
+    job.classes_total = len(class_ids)
+    job.summary = {**counts, 'timings': {}}
+    job.save(update_fields=['classes_total', 'summary'])
+
+    try:
+        for class_id in class_ids:
+            phase = time.perf_counter()
+            with transaction.atomic(), generation_locks(job.term_id, [class_id]):
+                summary = generate_class(job.term, class_id, students, job.tie_method)
+            summary['timings']['class_total'] = time.perf_counter() - phase
+
+            counts.update({field: summary[field] for field in COUNT_FIELDS})
+            timings.update(summary['timings'])
+            job.classes_done += 1
+            job.summary = {
+                **counts,
+                'timings': {name: round(seconds, 4) for name, seconds in timings.items()},
+            }
+            job.save(update_fields=['classes_done', 'summary'])
+    except Exception as error:
+        job.status = ResultGenerationJob.FAILED
+        job.error_message = str(error)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at'])
+        raise
+
+    job.status = ResultGenerationJob.COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+    return job
@@ -0,0 +1 @@
+# Management module for custom Django commands
\ No newline at end of file
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from apps.results.models import Result
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored score columns on existing results in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of result ids to update per statement'
+        )
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='Only backfill results for this term id'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        results = Result.objects.all()
+        if options['term']:
+            results = results.filter(term_id=options['term'])
+
+        if not results.exists():
+            self.stdout.write('No results to backfill.')
+            return
+
+        updated = results.refresh_scores_in_chunks(
+            chunk_size,
+            progress=lambda start, end, updated: self.stdout.write(
+                f'Processed ids {start}-{end} ({updated} results updated)'
+            )
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Backfilled scores for {updated} results'))
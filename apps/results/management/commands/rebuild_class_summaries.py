@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from apps.academics.models import Term
+from apps.results.models import TermResult
+from apps.results.summaries import refresh_class_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored class result summaries, including terms generated before summaries existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='Only rebuild summaries for this term id'
+        )
+
+    def handle(self, *args, **options):
+        term_ids = TermResult.objects.order_by().values_list('term_id', flat=True).distinct()
+        if options['term']:
+            term_ids = term_ids.filter(term_id=options['term'])
+
+        terms = Term.objects.filter(id__in=list(term_ids)).order_by('start_date')
+        if not terms:
+            self.stdout.write('No term results to summarise.')
+            return
+
+        # One term at a time keeps each rebuild one grouped aggregate and upsert
+        written = 0
+        for term in terms:
+            rows = refresh_class_summaries(term)
+            written += rows
+            self.stdout.write(f'{term}: {rows} class summaries')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {written} class summaries'))
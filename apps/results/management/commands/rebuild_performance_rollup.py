@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from apps.academics.models import Term
+from apps.results.models import Result
+from apps.results.trends import refresh_performance_rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-subject performance rollup used by trend reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term',
+            type=int,
+            help='Only rebuild the rollup for this term id'
+        )
+
+    def handle(self, *args, **options):
+        term_ids = Result.objects.order_by().values_list('term_id', flat=True).distinct()
+        if options['term']:
+            term_ids = term_ids.filter(term_id=options['term'])
+
+        terms = Term.objects.filter(id__in=list(term_ids)).select_related('academic_session').order_by('start_date')
+        if not terms:
+            self.stdout.write('No results to roll up.')
+            return
+
+        # One term at a time keeps each rebuild a bounded read and upsert
+        written = 0
+        for term in terms:
+            rows = refresh_performance_rollup(term)
+            written += rows
+            self.stdout.write(f'{term}: {rows} rollup rows')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {written} rollup rows'))
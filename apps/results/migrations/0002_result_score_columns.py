@@ -0,0 +1,127 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:11
+
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Func, IntegerField, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+# Frozen copies of the scoring rules as they stood when the columns were
+# added, so later changes to the app's expressions can't change this backfill
+SCORE_COMPONENTS = ['first_ca', 'second_ca', 'exam_marks']
+SCORE_FIELD = models.DecimalField(max_digits=10, decimal_places=4)
+GRADE_POINTS = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
+CHUNK_SIZE = 5000
+
+
+class Divide(Func):
+    arg_joiner = ' / '
+    template = '(%(expressions)s)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        numerator, denominator = self.get_source_expressions()
+        clone = self.copy()
+        clone.set_source_expressions([Cast(numerator, FloatField()), denominator])
+        return super(Divide, clone).as_sql(compiler, connection, **extra_context)
+
+
+def total_score():
+    return sum(
+        (Coalesce(F(name), Value(0), output_field=SCORE_FIELD) for name in SCORE_COMPONENTS),
+        Value(0, output_field=SCORE_FIELD)
+    )
+
+
+def average_score():
+    present = sum(
+        (Case(When(**{f'{name}__isnull': False}, then=Value(1)), default=Value(0),
+              output_field=IntegerField()) for name in SCORE_COMPONENTS),
+        Value(0, output_field=IntegerField())
+    )
+    return Round(
+        Coalesce(
+            Divide(total_score(), NullIf(present, Value(0)), output_field=SCORE_FIELD),
+            Value(0),
+            output_field=SCORE_FIELD
+        ),
+        2,
+        output_field=SCORE_FIELD
+    )
+
+
+def grade_cases(minimums):
+    """grade and grade_point CASE expressions for {grade: minimum average}"""
+    bands = sorted(((minimum, grade) for grade, minimum in minimums.items()), reverse=True)
+    grade = Case(
+        *[When(average_score__gte=minimum, then=Value(letter)) for minimum, letter in bands],
+        default=Value('F')
+    )
+    grade_point = Case(
+        *[When(average_score__gte=minimum, then=Value(GRADE_POINTS[letter])) for minimum, letter in bands],
+        default=Value(0),
+        output_field=models.DecimalField(max_digits=3, decimal_places=1)
+    )
+    return grade, grade_point
+
+
+def backfill_result_scores(apps, schema_editor):
+    Result = apps.get_model('results', 'Result')
+    ResultTemplate = apps.get_model('results', 'ResultTemplate')
+
+    templates = {
+        template.school_id: {grade: getattr(template, f'grade_{grade.lower()}_min') for grade in GRADE_POINTS}
+        for template in ResultTemplate.objects.all()
+    }
+    default = {'A': 80, 'B': 70, 'C': 60, 'D': 50, 'E': 40}
+
+    last_id = Result.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    for start in range(0, last_id, CHUNK_SIZE):
+        chunk = Result.objects.filter(id__gt=start, id__lte=start + CHUNK_SIZE)
+        chunk.update(total_score=total_score(), average_score=average_score())
+
+        for school_id, minimums in templates.items():
+            grade, grade_point = grade_cases(minimums)
+            chunk.filter(class_for_term__school_id=school_id).update(grade=grade, grade_point=grade_point)
+        grade, grade_point = grade_cases(default)
+        chunk.exclude(class_for_term__school_id__in=list(templates)).update(grade=grade, grade_point=grade_point)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='average_score',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='grade',
+            field=models.CharField(default='F', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='grade_point',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='total_score',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['term', 'subject', 'average_score'], name='results_res_term_id_6a1ee5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['term', 'class_for_term', 'average_score'], name='results_res_term_id_de5aa5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['term', 'subject', 'grade'], name='results_res_term_id_b8680c_idx'),
+        ),
+        migrations.RunPython(backfill_result_scores, migrations.RunPython.noop),
+    ]
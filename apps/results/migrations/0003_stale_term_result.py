@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        ('students', '0001_initial'),
+        ('results', '0002_result_score_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleTermResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.student')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.term')),
+            ],
+            options={
+                'unique_together': {('student', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        ('students', '0001_initial'),
+        ('results', '0003_stale_term_result'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermResultSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.TextField()),
+                ('etag', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.student')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.term')),
+                ('term_result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='results.termresult')),
+            ],
+            options={
+                'unique_together': {('student', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        ('students', '0001_initial'),
+        ('results', '0004_term_result_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectPerformanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('average_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('normalized_score', models.DecimalField(decimal_places=3, max_digits=6)),
+                ('class_rank', models.IntegerField()),
+                ('percentile', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('class_size', models.IntegerField()),
+                ('class_average', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_for_term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_rollups', to='students.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.term')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['class_for_term', 'term'], name='results_sub_class_f_e7b44e_idx')],
+                'unique_together': {('student', 'term', 'subject')},
+            },
+        ),
+    ]
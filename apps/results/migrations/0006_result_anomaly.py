@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('results', '0005_subject_performance_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('outlier', 'Score outlier'), ('components', 'Impossible component combination'), ('distribution_shift', 'Teacher distribution shift')], max_length=20)),
+                ('score', models.DecimalField(blank=True, decimal_places=3, max_digits=8, null=True)),
+                ('detail', models.CharField(max_length=255)),
+                ('is_reviewed', models.BooleanField(default=False)),
+                ('review_note', models.TextField(blank=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('class_for_term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.class')),
+                ('result', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='results.result')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.subject')),
+                ('teacher', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.term')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'class_for_term', 'is_reviewed'], name='results_res_term_id_53c813_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('schools', '0001_initial'),
+        ('results', '0006_result_anomaly'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='result_imports/')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('staging', 'Staging'), ('applying', 'Applying'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('imported_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_imports', to='schools.school')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.term')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ResultImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.IntegerField()),
+                ('student_ref', models.CharField(blank=True, max_length=50)),
+                ('subject_name', models.CharField(blank=True, max_length=100)),
+                ('first_ca', models.CharField(blank=True, max_length=20)),
+                ('second_ca', models.CharField(blank=True, max_length=20)),
+                ('exam_marks', models.CharField(blank=True, max_length=20)),
+                ('remarks', models.TextField(blank=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('result_import', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='results.resultimport')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['result_import', 'row_number'], name='results_res_result__76fc38_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0007_result_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='subject_class_average',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='subject_position',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        ('results', '0008_result_subject_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassTermSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_students', models.IntegerField(default=0)),
+                ('results_published', models.IntegerField(default=0)),
+                ('average_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('highest_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('lowest_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('median_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('std_dev', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('pass_count', models.IntegerField(default=0)),
+                ('pass_rate', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('histogram', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_for_term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to='academics.class')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.term')),
+            ],
+            options={
+                'unique_together': {('term', 'class_for_term')},
+            },
+        ),
+    ]
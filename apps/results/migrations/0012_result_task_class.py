@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        ('results', '0011_result_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resulttask',
+            name='class_for_term',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.class'),
+        ),
+        migrations.AlterField(
+            model_name='resulttask',
+            name='kind',
+            field=models.CharField(choices=[('notifications', 'Result Notifications'), ('report_cards', 'Report Cards'), ('anomaly_scan', 'Anomaly Scan')], max_length=20),
+        ),
+    ]
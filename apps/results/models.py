@@ -1,6 +1,120 @@
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .expressions import SCORE_COMPONENTS, total_score_expression, average_score_expression
+from .grading import (
+    DEFAULT_SCALE, GradingScale, get_class_grading_scale, get_class_grading_scales,
+    get_grading_scale, invalidate_grading_scale
+)
+
+SCORE_FIELDS = ['total_score', 'average_score', 'grade', 'grade_point']
+
+# Columns overwritten when an upserted result already exists
+UPSERT_FIELDS = [
+    'class_for_term', 'first_ca', 'second_ca', 'exam_marks',
+    'remarks', 'teacher', 'updated_at'
+]
+
+def mark_term_results_stale(pairs):
+    """Queue (student_id, term_id) pairs for an incremental TermResult recompute"""
+    from .recompute import mark_stale
+    mark_stale(pairs)
+
+class ResultQuerySet(models.QuerySet):
+    """QuerySet that keeps the stored score columns in step with the components"""
+    
+    def refresh_scores(self):
+        """Recompute stored score columns in the database for this queryset"""
+        with transaction.atomic(using=self.db):
+            updated = self.update(
+                total_score=total_score_expression(),
+                average_score=average_score_expression()
+            )
+            self.refresh_grades()
+        return updated
+    
+    def refresh_scores_in_chunks(self, chunk_size=5000, progress=None):
+        """
+        Recompute stored score columns a primary key range at a time.
+        
+        Each chunk is a short, index-driven UPDATE. progress, if given, is
+        called with (first id, last id, results updated so far) after each
+        chunk. Returns the number of results updated.
+        """
+        bounds = self.aggregate(first_id=models.Min('id'), last_id=models.Max('id'))
+        if bounds['first_id'] is None:
+            return 0
+        
+        updated = 0
+        start = bounds['first_id']
+        while start <= bounds['last_id']:
+            end = start + chunk_size
+            updated += self.filter(id__gte=start, id__lt=end).refresh_scores()
+            if progress:
+                progress(start, end - 1, updated)
+            start = end
+        return updated
+    
+    def refresh_grades(self):
+        """Regrade stored averages with each school's grading scale"""
+        school_ids = (
+            self.order_by()
+            .values_list('class_for_term__school_id', flat=True)
+            .distinct()
+        )
+        for school_id in list(school_ids):
+            scale = get_grading_scale(school_id)
+            self.filter(class_for_term__school_id=school_id).update(
+                grade=scale.grade_case(),
+                grade_point=scale.grade_point_case()
+            )
+    
+    def upsert(self, objs, batch_size=500):
+        """Insert results, updating rows that already exist for (student, subject, term)"""
+        return self.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['student', 'subject', 'term'],
+            update_fields=UPSERT_FIELDS
+        )
+    
+    def update(self, **kwargs):
+        if not set(kwargs) & set(SCORE_COMPONENTS):
+            return super().update(**kwargs)
+        # Components changed in SQL, so recompute the stored scores for the same rows
+        with transaction.atomic(using=self.db):
+            rows = list(self.values_list('pk', 'student_id', 'term_id'))
+            updated = super().update(**kwargs)
+            self.model.objects.using(self.db).filter(pk__in=[row[0] for row in rows]).refresh_scores()
+            mark_term_results_stale((student_id, term_id) for _, student_id, term_id in rows)
+        return updated
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        scales = get_class_grading_scales({obj.class_for_term_id for obj in objs})
+        for obj in objs:
+            obj.compute_scores(scales[obj.class_for_term_id])
+        update_fields = kwargs.get('update_fields')
+        if update_fields and set(update_fields) & set(SCORE_COMPONENTS):
+            kwargs['update_fields'] = list(update_fields) + [
+                field for field in SCORE_FIELDS if field not in update_fields
+            ]
+        created = super().bulk_create(objs, *args, **kwargs)
+        mark_term_results_stale((obj.student_id, obj.term_id) for obj in objs)
+        return created
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if set(fields) & set(SCORE_COMPONENTS):
+            objs = list(objs)
+            scales = get_class_grading_scales({obj.class_for_term_id for obj in objs})
+            for obj in objs:
+                obj.compute_scores(scales[obj.class_for_term_id])
+            fields = list(fields) + [field for field in SCORE_FIELDS if field not in fields]
+            mark_term_results_stale((obj.student_id, obj.term_id) for obj in objs)
+        return super().bulk_update(objs, fields, *args, **kwargs)
 
 class Result(models.Model):
     """
@@ -53,6 +167,16 @@ class Result(models.Model):
         verbose_name="Examination Marks"
     )
     
+    # Computed scores, stored so analytics can run in the database
+    total_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    average_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    grade = models.CharField(max_length=1, default='F')
+    grade_point = models.DecimalField(max_digits=3, decimal_places=1, default=0)
+    
+    # Place in the class for this subject, set in bulk by rank_subject_results
+    subject_position = models.IntegerField(null=True, blank=True)
+    subject_class_average = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    
     # Additional fields
     remarks = models.TextField(blank=True)
     teacher = models.ForeignKey(
@@ -66,51 +190,47 @@ class Result(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ResultQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['student', 'subject', 'term']
+        indexes = [
+            models.Index(fields=['term', 'subject', 'average_score']),
+            models.Index(fields=['term', 'class_for_term', 'average_score']),
+            models.Index(fields=['term', 'subject', 'grade']),
+        ]
     
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.subject.name} - {self.term.name}"
     
-    @property
-    def total_score(self):
-        """Calculate total score from all assessments"""
-        scores = [self.first_ca, self.second_ca, self.exam_marks]
-        valid_scores = [score for score in scores if score is not None]
-        return sum(valid_scores) if valid_scores else 0
-    
-    @property
-    def average_score(self):
-        """Calculate average score"""
-        scores = [self.first_ca, self.second_ca, self.exam_marks]
-        valid_scores = [score for score in scores if score is not None]
-        return sum(valid_scores) / len(valid_scores) if valid_scores else 0
+    def save(self, *args, **kwargs):
+        self.compute_scores()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(SCORE_COMPONENTS):
+            kwargs['update_fields'] = set(update_fields) | set(SCORE_FIELDS)
+        super().save(*args, **kwargs)
+        if update_fields is None or set(update_fields) & set(SCORE_COMPONENTS):
+            mark_term_results_stale([(self.student_id, self.term_id)])
     
-    @property
-    def grade(self):
-        """Calculate grade based on average score"""
-        avg = self.average_score
-        if avg >= 80:
-            return 'A'
-        elif avg >= 70:
-            return 'B'
-        elif avg >= 60:
-            return 'C'
-        elif avg >= 50:
-            return 'D'
-        elif avg >= 40:
-            return 'E'
-        else:
-            return 'F'
+    def delete(self, *args, **kwargs):
+        stale = (self.student_id, self.term_id)
+        result = super().delete(*args, **kwargs)
+        mark_term_results_stale([stale])
+        return result
     
-    @property
-    def grade_point(self):
-        """Get grade point based on grade"""
-        grade_points = {
-            'A': 5.0, 'B': 4.0, 'C': 3.0,
-            'D': 2.0, 'E': 1.0, 'F': 0.0
-        }
-        return grade_points.get(self.grade, 0.0)
+    def compute_scores(self, scale=None):
+        """Calculate the stored score columns from the assessment components"""
+        scores = [getattr(self, name) for name in SCORE_COMPONENTS]
+        valid_scores = [Decimal(str(score)) for score in scores if score is not None]
+        total = sum(valid_scores, Decimal('0'))
+        average = total / len(valid_scores) if valid_scores else Decimal('0')
+        
+        self.total_score = total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        self.average_score = average.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        
+        if scale is None:
+            scale = get_class_grading_scale(self.class_for_term_id)
+        self.grade, self.grade_point = scale.band(self.average_score)
 
 class TermResult(models.Model):
     """
@@ -184,31 +304,445 @@ class TermResult(models.Model):
     
     def calculate_results(self):
         """Calculate aggregated results from individual subject results"""
-        subject_results = self.student.results.filter(term=self.term)
+        totals = self.student.results.filter(term=self.term).aggregate(
+            total_subjects=models.Count('id'),
+            total_score=models.Sum('average_score'),
+            total_grade_points=models.Sum('grade_point')
+        )
+        total_subjects = totals['total_subjects']
         
-        if not subject_results.exists():
+        if not total_subjects:
             return
         
-        total_score = sum([result.average_score for result in subject_results])
-        total_subjects = subject_results.count()
-        total_grade_points = sum([result.grade_point for result in subject_results])
-        
         self.total_subjects = total_subjects
-        self.total_score = total_score
-        self.average_score = total_score / total_subjects if total_subjects > 0 else 0
-        self.gpa = total_grade_points / total_subjects if total_subjects > 0 else 0
+        self.total_score = totals['total_score']
+        self.average_score = totals['total_score'] / total_subjects
+        self.gpa = totals['total_grade_points'] / total_subjects
         self.save()
     
-    def calculate_position(self):
+    def calculate_position(self, method=None):
         """Calculate position in class based on average score"""
-        class_results = TermResult.objects.filter(
-            term=self.term,
-            class_for_term=self.class_for_term
-        ).order_by('-average_score')
-        
-        for position, result in enumerate(class_results, 1):
-            result.position = position
-            result.save(update_fields=['position'])
+        from .ranking import rank_term_results
+        rank_term_results(self.term, [self.class_for_term_id], method=method)
+
+class TermResultSnapshot(models.Model):
+    """
+    Published term result frozen as the JSON served to students
+    """
+    term_result = models.OneToOneField(
+        TermResult,
+        on_delete=models.CASCADE,
+        related_name='snapshot'
+    )
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    payload = models.TextField()
+    etag = models.CharField(max_length=64)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['student', 'term']
+    
+    def __str__(self):
+        return f"Snapshot of term result {self.term_result_id}"
+
+class SubjectPerformanceRollup(models.Model):
+    """
+    One row per (student, term, subject) with the score placed in its class
+    """
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='performance_rollups'
+    )
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    subject = models.ForeignKey(
+        'academics.Subject',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    class_for_term = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    
+    average_score = models.DecimalField(max_digits=5, decimal_places=2)
+    # Standard score within the class for this subject and term
+    normalized_score = models.DecimalField(max_digits=6, decimal_places=3)
+    class_rank = models.IntegerField()
+    # Percentile rank in the class, counting tied scores as half
+    percentile = models.DecimalField(max_digits=5, decimal_places=2)
+    class_size = models.IntegerField()
+    class_average = models.DecimalField(max_digits=5, decimal_places=2)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['student', 'term', 'subject']
+        indexes = [
+            models.Index(fields=['class_for_term', 'term']),
+        ]
+    
+    def __str__(self):
+        return f"Rollup - student {self.student_id}, term {self.term_id}, subject {self.subject_id}"
+
+class ClassTermSummary(models.Model):
+    """
+    Precomputed result statistics for a class in a term
+    """
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    class_for_term = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='term_summaries'
+    )
+    
+    total_students = models.IntegerField(default=0)
+    results_published = models.IntegerField(default=0)
+    average_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    highest_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    lowest_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    median_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    std_dev = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    pass_count = models.IntegerField(default=0)
+    pass_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # Students per band of term averages, lowest band first
+    histogram = models.JSONField(default=list)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['term', 'class_for_term']
+    
+    def __str__(self):
+        return f"Summary - class {self.class_for_term_id}, term {self.term_id}"
+
+class ResultAnomaly(models.Model):
+    """
+    Suspicious score flagged for review before results are published
+    """
+    OUTLIER = 'outlier'
+    COMPONENTS = 'components'
+    DISTRIBUTION_SHIFT = 'distribution_shift'
+    
+    KIND_CHOICES = [
+        (OUTLIER, 'Score outlier'),
+        (COMPONENTS, 'Impossible component combination'),
+        (DISTRIBUTION_SHIFT, 'Teacher distribution shift'),
+    ]
+    
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    class_for_term = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    subject = models.ForeignKey(
+        'academics.Subject',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Set for flags on a single score, empty for class-level flags
+    result = models.ForeignKey(
+        Result,
+        on_delete=models.CASCADE,
+        related_name='anomalies',
+        null=True,
+        blank=True
+    )
+    teacher = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    score = models.DecimalField(max_digits=8, decimal_places=3, null=True, blank=True)
+    detail = models.CharField(max_length=255)
+    
+    # Review
+    is_reviewed = models.BooleanField(default=False)
+    review_note = models.TextField(blank=True)
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'class_for_term', 'is_reviewed']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.detail}"
+
+class StaleTermResult(models.Model):
+    """
+    A (student, term) pair whose TermResult is out of date after a score edit
+    """
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    marked_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ['student', 'term']
+    
+    def __str__(self):
+        return f"Stale term result - student {self.student_id}, term {self.term_id}"
+
+class ResultGenerationJob(models.Model):
+    """
+    A background run of term result generation for a class or a school
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [QUEUED, RUNNING]
+    
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    school = models.ForeignKey(
+        'schools.School',
+        on_delete=models.CASCADE,
+        related_name='result_generation_jobs'
+    )
+    # Empty when every class in the school is generated
+    class_for_term = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    tie_method = models.CharField(max_length=20)
+    # Identifies the work requested so duplicate requests share one job
+    scope_key = models.CharField(max_length=100)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    task_id = models.CharField(max_length=255, blank=True)
+    
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    classes_total = models.IntegerField(default=0)
+    classes_done = models.IntegerField(default=0)
+    # Counts and per-phase timings, filled in as classes finish
+    summary = models.JSONField(default=dict)
+    error_message = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_result_generation_job'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Result generation {self.id} - {self.get_status_display()}"
+    
+    @property
+    def progress(self):
+        """Percentage of classes generated"""
+        if not self.classes_total:
+            return 100.0 if self.status == self.COMPLETED else 0.0
+        return round(self.classes_done / self.classes_total * 100, 1)
+
+class ResultTask(models.Model):
+    """
+    A background task started for a school, so its progress is only shown to that school
+    """
+    NOTIFICATIONS = 'notifications'
+    REPORT_CARDS = 'report_cards'
+    ANOMALY_SCAN = 'anomaly_scan'
+    
+    KIND_CHOICES = [
+        (NOTIFICATIONS, 'Result Notifications'),
+        (REPORT_CARDS, 'Report Cards'),
+        (ANOMALY_SCAN, 'Anomaly Scan'),
+    ]
+    
+    school = models.ForeignKey(
+        'schools.School',
+        on_delete=models.CASCADE,
+        related_name='result_tasks'
+    )
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Set when the task only covers one class of the term
+    class_for_term = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # Celery task id, or group id for notifications and report cards
+    task_id = models.CharField(max_length=255, unique=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} task {self.task_id}"
+
+class ResultImport(models.Model):
+    """
+    An uploaded results sheet applied in chunks by a background job
+    """
+    PENDING = 'pending'
+    STAGING = 'staging'
+    APPLYING = 'applying'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (STAGING, 'Staging'),
+        (APPLYING, 'Applying'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+    
+    school = models.ForeignKey(
+        'schools.School',
+        on_delete=models.CASCADE,
+        related_name='result_imports'
+    )
+    term = models.ForeignKey(
+        'academics.Term',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    file = models.FileField(upload_to='result_imports/')
+    
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    imported_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Result import {self.id} - {self.get_status_display()}"
+    
+    @property
+    def progress(self):
+        """Percentage of staged rows applied"""
+        if not self.total_rows:
+            return 100.0 if self.status == self.COMPLETED else 0.0
+        return round(self.processed_rows / self.total_rows * 100, 1)
+
+class ResultImportRow(models.Model):
+    """
+    A raw row of an uploaded results sheet, kept while its import runs
+    """
+    result_import = models.ForeignKey(
+        ResultImport,
+        on_delete=models.CASCADE,
+        related_name='rows'
+    )
+    row_number = models.IntegerField()
+    
+    # Values as they appear in the sheet
+    student_ref = models.CharField(max_length=50, blank=True)
+    subject_name = models.CharField(max_length=100, blank=True)
+    first_ca = models.CharField(max_length=20, blank=True)
+    second_ca = models.CharField(max_length=20, blank=True)
+    exam_marks = models.CharField(max_length=20, blank=True)
+    remarks = models.TextField(blank=True)
+    
+    # Why the row was not applied
+    error = models.CharField(max_length=255, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['result_import', 'row_number']),
+        ]
+    
+    def __str__(self):
+        return f"Import {self.result_import_id} row {self.row_number}"
 
 class ResultTemplate(models.Model):
     """
@@ -246,4 +780,30 @@ class ResultTemplate(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Result Template - {self.school.name}"
\ No newline at end of file
+        return f"Result Template - {self.school.name}"
+    
+    def save(self, *args, **kwargs):
+        previous = ResultTemplate.objects.filter(pk=self.pk).first() if self.pk else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            invalidate_grading_scale(self.school_id)
+            
+            # Regrade stored results when the boundaries move
+            previous_scale = GradingScale.from_template(previous) if previous else DEFAULT_SCALE
+            if GradingScale.from_template(self) != previous_scale:
+                self.regrade_results(self.school_id)
+    
+    def delete(self, *args, **kwargs):
+        school_id = self.school_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            invalidate_grading_scale(school_id)
+            self.regrade_results(school_id)
+        return result
+    
+    @staticmethod
+    def regrade_results(school_id):
+        """Regrade a school's results and queue their term results for recompute"""
+        results = Result.objects.filter(class_for_term__school_id=school_id)
+        results.refresh_grades()
+        mark_term_results_stale(results.order_by().values_list('student_id', 'term_id').distinct())
@@ -0,0 +1,96 @@
+"""
+Set-based publishing of term results.
+
+Results are published with a single UPDATE and parent notifications are
+queued after the transaction commits, as a Celery group whose messages
+each carry a chunk of term result ids.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import TermResult
+
+
+def notification_chunk_size():
+    """Term results notified per Celery message"""
+    return getattr(settings, 'RESULTS_NOTIFICATION_CHUNK_SIZE', 100)
+
+
+def publish_term_results(term_results):
+    """Publish the unpublished rows of a TermResult queryset and return their ids"""
+    now = timezone.now()
+    pending = term_results.filter(is_published=False)
+    connection = connections[pending.db]
+
+    if connection.vendor == 'postgresql':
+        subquery, params = pending.order_by().values('id').query.sql_with_params()
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            # is_published is rechecked so concurrent publishes never both claim a row
+            cursor.execute(
+                f"UPDATE {quote(TermResult._meta.db_table)} "
+                f"SET {quote('is_published')} = TRUE, {quote('published_at')} = %s, "
+                f"{quote('updated_at')} = %s "
+                f"WHERE {quote('id')} IN ({subquery}) AND {quote('is_published')} = FALSE "
+                f"RETURNING {quote('id')}",
+                [now, now, *params]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    with transaction.atomic(using=pending.db):
+        published_ids = list(pending.select_for_update().values_list('id', flat=True))
+        TermResult.objects.using(pending.db).filter(id__in=published_ids).update(
+            is_published=True, published_at=now, updated_at=now
+        )
+    return published_ids
+
+
+def queue_result_notifications(term_result_ids, chunk_size=None):
+    """
+    Queue parent notifications once the current transaction commits.
+
+    Returns the id of the Celery group that will carry the notifications,
+    usable as a progress handle, or None when there is nothing to send.
+    """
+    term_result_ids = list(term_result_ids)
+    if not term_result_ids:
+        return None
+    chunk_size = chunk_size or notification_chunk_size()
+    group_id = str(uuid4())
+
+    def dispatch():
+        from .tasks import send_result_notification
+        notifications = send_result_notification.chunks(
+            [(term_result_id,) for term_result_id in term_result_ids], chunk_size
+        ).group()
+        notifications.apply_async(task_id=group_id).save()
+
+    transaction.on_commit(dispatch, robust=True)
+    return group_id
+
+
+def notification_progress(group_id):
+    """Progress of a notification group queued by queue_result_notifications"""
+    from celery.result import GroupResult
+
+    group_result = GroupResult.restore(group_id)
+    if group_result is None:
+        return {'group_id': group_id, 'state': 'PENDING', 'chunks_total': None, 'chunks_completed': 0}
+
+    chunks_total = len(group_result.results)
+    chunks_completed = group_result.completed_count()
+    if group_result.failed():
+        state = 'FAILURE'
+    elif chunks_completed == chunks_total:
+        state = 'SUCCESS'
+    else:
+        state = 'PROGRESS'
+    return {
+        'group_id': group_id,
+        'state': state,
+        'chunks_total': chunks_total,
+        'chunks_completed': chunks_completed,
+    }
@@ -0,0 +1,193 @@
+"""
+Class ranking for term results and subject results.
+
+Positions for every (term, class) group, and for every (term, class,
+subject) group of subject results, are computed in one pass with
+RANK()/DENSE_RANK() where the database supports window functions, with a
+pure-Python fallback that produces identical positions.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, F, Window
+from django.db.models.functions import DenseRank, Rank
+
+from .models import Result, TermResult
+
+SUBJECT_BATCH_SIZE = 1000
+
+TWO_PLACES = Decimal('0.01')
+
+# Tied scores share a position and the next position is skipped (1, 1, 3)
+COMPETITION = 'competition'
+# Tied scores share a position and no position is skipped (1, 1, 2)
+DENSE = 'dense'
+
+TIE_METHODS = {
+    COMPETITION: Rank,
+    DENSE: DenseRank,
+}
+
+
+def default_tie_method():
+    """Tie handling configured for the project"""
+    return getattr(settings, 'RESULTS_POSITION_TIE_METHOD', COMPETITION)
+
+
+def window_ranking_supported():
+    """Whether positions should be computed by the database"""
+    # SQLite runs use the Python ranking so they match production output
+    return connection.vendor == 'postgresql'
+
+
+def rank_values(values, method=COMPETITION):
+    """Return positions for values already sorted best-first"""
+    positions = []
+    position = 0
+    previous = object()
+    for index, value in enumerate(values, 1):
+        if value != previous:
+            position = index if method == COMPETITION else position + 1
+            previous = value
+        positions.append(position)
+    return positions
+
+
+def _window_positions(queryset, method):
+    """Yield (id, class_id, current, new) using a window function"""
+    ranking = Window(
+        expression=TIE_METHODS[method](),
+        partition_by=[F('class_for_term_id')],
+        order_by=F('average_score').desc()
+    )
+    yield from queryset.annotate(new_position=ranking).values_list(
+        'id', 'class_for_term_id', 'position', 'new_position'
+    )
+
+
+def _python_positions(queryset, method):
+    """Yield (id, class_id, current, new) ranking rows in Python"""
+    rows = queryset.order_by('class_for_term_id', '-average_score', 'id').values_list(
+        'id', 'class_for_term_id', 'position', 'average_score'
+    )
+    for class_id, class_rows in groupby(rows, key=lambda row: row[1]):
+        class_rows = list(class_rows)
+        positions = rank_values([row[3] for row in class_rows], method)
+        for (pk, _, current, _), new in zip(class_rows, positions):
+            yield pk, class_id, current, new
+
+
+def rank_term_results(term, class_ids=None, method=None, use_window=None):
+    """
+    Assign class positions for a term ordered by average score.
+
+    Only rows whose position changed are written, with one bulk update per
+    class. Returns counts of classes ranked and rows updated.
+    """
+    method = method or default_tie_method()
+    if method not in TIE_METHODS:
+        raise ValueError(f"Unknown tie method '{method}'")
+    if use_window is None:
+        use_window = window_ranking_supported()
+
+    queryset = TermResult.objects.filter(term=term)
+    if class_ids is not None:
+        queryset = queryset.filter(class_for_term_id__in=list(class_ids))
+
+    rows = _window_positions(queryset, method) if use_window else _python_positions(queryset, method)
+
+    changed = {}
+    classes = set()
+    for pk, class_id, current, new in rows:
+        classes.add(class_id)
+        if current != new:
+            changed.setdefault(class_id, []).append(TermResult(id=pk, position=new))
+
+    with transaction.atomic():
+        for class_changes in changed.values():
+            TermResult.objects.bulk_update(class_changes, ['position'])
+
+    return {
+        'classes_ranked': len(classes),
+        'positions_updated': sum(len(class_changes) for class_changes in changed.values()),
+        'tie_method': method,
+    }
+
+
+def _class_average(value):
+    return Decimal(str(value)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def _window_subject_positions(queryset, method):
+    """Yield (id, current position, current average, new position, new average)"""
+    partition = [F('class_for_term_id'), F('subject_id')]
+    rows = queryset.annotate(
+        new_position=Window(
+            expression=TIE_METHODS[method](),
+            partition_by=partition,
+            order_by=F('average_score').desc()
+        ),
+        new_average=Window(expression=Avg('average_score'), partition_by=partition)
+    ).values_list('id', 'subject_position', 'subject_class_average', 'new_position', 'new_average')
+    for pk, position, average, new_position, new_average in rows:
+        yield pk, position, average, new_position, _class_average(new_average)
+
+
+def _python_subject_positions(queryset, method):
+    """Python version of _window_subject_positions"""
+    rows = queryset.order_by('class_for_term_id', 'subject_id', '-average_score', 'id').values_list(
+        'id', 'class_for_term_id', 'subject_id', 'subject_position',
+        'subject_class_average', 'average_score'
+    )
+    for _, group in groupby(rows, key=lambda row: row[1:3]):
+        group = list(group)
+        scores = [row[5] for row in group]
+        average = _class_average(sum(scores) / len(scores))
+        for (pk, _, _, position, current_average, _), new in zip(group, rank_values(scores, method)):
+            yield pk, position, current_average, new, average
+
+
+def rank_subject_results(term, class_ids=None, method=None, use_window=None):
+    """
+    Assign subject positions and class averages for a term's results.
+
+    Each school's results are placed within their (class, subject) group
+    with one window query, and only rows whose position or class average
+    changed are written, in batched bulk updates. Returns counts of
+    results ranked and rows updated.
+    """
+    method = method or default_tie_method()
+    if method not in TIE_METHODS:
+        raise ValueError(f"Unknown tie method '{method}'")
+    if use_window is None:
+        use_window = window_ranking_supported()
+
+    results = Result.objects.filter(term=term)
+    if class_ids is not None:
+        results = results.filter(class_for_term_id__in=list(class_ids))
+    school_ids = results.order_by().values_list('class_for_term__school_id', flat=True).distinct()
+
+    ranked = 0
+    changed = []
+    for school_id in list(school_ids):
+        school_results = results.filter(class_for_term__school_id=school_id)
+        positions = _window_subject_positions if use_window else _python_subject_positions
+        for pk, position, average, new_position, new_average in positions(school_results, method):
+            ranked += 1
+            if position != new_position or average != new_average:
+                changed.append(Result(
+                    id=pk, subject_position=new_position, subject_class_average=new_average
+                ))
+
+    with transaction.atomic():
+        Result.objects.bulk_update(
+            changed, ['subject_position', 'subject_class_average'], batch_size=SUBJECT_BATCH_SIZE
+        )
+
+    return {
+        'results_ranked': ranked,
+        'positions_updated': len(changed),
+        'tie_method': method,
+    }
@@ -0,0 +1,117 @@
+"""
+Incremental TermResult recompute after score edits.
+
+Saving a Result marks its (student, term) pair stale. A debounced Celery
+task later recomputes only the stale TermResult rows and re-ranks only the
+classes they belong to, so a burst of edits collapses into one recompute.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import StaleTermResult, TermResult
+
+SCHEDULE_KEY = 'results:recompute-scheduled'
+
+
+def recompute_delay():
+    """Seconds edits are collected before the recompute task runs"""
+    return getattr(settings, 'RESULTS_RECOMPUTE_DELAY', 30)
+
+
+def mark_stale(pairs):
+    """Record (student_id, term_id) pairs as stale and schedule a recompute"""
+    now = timezone.now()
+    stale = [
+        StaleTermResult(student_id=student_id, term_id=term_id, marked_at=now)
+        for student_id, term_id in set(pairs)
+    ]
+    if not stale:
+        return
+    # Re-marking refreshes marked_at so an in-flight recompute keeps the row
+    StaleTermResult.objects.bulk_create(
+        stale,
+        update_conflicts=True,
+        unique_fields=['student', 'term'],
+        update_fields=['marked_at']
+    )
+    schedule_recompute()
+
+
+def schedule_recompute():
+    """Queue one recompute per debounce window, after the current transaction commits"""
+    delay = recompute_delay()
+    if not cache.add(SCHEDULE_KEY, True, timeout=delay):
+        return
+
+    def dispatch():
+        from .tasks import recompute_stale_term_results
+        recompute_stale_term_results.apply_async(countdown=delay)
+
+    transaction.on_commit(dispatch, robust=True)
+
+
+def recompute_stale():
+    """
+    Recompute TermResult rows for every stale pair and re-rank their classes.
+
+    Pairs marked again while this runs stay queued for the next pass.
+    Returns counts of pairs processed, term results updated and classes ranked.
+    """
+    from apps.academics.models import Term
+    from apps.students.models import Student
+    from .generation import sync_term_results
+    from .jobs import generation_locks
+    from .ranking import rank_subject_results, rank_term_results
+    from .summaries import refresh_class_summaries
+    from .trends import refresh_performance_rollup
+
+    snapshot = timezone.now()
+    marks = list(
+        StaleTermResult.objects.filter(marked_at__lte=snapshot)
+        .values_list('id', 'student_id', 'term_id')
+    )
+    students_by_term = defaultdict(set)
+    for _, student_id, term_id in marks:
+        students_by_term[term_id].add(student_id)
+
+    updated_count = 0
+    classes_ranked = 0
+    terms = Term.objects.in_bulk(list(students_by_term))
+    for term_id, student_ids in students_by_term.items():
+        term = terms.get(term_id)
+        if term is None:
+            continue
+
+        # Only refresh term results that generation has already created
+        generated = dict(
+            TermResult.objects.filter(term=term, student_id__in=student_ids)
+            .values_list('student_id', 'class_for_term_id')
+        )
+        if not generated:
+            continue
+
+        class_ids = set(generated.values())
+        with transaction.atomic(), generation_locks(term.id, class_ids):
+            summary = sync_term_results(term, Student.objects.filter(id__in=list(generated)))
+            changed = summary['created_count'] + summary['updated_count']
+            if changed:
+                classes_ranked += rank_term_results(term, class_ids)['classes_ranked']
+            rank_subject_results(term, class_ids)
+            refresh_class_summaries(term, class_ids)
+            refresh_performance_rollup(term, class_ids)
+            updated_count += changed
+
+    StaleTermResult.objects.filter(
+        id__in=[mark_id for mark_id, _, _ in marks],
+        marked_at__lte=snapshot
+    ).delete()
+
+    return {
+        'pairs_processed': len(marks),
+        'term_results_updated': updated_count,
+        'classes_ranked': classes_ranked,
+    }
@@ -0,0 +1,125 @@
+"""
+PDF layout for a single report card.
+
+This module only depends on reportlab and works on the plain dict built by
+apps.results.report_cards, so the layout can be rendered and tested
+without Django.
+"""
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+def _subject_columns(flags):
+    """(heading, key) pairs for the subject table allowed by the template flags"""
+    columns = [('Subject', 'subject')]
+    if flags['show_ca_scores']:
+        columns += [('1st CA', 'first_ca'), ('2nd CA', 'second_ca')]
+    if flags['show_exam_scores']:
+        columns.append(('Exam', 'exam_marks'))
+    if flags['show_total_scores']:
+        columns += [('Total', 'total_score'), ('Average', 'average_score')]
+    if flags['show_grades']:
+        columns.append(('Grade', 'grade'))
+    if flags['show_positions']:
+        columns += [('Class Avg', 'class_average'), ('Position', 'position')]
+    return columns
+
+
+def _summary_rows(card):
+    """Term summary lines allowed by the template flags"""
+    flags = card['template']
+    summary = card['summary']
+    rows = [
+        ['Subjects offered', summary['total_subjects']],
+        ['Total score', summary['total_score']],
+        ['Average score', summary['average_score']],
+    ]
+    if flags['show_gpa']:
+        rows.append(['GPA', summary['gpa']])
+    if flags['show_positions'] and summary['position']:
+        rows.append(['Position', f"{summary['position']} of {summary['class_size']}"])
+    return rows
+
+
+def build_story(card):
+    """Flowables for one report card"""
+    styles = getSampleStyleSheet()
+    school = card['school']
+    student = card['student']
+    accent = colors.HexColor(school['color'])
+
+    story = [
+        Paragraph(escape(school['name']), styles['Title']),
+        Paragraph(escape(school['address']), styles['Normal']),
+        Spacer(1, 4 * mm),
+        Paragraph(escape(f"Report Card - {card['term']} ({card['session']})"), styles['Heading2']),
+        Table(
+            [
+                ['Name', student['name'], 'Student ID', student['student_id']],
+                ['Class', card['class_name'], 'Term', card['term']],
+            ],
+            colWidths=[25 * mm, 60 * mm, 25 * mm, 60 * mm],
+            style=TableStyle([('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                              ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold')])
+        ),
+        Spacer(1, 4 * mm),
+    ]
+
+    columns = _subject_columns(card['template'])
+    rows = [[heading for heading, _ in columns]]
+    rows += [[subject[key] if subject[key] is not None else '-' for _, key in columns]
+             for subject in card['subjects']]
+    story.append(Table(rows, repeatRows=1, style=TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), accent),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ])))
+    story.append(Spacer(1, 4 * mm))
+
+    story.append(Table(_summary_rows(card), colWidths=[40 * mm, 40 * mm], style=TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ])))
+    story.append(Spacer(1, 4 * mm))
+
+    for label, key in [("Class teacher's comment", 'class_teacher_comment'),
+                       ("Principal's comment", 'principal_comment')]:
+        if card['comments'][key]:
+            story.append(Paragraph(f"<b>{label}:</b> {escape(card['comments'][key])}", styles['Normal']))
+
+    signature = card['template']['principal_signature']
+    if signature:
+        story.append(Spacer(1, 6 * mm))
+        story.append(Image(signature, width=40 * mm, height=15 * mm, kind='proportional'))
+        story.append(Paragraph('Principal', styles['Normal']))
+
+    return story
+
+
+def render(card, path):
+    """Render a card to path, replacing any existing file atomically"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(handle)
+    try:
+        document = SimpleDocTemplate(
+            temporary, pagesize=A4,
+            title=f"{card['student']['name']} - {card['term']}",
+            leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm
+        )
+        document.build(build_story(card))
+        os.replace(temporary, path)
+    except Exception:
+        os.unlink(temporary)
+        raise
+    return path
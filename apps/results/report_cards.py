@@ -0,0 +1,287 @@
+"""
+Report card rendering for a (term, class).
+
+All data for a class is loaded in a fixed number of queries into plain
+dicts, each card is hashed, and only cards whose hash has no cached PDF are
+rendered. Cached files are named by the hash, so unchanged students and
+repeat downloads never re-render. A class is rendered in parallel by
+queueing a Celery group with one task per chunk of students. Downloads
+never render in the request: a card that is not cached yet is queued for
+a background render instead.
+"""
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Result, ResultTask, ResultTemplate, TermResult
+
+# Bump when the PDF layout changes so cached cards are re-rendered
+LAYOUT_VERSION = 2
+
+DISPLAY_FLAGS = [
+    'show_ca_scores', 'show_exam_scores', 'show_total_scores',
+    'show_grades', 'show_positions', 'show_gpa',
+]
+
+# Seconds a queued render of a card is reused by repeat downloads
+PENDING_RENDER_TTL = 300
+PENDING_RENDER_KEY = 'results:report-card-pending:{digest}'
+
+
+def cache_dir():
+    """Directory holding rendered report cards"""
+    return getattr(settings, 'RESULTS_REPORT_CARD_DIR', os.path.join(settings.MEDIA_ROOT, 'report_cards'))
+
+
+def render_chunk_size():
+    """Report cards rendered per Celery task"""
+    return getattr(settings, 'RESULTS_REPORT_CARD_CHUNK_SIZE', 25)
+
+
+def _score(value):
+    return str(value) if value is not None else None
+
+
+@lru_cache(maxsize=256)
+def _hash_file(path, modified, size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_digest(field_file):
+    """Content hash of an uploaded file, or None when it is missing"""
+    if not field_file:
+        return None
+    # Hashed once per process for each version of the file
+    try:
+        stat = os.stat(field_file.path)
+    except FileNotFoundError:
+        return None
+    return _hash_file(field_file.path, stat.st_mtime_ns, stat.st_size)
+
+
+def _template_settings(template):
+    """Display flags and signature for a school's ResultTemplate"""
+    flags = {flag: getattr(template, flag) if template else True for flag in DISPLAY_FLAGS}
+    signature = template.principal_signature if template else None
+    flags['principal_signature'] = signature.path if signature else None
+    flags['signature_digest'] = _file_digest(signature)
+    return flags
+
+
+def load_report_cards(term, class_id, student_ids=None):
+    """
+    Build report card payloads for a class in a term, or for some of its students.
+
+    Uses three queries however many students there are: term results with
+    student, class and school, subject results, and the result template.
+    Loading only some students adds a count of the class. Returns a list
+    of JSON-serialisable dicts ordered by position.
+    """
+    class_results = TermResult.objects.filter(term=term, class_for_term_id=class_id)
+    selected = class_results if student_ids is None else class_results.filter(student_id__in=student_ids)
+    term_results = list(
+        selected.select_related('student__user', 'class_for_term__school', 'term__academic_session')
+        .order_by('position', 'student__user__last_name')
+    )
+    if not term_results:
+        return []
+
+    subjects = {}
+    results = (
+        Result.objects.filter(term=term, student_id__in=[tr.student_id for tr in term_results])
+        .select_related('subject')
+        .order_by('subject__name')
+    )
+    for result in results:
+        subjects.setdefault(result.student_id, []).append({
+            'subject': result.subject.name,
+            'first_ca': _score(result.first_ca),
+            'second_ca': _score(result.second_ca),
+            'exam_marks': _score(result.exam_marks),
+            'total_score': _score(result.total_score),
+            'average_score': _score(result.average_score),
+            'grade': result.grade,
+            'class_average': _score(result.subject_class_average),
+            'position': result.subject_position,
+        })
+
+    school = term_results[0].class_for_term.school
+    template = ResultTemplate.objects.filter(school=school).first()
+    template_settings = _template_settings(template)
+    school_info = {
+        'name': school.name,
+        'address': school.address,
+        'color': school.dashboard_primary_color,
+    }
+
+    class_size = len(term_results) if student_ids is None else class_results.count()
+    cards = []
+    for term_result in term_results:
+        student = term_result.student
+        cards.append({
+            'term_result_id': term_result.id,
+            'school': school_info,
+            'template': template_settings,
+            'term': term_result.term.name,
+            'session': term_result.term.academic_session.name,
+            'class_name': term_result.class_for_term.name,
+            'student': {
+                'id': student.id,
+                'name': student.user.get_full_name(),
+                'student_id': student.student_id,
+            },
+            'summary': {
+                'total_subjects': term_result.total_subjects,
+                'total_score': _score(term_result.total_score),
+                'average_score': _score(term_result.average_score),
+                'gpa': _score(term_result.gpa),
+                'position': term_result.position,
+                'class_size': class_size,
+            },
+            'comments': {
+                'class_teacher_comment': term_result.class_teacher_comment,
+                'principal_comment': term_result.principal_comment,
+            },
+            'subjects': subjects.get(student.id, []),
+        })
+    return cards
+
+
+def card_digest(card):
+    """Hash of everything that affects a rendered card"""
+    payload = dict(card, layout_version=LAYOUT_VERSION)
+    # The signature is identified by its content, not where it is stored
+    payload['template'] = {
+        key: value for key, value in card['template'].items() if key != 'principal_signature'
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def card_path(digest):
+    """Cache path for a card hash, fanned out over subdirectories"""
+    return os.path.join(cache_dir(), digest[:2], f'{digest}.pdf')
+
+
+def render_report_cards(cards):
+    """
+    Render cards that are not already cached.
+
+    Returns {student_id: pdf path} and counts of rendered and cached cards.
+    """
+    from .report_card_pdf import render
+
+    started = time.perf_counter()
+    paths = {}
+    pending = []
+    for card in cards:
+        path = card_path(card_digest(card))
+        paths[card['student']['id']] = path
+        if not os.path.exists(path):
+            pending.append((card, path))
+
+    for card, path in pending:
+        render(card, path)
+
+    return {
+        'paths': paths,
+        'rendered_count': len(pending),
+        'cached_count': len(cards) - len(pending),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def render_class_report_cards(term, class_id, student_ids=None):
+    """Load and render report cards for a class in a term"""
+    return render_report_cards(load_report_cards(term, class_id, student_ids))
+
+
+def report_card_path(term, class_id, student_id):
+    """
+    Cache path of a student's current report card.
+
+    Returns None when the student has no term result in the class. The
+    file only exists once the card has been rendered.
+    """
+    cards = load_report_cards(term, class_id, student_ids=[student_id])
+    return card_path(card_digest(cards[0])) if cards else None
+
+
+def queue_report_cards(term, class_id, user=None, student_ids=None):
+    """
+    Queue rendering of a class's report cards once the current transaction commits.
+
+    The cards are split into chunks rendered by a Celery group, one task
+    per chunk, so a class renders across the worker pool. The group is
+    recorded against the term's school so only that school can follow its
+    progress. Returns the group id.
+    """
+    if student_ids is None:
+        student_ids = list(
+            TermResult.objects.filter(term=term, class_for_term_id=class_id)
+            .order_by('position', 'student_id')
+            .values_list('student_id', flat=True)
+        )
+    chunk_size = render_chunk_size()
+    chunks = [student_ids[start:start + chunk_size] for start in range(0, len(student_ids), chunk_size)]
+    task_id = str(uuid4())
+    ResultTask.objects.create(
+        school_id=term.academic_session.school_id,
+        term=term,
+        kind=ResultTask.REPORT_CARDS,
+        task_id=task_id,
+        requested_by=user
+    )
+
+    def dispatch():
+        from celery import group
+        from .tasks import render_report_cards_task
+        renders = group(render_report_cards_task.s(term.id, class_id, chunk) for chunk in chunks or [[]])
+        renders.apply_async(task_id=task_id).save()
+
+    transaction.on_commit(dispatch, robust=True)
+    return task_id
+
+
+def report_card_progress(group_id):
+    """Progress of a render group queued by queue_report_cards"""
+    from celery.result import GroupResult
+
+    group_result = GroupResult.restore(group_id)
+    if group_result is None:
+        return {'state': 'PENDING', 'chunks_total': None, 'chunks_completed': 0}
+
+    chunks_total = len(group_result.results)
+    chunks_completed = group_result.completed_count()
+    if group_result.failed():
+        state = 'FAILURE'
+    elif chunks_completed == chunks_total:
+        state = 'SUCCESS'
+    else:
+        state = 'PROGRESS'
+    progress = {'state': state, 'chunks_total': chunks_total, 'chunks_completed': chunks_completed}
+    summaries = [result.result for result in group_result.results if result.successful()]
+    progress['rendered_count'] = sum(summary['rendered_count'] for summary in summaries)
+    progress['cached_count'] = sum(summary['cached_count'] for summary in summaries)
+    return progress
+
+
+def queue_report_card(term, class_id, student_id, path, user=None):
+    """Queue rendering of one card not yet at path, reusing a render already queued for it"""
+    key = PENDING_RENDER_KEY.format(digest=os.path.splitext(os.path.basename(path))[0])
+    task_id = cache.get(key)
+    if task_id is None:
+        task_id = queue_report_cards(term, class_id, user, student_ids=[student_id])
+        cache.set(key, task_id, PENDING_RENDER_TTL)
+    return task_id
@@ -1,5 +1,46 @@
+from collections import defaultdict
 from rest_framework import serializers
-from .models import Result, TermResult, ResultTemplate
+from apps.academics.models import Class, Term
+from .models import (
+    Result, TermResult, ResultTemplate, ResultAnomaly, ResultImport, ClassTermSummary,
+    ResultGenerationJob
+)
+from .ranking import TIE_METHODS
+from .summaries import histogram_bands
+
+def prefetch_subject_results(term_results):
+    """
+    Attach subject results to each term result with a single query.
+    
+    Results are grouped by (student, term) with their student user, subject,
+    term and teacher loaded, so serializing subject_results costs no further
+    queries. Returns the term results as a list.
+    """
+    term_results = list(term_results)
+    if not term_results:
+        return term_results
+    
+    results = Result.objects.filter(
+        student_id__in={term_result.student_id for term_result in term_results},
+        term_id__in={term_result.term_id for term_result in term_results}
+    ).select_related('student__user', 'subject', 'term', 'teacher').order_by('subject__name')
+    
+    grouped = defaultdict(list)
+    for result in results:
+        grouped[(result.student_id, result.term_id)].append(result)
+    
+    for term_result in term_results:
+        term_result.prefetched_subject_results = grouped[(term_result.student_id, term_result.term_id)]
+    return term_results
+
+def get_term_subject_results(term_result):
+    """Return a term result's subject results, preferring the prefetched cache"""
+    results = getattr(term_result, 'prefetched_subject_results', None)
+    if results is None:
+        results = term_result.student.results.filter(
+            term_id=term_result.term_id
+        ).select_related('student__user', 'subject', 'term', 'teacher').order_by('subject__name')
+    return results
 
 class ResultSerializer(serializers.ModelSerializer):
     """Serializer for Result model"""
@@ -8,10 +49,6 @@ class ResultSerializer(serializers.ModelSerializer):
     subject_name = serializers.CharField(source='subject.name', read_only=True)
     term_name = serializers.CharField(source='term.name', read_only=True)
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
-    total_score = serializers.ReadOnlyField()
-    average_score = serializers.ReadOnlyField()
-    grade = serializers.ReadOnlyField()
-    grade_point = serializers.ReadOnlyField()
     
     class Meta:
         model = Result
@@ -19,10 +56,14 @@ class ResultSerializer(serializers.ModelSerializer):
             'id', 'student', 'student_name', 'student_id', 'subject',
             'subject_name', 'term', 'term_name', 'class_for_term',
             'first_ca', 'second_ca', 'exam_marks', 'total_score',
-            'average_score', 'grade', 'grade_point', 'remarks',
-            'teacher', 'teacher_name', 'created_at', 'updated_at'
+            'average_score', 'grade', 'grade_point', 'subject_position',
+            'subject_class_average', 'remarks', 'teacher', 'teacher_name',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'total_score', 'average_score', 'grade', 'grade_point',
+            'subject_position', 'subject_class_average', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
 
 class ResultInputSerializer(serializers.ModelSerializer):
     """Serializer for inputting/updating results"""
@@ -46,26 +87,54 @@ class ResultInputSerializer(serializers.ModelSerializer):
         
         return data
 
+class BulkResultRowSerializer(serializers.Serializer):
+    """Serializer for one student's scores in a bulk result input"""
+    student_id = serializers.IntegerField()
+    first_ca = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100,
+        required=False, allow_null=True
+    )
+    second_ca = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100,
+        required=False, allow_null=True
+    )
+    exam_marks = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100,
+        required=False, allow_null=True
+    )
+    remarks = serializers.CharField(required=False, allow_blank=True, default='')
+
 class BulkResultInputSerializer(serializers.Serializer):
     """Serializer for bulk result input"""
     class_id = serializers.IntegerField()
     subject_id = serializers.IntegerField()
     term_id = serializers.IntegerField()
     results = serializers.ListField(
-        child=serializers.DictField()
+        child=BulkResultRowSerializer()
+    )
+    response_mode = serializers.ChoiceField(
+        choices=['full', 'compact'],
+        default='full'
     )
     
     def validate_results(self, value):
-        """Validate results data structure"""
-        for result in value:
-            required_fields = ['student_id']
-            for field in required_fields:
-                if field not in result:
-                    raise serializers.ValidationError(
-                        f"Each result must have '{field}'"
-                    )
+        """Validate that each student appears only once"""
+        student_ids = [result['student_id'] for result in value]
+        if len(student_ids) != len(set(student_ids)):
+            raise serializers.ValidationError(
+                "Each student may only appear once per submission"
+            )
         return value
 
+class CompactResultSerializer(serializers.ModelSerializer):
+    """Minimal result representation returned after bulk input"""
+    
+    class Meta:
+        model = Result
+        fields = [
+            'id', 'student', 'total_score', 'average_score', 'grade', 'grade_point'
+        ]
+
 class TermResultSerializer(serializers.ModelSerializer):
     """Serializer for TermResult model"""
     student_name = serializers.CharField(source='student.user.get_full_name', read_only=True)
@@ -88,7 +157,7 @@ class TermResultSerializer(serializers.ModelSerializer):
     
     def get_subject_results(self, obj):
         """Get individual subject results for this term"""
-        subject_results = obj.student.results.filter(term=obj.term)
+        subject_results = get_term_subject_results(obj)
         return ResultSerializer(subject_results, many=True).data
 
 class StudentTermResultSerializer(serializers.ModelSerializer):
@@ -106,16 +175,31 @@ class StudentTermResultSerializer(serializers.ModelSerializer):
     
     def get_subject_results(self, obj):
         """Get subject results without sensitive information"""
-        subject_results = obj.student.results.filter(term=obj.term)
+        subject_results = get_term_subject_results(obj)
         return [{
             'subject_name': result.subject.name,
             'first_ca': result.first_ca,
             'second_ca': result.second_ca,
             'exam_marks': result.exam_marks,
             'total_score': result.total_score,
-            'grade': result.grade
+            'grade': result.grade,
+            'position': result.subject_position,
+            'class_average': result.subject_class_average
         } for result in subject_results]
 
+GRADE_BOUNDARY_FIELDS = ['grade_a_min', 'grade_b_min', 'grade_c_min', 'grade_d_min', 'grade_e_min']
+
+def validate_grade_boundaries(minimums):
+    """Check grade A to E minimums, skipping unknown (None) ones"""
+    known = [minimum for minimum in minimums if minimum is not None]
+    
+    if any(minimum < 0 or minimum > 100 for minimum in known):
+        raise serializers.ValidationError("Grade boundaries must be between 0 and 100.")
+    if any(higher <= lower for higher, lower in zip(known, known[1:])):
+        raise serializers.ValidationError(
+            "Grade boundaries must strictly decrease from grade A to grade E."
+        )
+
 class ResultTemplateSerializer(serializers.ModelSerializer):
     """Serializer for ResultTemplate model"""
     
@@ -129,23 +213,180 @@ class ResultTemplateSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def validate(self, data):
+        """Validate that grade boundaries descend from A to E"""
+        validate_grade_boundaries([
+            data.get(field, getattr(self.instance, field, None))
+            for field in GRADE_BOUNDARY_FIELDS
+        ])
+        return data
+
+class GradingScenarioSerializer(serializers.Serializer):
+    """A candidate set of grade boundaries for a grading simulation"""
+    name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    grade_a_min = serializers.IntegerField()
+    grade_b_min = serializers.IntegerField()
+    grade_c_min = serializers.IntegerField()
+    grade_d_min = serializers.IntegerField()
+    grade_e_min = serializers.IntegerField()
+    
+    def validate(self, data):
+        """Validate that grade boundaries descend from A to E"""
+        validate_grade_boundaries([data[field] for field in GRADE_BOUNDARY_FIELDS])
+        return data
+
+class GradingSimulationSerializer(serializers.Serializer):
+    """Input for a what-if grading simulation"""
+    term_id = serializers.IntegerField()
+    class_id = serializers.IntegerField(required=False, allow_null=True)
+    tie_method = serializers.ChoiceField(choices=list(TIE_METHODS), required=False)
+    scales = serializers.ListField(
+        child=GradingScenarioSerializer(),
+        min_length=1,
+        max_length=10
+    )
 
-class ClassResultSummarySerializer(serializers.Serializer):
+class AnomalyScanSerializer(serializers.Serializer):
+    """Input for an anomaly scan of a term's results"""
+    term_id = serializers.IntegerField()
+    class_id = serializers.IntegerField(required=False, allow_null=True)
+
+class TermClassSerializer(serializers.Serializer):
+    """A term and optional class, limited to the requesting user's schools"""
+    term_id = serializers.PrimaryKeyRelatedField(source='term', queryset=Term.objects.all())
+    class_id = serializers.PrimaryKeyRelatedField(
+        source='class_for_term',
+        queryset=Class.objects.all(),
+        required=False,
+        allow_null=True
+    )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        user = self.context['request'].user
+        terms = Term.objects.select_related('academic_session')
+        classes = Class.objects.all()
+        if user.is_school_owner:
+            terms = terms.filter(academic_session__school__owner=user)
+            classes = classes.filter(school__owner=user)
+        self.fields['term_id'].queryset = terms
+        self.fields['class_id'].queryset = classes
+    
+    def validate(self, data):
+        """Validate that the class belongs to the term's school"""
+        class_for_term = data.get('class_for_term')
+        if class_for_term and class_for_term.school_id != data['term'].academic_session.school_id:
+            raise serializers.ValidationError({'class_id': "Class does not belong to the term's school."})
+        return data
+
+class TermResultGenerationSerializer(TermClassSerializer):
+    """Input for generating term results for a term, or one of its classes"""
+    tie_method = serializers.ChoiceField(
+        choices=list(TIE_METHODS),
+        required=False,
+        allow_blank=True,
+        allow_null=True
+    )
+
+class ReportCardRequestSerializer(TermClassSerializer):
+    """Input for rendering a class's report cards"""
+    class_id = serializers.PrimaryKeyRelatedField(source='class_for_term', queryset=Class.objects.all())
+
+class ClassResultSummarySerializer(serializers.ModelSerializer):
     """Serializer for class result summary"""
-    class_name = serializers.CharField()
-    term_name = serializers.CharField()
-    total_students = serializers.IntegerField()
-    results_published = serializers.IntegerField()
-    average_class_score = serializers.DecimalField(max_digits=5, decimal_places=2)
-    highest_score = serializers.DecimalField(max_digits=5, decimal_places=2)
-    lowest_score = serializers.DecimalField(max_digits=5, decimal_places=2)
-    pass_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
+    class_id = serializers.IntegerField(source='class_for_term_id')
+    class_name = serializers.CharField(source='class_for_term.name')
+    term_name = serializers.CharField(source='term.name')
+    average_class_score = serializers.DecimalField(source='average_score', max_digits=5, decimal_places=2)
+    histogram = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ClassTermSummary
+        fields = [
+            'class_id', 'class_name', 'term_name', 'total_students', 'results_published',
+            'average_class_score', 'highest_score', 'lowest_score', 'median_score',
+            'std_dev', 'pass_count', 'pass_rate', 'histogram', 'updated_at'
+        ]
     
+    def get_histogram(self, obj):
+        return histogram_bands(obj.histogram)
+
 class SubjectPerformanceSerializer(serializers.Serializer):
     """Serializer for subject performance analysis"""
+    subject_id = serializers.IntegerField()
     subject_name = serializers.CharField()
     total_students = serializers.IntegerField()
-    average_score = serializers.DecimalField(max_digits=5, decimal_places=2)
-    highest_score = serializers.DecimalField(max_digits=5, decimal_places=2)
-    lowest_score = serializers.DecimalField(max_digits=5, decimal_places=2)
-    grade_distribution = serializers.DictField()
\ No newline at end of file
+    average_score = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    highest_score = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    lowest_score = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    median = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    p25 = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    p75 = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    p90 = serializers.DecimalField(max_digits=5, decimal_places=2, allow_null=True)
+    grade_distribution = serializers.DictField()
+
+class ResultAnomalySerializer(serializers.ModelSerializer):
+    """Serializer for flagged scores awaiting review"""
+    class_name = serializers.CharField(source='class_for_term.name', read_only=True)
+    subject_name = serializers.CharField(source='subject.name', read_only=True)
+    student_name = serializers.SerializerMethodField()
+    teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True, default=None)
+    
+    class Meta:
+        model = ResultAnomaly
+        fields = [
+            'id', 'term', 'class_for_term', 'class_name', 'subject', 'subject_name',
+            'result', 'student_name', 'teacher', 'teacher_name', 'kind', 'score',
+            'detail', 'is_reviewed', 'review_note', 'reviewed_by', 'reviewed_at',
+            'created_at'
+        ]
+        read_only_fields = [
+            'id', 'term', 'class_for_term', 'subject', 'result', 'teacher', 'kind',
+            'score', 'detail', 'reviewed_by', 'reviewed_at', 'created_at'
+        ]
+    
+    def get_student_name(self, obj):
+        if obj.result is None:
+            return None
+        return obj.result.student.user.get_full_name()
+
+class ResultImportSerializer(serializers.ModelSerializer):
+    """Serializer for the progress of a results sheet import"""
+    term_name = serializers.CharField(source='term.name', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    errors = serializers.SerializerMethodField()
+    
+    # Rejected rows listed in the response
+    ERROR_LIMIT = 100
+    
+    class Meta:
+        model = ResultImport
+        fields = [
+            'id', 'term', 'term_name', 'status', 'progress', 'total_rows',
+            'processed_rows', 'imported_count', 'error_count', 'error_message',
+            'errors', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_errors(self, obj):
+        rows = obj.rows.exclude(error='').order_by('row_number')[:self.ERROR_LIMIT]
+        return [
+            {'row': row.row_number, 'student_id': row.student_ref, 'subject': row.subject_name, 'error': row.error}
+            for row in rows
+        ]
+
+class ResultGenerationJobSerializer(serializers.ModelSerializer):
+    """Serializer for the progress of a term result generation job"""
+    term_name = serializers.CharField(source='term.name', read_only=True)
+    class_name = serializers.CharField(source='class_for_term.name', read_only=True, default=None)
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = ResultGenerationJob
+        fields = [
+            'id', 'task_id', 'term', 'term_name', 'class_for_term', 'class_name',
+            'tie_method', 'status', 'progress', 'classes_total', 'classes_done',
+            'summary', 'error_message', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
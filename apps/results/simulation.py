@@ -0,0 +1,245 @@
+"""
+What-if grading: how candidate grade boundaries would change a term.
+
+A term's subject averages are read once with one query into compact
+arrays. Every candidate scale is then applied to the whole term at once,
+with NumPy when it is installed and in pure Python otherwise, and
+compared with the school's current scale: grade distributions, pass
+rates, GPAs and class positions by GPA. Nothing is written.
+"""
+import time
+from bisect import bisect_right
+
+from .grading import FAIL_GRADE, GradingScale
+from .models import Result
+from .ranking import COMPETITION, rank_values
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+
+def load_term_scores(term, school_id, class_id=None):
+    """
+    Read a term's subject averages with one query.
+
+    students, subjects and scores have one entry per result: dense student
+    and subject codes and the average as a float. student_classes gives
+    the class of each student code and subject_names the (id, name) of
+    each subject code.
+    """
+    results = Result.objects.filter(term=term, class_for_term__school_id=school_id)
+    if class_id:
+        results = results.filter(class_for_term_id=class_id)
+    rows = results.order_by().values_list(
+        'student_id', 'class_for_term_id', 'subject_id', 'subject__name', 'average_score'
+    )
+
+    student_codes = {}
+    subject_codes = {}
+    data = {
+        'students': [], 'subjects': [], 'scores': [],
+        'student_classes': [], 'subject_names': [],
+    }
+    for student_id, student_class_id, subject_id, subject_name, score in rows:
+        if student_id not in student_codes:
+            student_codes[student_id] = len(student_codes)
+            data['student_classes'].append(student_class_id)
+        if subject_id not in subject_codes:
+            subject_codes[subject_id] = len(subject_codes)
+            data['subject_names'].append((subject_id, subject_name))
+        data['students'].append(student_codes[student_id])
+        data['subjects'].append(subject_codes[subject_id])
+        data['scores'].append(float(score))
+    return data
+
+
+def _scale_tables(scale):
+    """Ascending minimums with the grade and point of each band, fail band first"""
+    boundaries = list(reversed(scale.boundaries))
+    minimums = [float(minimum) for minimum, _, _ in boundaries]
+    grades = [FAIL_GRADE] + [grade for _, grade, _ in boundaries]
+    points = [0.0] + [float(point) for _, _, point in boundaries]
+    return minimums, grades, points
+
+
+def _numpy_scenarios(data, scales, method):
+    """Band, GPA and position arrays for every scale"""
+    students = np.asarray(data['students'], dtype=np.int64)
+    subjects = np.asarray(data['subjects'], dtype=np.int64)
+    scores = np.asarray(data['scores'], dtype=float)
+    student_count = len(data['student_classes'])
+    subject_count = len(data['subject_names'])
+    results_per_student = np.bincount(students, minlength=student_count)
+
+    _, class_codes = np.unique(np.asarray(data['student_classes'], dtype=np.int64), return_inverse=True)
+
+    scenarios = []
+    for scale in scales:
+        minimums, grades, points = _scale_tables(scale)
+        bands = np.searchsorted(np.asarray(minimums), scores, side='right')
+        grade_points = np.asarray(points)[bands]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gpa = np.bincount(students, weights=grade_points, minlength=student_count) / results_per_student
+
+        # Positions by GPA within each class: sort by (class, GPA desc), then
+        # mark where each class and each distinct GPA starts
+        order = np.lexsort((-gpa, class_codes))
+        index = np.arange(student_count)
+        sorted_gpa = gpa[order]
+        group_start = np.ones(student_count, dtype=bool)
+        group_start[1:] = class_codes[order][1:] != class_codes[order][:-1]
+        value_start = group_start.copy()
+        value_start[1:] |= sorted_gpa[1:] != sorted_gpa[:-1]
+        first_in_group = np.maximum.accumulate(np.where(group_start, index, 0))
+        if method == COMPETITION:
+            sorted_positions = np.maximum.accumulate(np.where(value_start, index, 0)) - first_in_group + 1
+        else:
+            distinct = np.cumsum(value_start)
+            sorted_positions = distinct - distinct[first_in_group] + 1
+        positions = np.empty(student_count, dtype=np.int64)
+        positions[order] = sorted_positions
+
+        band_count = len(grades)
+        scenarios.append({
+            'grades': grades,
+            'bands': bands,
+            'gpa': gpa,
+            'positions': positions,
+            'grade_counts': np.bincount(bands, minlength=band_count).tolist(),
+            'subject_counts': np.bincount(
+                subjects * band_count + bands, minlength=subject_count * band_count
+            ).reshape(subject_count, band_count).tolist(),
+        })
+
+    baseline = scenarios[0]
+    for scenario in scenarios:
+        moves = np.abs(scenario['positions'] - baseline['positions'])
+        scenario['changes'] = {
+            'results_regraded': int((scenario['bands'] != baseline['bands']).sum()),
+            'students_gpa_changed': int((scenario['gpa'] != baseline['gpa']).sum()),
+            'students_moved': int((moves > 0).sum()),
+            'largest_move': int(moves.max()) if student_count else 0,
+        }
+        scenario['mean_gpa'] = float(scenario['gpa'].mean()) if student_count else None
+    return scenarios
+
+
+def _python_scenarios(data, scales, method):
+    """Pure Python version of _numpy_scenarios"""
+    student_count = len(data['student_classes'])
+    subject_count = len(data['subject_names'])
+    results_per_student = [0] * student_count
+    for student in data['students']:
+        results_per_student[student] += 1
+
+    scenarios = []
+    for scale in scales:
+        minimums, grades, points = _scale_tables(scale)
+        bands = [bisect_right(minimums, score) for score in data['scores']]
+
+        point_sums = [0.0] * student_count
+        for student, band in zip(data['students'], bands):
+            point_sums[student] += points[band]
+        gpa = [total / count for total, count in zip(point_sums, results_per_student)]
+
+        positions = [0] * student_count
+        by_class = {}
+        for student, class_id in enumerate(data['student_classes']):
+            by_class.setdefault(class_id, []).append(student)
+        for members in by_class.values():
+            members.sort(key=lambda student: -gpa[student])
+            for student, position in zip(members, rank_values([gpa[student] for student in members], method)):
+                positions[student] = position
+
+        grade_counts = [0] * len(grades)
+        subject_counts = [[0] * len(grades) for _ in range(subject_count)]
+        for subject, band in zip(data['subjects'], bands):
+            grade_counts[band] += 1
+            subject_counts[subject][band] += 1
+
+        scenarios.append({
+            'grades': grades,
+            'bands': bands,
+            'gpa': gpa,
+            'positions': positions,
+            'grade_counts': grade_counts,
+            'subject_counts': subject_counts,
+        })
+
+    baseline = scenarios[0]
+    for scenario in scenarios:
+        moves = [abs(new - old) for new, old in zip(scenario['positions'], baseline['positions'])]
+        scenario['changes'] = {
+            'results_regraded': sum(new != old for new, old in zip(scenario['bands'], baseline['bands'])),
+            'students_gpa_changed': sum(new != old for new, old in zip(scenario['gpa'], baseline['gpa'])),
+            'students_moved': sum(move > 0 for move in moves),
+            'largest_move': max(moves, default=0),
+        }
+        scenario['mean_gpa'] = sum(scenario['gpa']) / student_count if student_count else None
+    return scenarios
+
+
+def _percent(part, whole):
+    return round(part / whole * 100, 2) if whole else None
+
+
+def _describe(name, scale, scenario, data):
+    """Shape one scenario for the response"""
+    grades = scenario['grades']
+    results_count = len(data['scores'])
+    distribution = dict(zip(grades, scenario['grade_counts']))
+    subjects = []
+    for (subject_id, subject_name), counts in zip(data['subject_names'], scenario['subject_counts']):
+        taken = sum(counts)
+        subjects.append({
+            'subject_id': subject_id,
+            'subject_name': subject_name,
+            'pass_rate': _percent(taken - counts[0], taken),
+            'grade_distribution': dict(zip(grades, counts)),
+        })
+    subjects.sort(key=lambda subject: subject['subject_name'])
+
+    return {
+        'name': name,
+        'boundaries': {grade: int(minimum) for minimum, grade, _ in scale.boundaries},
+        'grade_distribution': {grade: distribution[grade] for grade in scale.grades},
+        'pass_rate': _percent(results_count - distribution[FAIL_GRADE], results_count),
+        'mean_gpa': round(scenario['mean_gpa'], 2) if scenario['mean_gpa'] is not None else None,
+        **scenario['changes'],
+        'subjects': subjects,
+    }
+
+
+def simulate_grading(term, school_id, current_scale, candidates, class_id=None, method=COMPETITION, use_numpy=None):
+    """
+    Compare candidate grading scales with the current one over a term.
+
+    candidates is a list of (name, {grade: minimum}) pairs. Class positions
+    are by GPA, the only ranking a grading scale can change. Returns the
+    current scale's figures, one entry per candidate with its differences
+    from the current scale, and the elapsed time.
+    """
+    started = time.perf_counter()
+    if use_numpy is None:
+        use_numpy = np is not None
+
+    data = load_term_scores(term, school_id, class_id)
+    scales = [current_scale] + [GradingScale(minimums) for _, minimums in candidates]
+    simulate = _numpy_scenarios if use_numpy else _python_scenarios
+    scenarios = simulate(data, scales, method)
+
+    names = ['current'] + [name for name, _ in candidates]
+    described = [
+        _describe(name, scale, scenario, data)
+        for name, scale, scenario in zip(names, scales, scenarios)
+    ]
+    return {
+        'results_count': len(data['scores']),
+        'students_count': len(data['student_classes']),
+        'tie_method': method,
+        'current': described[0],
+        'candidates': described[1:],
+        'elapsed': round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,126 @@
+"""
+Frozen JSON snapshots of published term results.
+
+Publishing renders each TermResult through StudentTermResultSerializer
+once and stores the bytes with a content hash. Student endpoints serve the
+stored JSON with the hash as a strong ETag, so peak-time reads neither
+serialize nor query subject results.
+"""
+import hashlib
+
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .models import TermResult, TermResultSnapshot
+
+BATCH_SIZE = 500
+
+
+def payload_etag(payload):
+    """Content hash used as a snapshot's ETag"""
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def freeze_term_results(term_results):
+    """
+    Store snapshots for the published rows of a TermResult queryset.
+
+    Only snapshots whose content changed are written. Returns counts of
+    snapshots created, updated and unchanged.
+    """
+    from .serializers import StudentTermResultSerializer, prefetch_subject_results
+
+    term_results = list(
+        term_results.filter(is_published=True)
+        .select_related('term', 'class_for_term')
+    )
+    existing = {
+        snapshot.term_result_id: snapshot
+        for snapshot in TermResultSnapshot.objects.filter(
+            term_result_id__in=[term_result.id for term_result in term_results]
+        ).only('id', 'term_result_id', 'etag')
+    }
+
+    renderer = JSONRenderer()
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for term_result in prefetch_subject_results(term_results):
+        payload = renderer.render(StudentTermResultSerializer(term_result).data).decode()
+        etag = payload_etag(payload)
+        snapshot = existing.get(term_result.id)
+        if snapshot is None:
+            to_create.append(TermResultSnapshot(
+                term_result_id=term_result.id,
+                student_id=term_result.student_id,
+                term_id=term_result.term_id,
+                payload=payload,
+                etag=etag
+            ))
+        elif snapshot.etag != etag:
+            snapshot.payload = payload
+            snapshot.etag = etag
+            snapshot.updated_at = now
+            to_update.append(snapshot)
+
+    with transaction.atomic():
+        TermResultSnapshot.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            TermResultSnapshot.objects.bulk_update(
+                to_update, ['payload', 'etag', 'updated_at'], batch_size=BATCH_SIZE
+            )
+
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': len(term_results) - len(to_create) - len(to_update),
+    }
+
+
+def student_snapshots(student, term_id=None):
+    """
+    Return (payload, etag) for a student's published results.
+
+    With term_id this is that term's snapshot, otherwise a JSON list of all
+    of them. Published results frozen before snapshots existed are frozen
+    on first read. Returns None when the requested term is not published.
+    """
+    published = TermResult.objects.filter(student=student, is_published=True)
+    if term_id is not None:
+        published = published.filter(term_id=term_id)
+
+    snapshots = TermResultSnapshot.objects.filter(
+        term_result__in=published
+    ).order_by('term_result_id').values_list('term_result_id', 'payload', 'etag')
+    rows = list(snapshots)
+    if published.exclude(id__in=[row[0] for row in rows]).exists():
+        freeze_term_results(published)
+        rows = list(snapshots.all())
+
+    if term_id is not None:
+        return rows[0][1:] if rows else None
+    payload = '[' + ','.join(row[1] for row in rows) + ']'
+    return payload, payload_etag(''.join(row[2] for row in rows))
+
+
+def snapshot_response(request, payload, etag):
+    """Serve a stored payload, answering If-None-Match with 304"""
+    quoted = quote_etag(etag)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # If-None-Match uses the weak comparison function
+        candidates = [candidate.removeprefix('W/') for candidate in parse_etags(if_none_match)]
+        if '*' in candidates or quoted in candidates:
+            response = HttpResponseNotModified()
+            response['ETag'] = quoted
+            return response
+
+    response = HttpResponse(payload, content_type='application/json')
+    response['ETag'] = quoted
+    # Results are per student, so shared caches must revalidate with us
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,77 @@
+"""
+Helpers for streaming CSV, NDJSON and JSON responses row by row
+"""
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+GZIP_CONTENT_TYPE = 'application/gzip'
+
+
+class Echo:
+    """File-like object that hands each written line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """Yield CSV encoded lines for a header and an iterable of row sequences"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    """Yield one JSON document per line for an iterable of dicts"""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def json_lines(document, streamed):
+    """Yield a JSON object whose streamed member, an iterable, is written one element per line"""
+    def encode(value):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+
+    members = [f'{encode(key)}: {encode(value)}' for key, value in document.items() if key != streamed]
+    yield '{' + ''.join(f'{member}, ' for member in members) + f'{encode(streamed)}: ['
+    for index, item in enumerate(document[streamed]):
+        yield (',\n' if index else '\n') + encode(item)
+    yield '\n]}\n'
+
+
+def gzip_lines(lines):
+    """Yield a gzip stream of lines, flushing only whole compressed blocks"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for line in lines:
+        block = compressor.compress(line.encode('utf-8'))
+        if block:
+            yield block
+    yield compressor.flush()
+
+
+def streaming_response(lines, output, filename=None, compress=False):
+    """
+    StreamingHttpResponse sending lines as a CSV, NDJSON or JSON body, optionally gzipped.
+
+    The body is sent as an attachment when a filename is given.
+    """
+    if compress:
+        response = StreamingHttpResponse(gzip_lines(lines), content_type=GZIP_CONTENT_TYPE)
+        extension = f'{output}.gz'
+    else:
+        response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[output])
+        extension = output
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
@@ -0,0 +1,131 @@
+"""
+Class result summaries kept in ClassTermSummary.
+
+Counts, mean, extremes, spread, pass count and histogram bands for every
+class in a term come from one grouped aggregate over TermResult; medians
+use PERCENTILE_CONT on PostgreSQL and Python interpolation elsewhere. The
+rows are refreshed whenever term results are generated, recomputed,
+published or edited, so dashboards read one stored row per class.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, StdDev
+
+from .analytics import PercentileCont, _database_percentiles, _python_percentiles
+from .models import ClassTermSummary, TermResult
+
+# Lower edges of the histogram bands; the last band includes 100
+HISTOGRAM_EDGES = list(range(0, 100, 10))
+
+SUMMARY_FIELDS = [
+    'total_students', 'results_published', 'average_score', 'highest_score',
+    'lowest_score', 'median_score', 'std_dev', 'pass_count', 'pass_rate',
+    'histogram', 'updated_at',
+]
+
+TWO_PLACES = Decimal('0.01')
+
+
+def pass_mark():
+    """Term average at or above which a student has passed"""
+    return getattr(settings, 'RESULTS_PASS_MARK', 50)
+
+
+def histogram_bands(counts):
+    """Label a stored histogram with the range of each band"""
+    return [
+        {'from': edge, 'to': edge + 10, 'count': count}
+        for edge, count in zip(HISTOGRAM_EDGES, counts)
+    ]
+
+
+def _two_places(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def _summary_aggregates():
+    aggregates = {
+        'students': Count('id'),
+        'published': Count('id', filter=Q(is_published=True)),
+        'mean_score': Avg('average_score'),
+        'max_score': Max('average_score'),
+        'min_score': Min('average_score'),
+        'spread': StdDev('average_score'),
+        'passed': Count('id', filter=Q(average_score__gte=pass_mark())),
+    }
+    for edge in HISTOGRAM_EDGES:
+        band = Q(average_score__gte=edge)
+        if edge != HISTOGRAM_EDGES[-1]:
+            band &= Q(average_score__lt=edge + 10)
+        aggregates[f'band_{edge}'] = Count('id', filter=band)
+    if _database_percentiles():
+        aggregates['median'] = PercentileCont('average_score', 0.5)
+    return aggregates
+
+
+def refresh_class_summaries(term, class_ids=None):
+    """
+    Recompute ClassTermSummary rows for a term, limited to the given classes.
+
+    One grouped aggregate query covers every class; rows are upserted and
+    summaries of classes left without term results are removed. Returns the
+    number of summaries written.
+    """
+    term_results = TermResult.objects.filter(term=term)
+    if class_ids is not None:
+        class_ids = list(class_ids)
+        term_results = term_results.filter(class_for_term_id__in=class_ids)
+
+    rows = list(
+        term_results.order_by()
+        .values('class_for_term_id')
+        .annotate(**_summary_aggregates())
+    )
+    medians = {}
+    if not _database_percentiles():
+        medians = {
+            class_id: percentiles['median']
+            for class_id, percentiles in _python_percentiles(
+                term_results, 'average_score', 'class_for_term_id'
+            ).items()
+        }
+
+    summaries = []
+    for row in rows:
+        class_id = row['class_for_term_id']
+        students = row['students']
+        summaries.append(ClassTermSummary(
+            term=term,
+            class_for_term_id=class_id,
+            total_students=students,
+            results_published=row['published'],
+            average_score=_two_places(row['mean_score']),
+            highest_score=row['max_score'],
+            lowest_score=row['min_score'],
+            median_score=_two_places(row['median'] if 'median' in row else medians.get(class_id)),
+            std_dev=_two_places(row['spread']),
+            pass_count=row['passed'],
+            pass_rate=_two_places(row['passed'] / students * 100),
+            histogram=[row[f'band_{edge}'] for edge in HISTOGRAM_EDGES],
+        ))
+
+    removed = ClassTermSummary.objects.filter(term=term).exclude(
+        class_for_term_id__in=[summary.class_for_term_id for summary in summaries]
+    )
+    if class_ids is not None:
+        removed = removed.filter(class_for_term_id__in=class_ids)
+
+    with transaction.atomic():
+        ClassTermSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['term', 'class_for_term'],
+            update_fields=SUMMARY_FIELDS
+        )
+        removed.delete()
+
+    return len(summaries)
@@ -0,0 +1,176 @@
+from celery import shared_task
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from apps.results.models import Result, ResultGenerationJob, ResultImport, TermResult
+from apps.schools.models import SMTPSettings
+from .recompute import recompute_stale, recompute_delay, StaleTermResult
+from .report_cards import render_class_report_cards
+from .anomalies import detect_anomalies
+from .importing import run_import
+from .jobs import run_generation_job
+from .ranking import rank_subject_results
+
+
+@shared_task
+def recompute_stale_term_results():
+    """Recompute term results and class positions left stale by score edits"""
+    summary = recompute_stale()
+    
+    # Rows marked while the debounce key was still held need another pass
+    if StaleTermResult.objects.exists():
+        recompute_stale_term_results.apply_async(countdown=recompute_delay())
+    
+    return summary
+
+@shared_task
+def render_report_cards_task(term_id, class_id, student_ids=None):
+    """Render and cache one chunk of a class's report cards"""
+    from apps.academics.models import Term
+    
+    term = Term.objects.get(id=term_id)
+    summary = render_class_report_cards(term, class_id, student_ids=student_ids)
+    
+    return {
+        'term_id': term_id,
+        'class_id': class_id,
+        'rendered_count': summary['rendered_count'],
+        'cached_count': summary['cached_count'],
+        'elapsed': round(summary['elapsed'], 2),
+    }
+
+@shared_task
+def detect_result_anomalies_task(term_id, class_id=None, school_ids=None):
+    """Flag suspicious scores in a term for review"""
+    from apps.academics.models import Term
+    
+    term = Term.objects.get(id=term_id)
+    results = Result.objects.all()
+    if class_id:
+        results = results.filter(class_for_term_id=class_id)
+    if school_ids is not None:
+        results = results.filter(class_for_term__school_id__in=school_ids)
+    
+    summary = detect_anomalies(term, results)
+    summary['elapsed'] = round(summary['elapsed'], 2)
+    return summary
+
+@shared_task
+def generate_term_results_task(job_id):
+    """Generate term results for the classes covered by a generation job"""
+    job = run_generation_job(ResultGenerationJob.objects.select_related('term').get(id=job_id))
+    return dict(job.summary, job_id=job_id, status=job.status)
+
+@shared_task
+def rank_subject_results_task(term_id, class_ids=None, method=None):
+    """Assign subject positions and class averages for a term"""
+    from apps.academics.models import Term
+    
+    term = Term.objects.get(id=term_id)
+    return dict(rank_subject_results(term, class_ids, method=method), term_id=term_id)
+
+@shared_task
+def import_results_task(import_id):
+    """Stage and apply an uploaded results sheet"""
+    result_import = run_import(
+        ResultImport.objects.select_related('uploaded_by').get(id=import_id)
+    )
+    
+    summary = {
+        'import_id': import_id,
+        'status': result_import.status,
+        'total_rows': result_import.total_rows,
+        'imported_count': result_import.imported_count,
+        'error_count': result_import.error_count,
+    }
+    
+    if result_import.uploaded_by and result_import.uploaded_by.email:
+        send_mail(
+            f"Results Import Complete - {result_import.imported_count} scores imported",
+            f"""
+        Your results CSV import has finished with status: {result_import.get_status_display()}.
+        
+        Summary:
+        - Rows in sheet: {result_import.total_rows}
+        - Scores imported: {result_import.imported_count}
+        - Rows rejected: {result_import.error_count}
+        {result_import.error_message}
+        """,
+            'noreply@school.com',
+            [result_import.uploaded_by.email],
+            fail_silently=True
+        )
+    
+    return summary
+
+@shared_task
+def send_result_notification(term_result_id):
+    """
+    Send email notification to parent when student's result is published
+    """
+    try:
+        term_result = TermResult.objects.select_related(
+            'term', 'student__user__school', 'student__parent'
+        ).get(id=term_result_id)
+        student = term_result.student
+        school = student.user.school
+        
+        # Get parent email
+        parent_email = None
+        if student.parent:
+            parent_email = student.parent.email
+        elif student.guardian_email:
+            parent_email = student.guardian_email
+        
+        if not parent_email:
+            return f"No parent email found for student {student.student_id}"
+        
+        # Get school SMTP settings
+        smtp_settings = SMTPSettings.objects.filter(school=school, is_active=True).first()
+        
+        if not smtp_settings:
+            return f"No SMTP settings configured for school {school.name}"
+        
+        # Prepare email content
+        subject = f"Result Notification - {student.user.get_full_name()} - {term_result.term.name}"
+        
+        # Email context
+        context = {
+            'student': student,
+            'term_result': term_result,
+            'school': school,
+            'results': student.results.filter(term=term_result.term)
+        }
+        
+        # Render email templates
+        html_message = render_to_string('emails/result_notification.html', context)
+        plain_message = render_to_string('emails/result_notification.txt', context)
+        
+        # Configure email backend with school's SMTP settings
+        from django.core.mail import get_connection
+        
+        connection = get_connection(
+            host=smtp_settings.host,
+            port=smtp_settings.port,
+            username=smtp_settings.username,
+            password=smtp_settings.password,
+            use_tls=smtp_settings.use_tls,
+            use_ssl=smtp_settings.use_ssl,
+        )
+        
+        # Send email
+        send_mail(
+            subject=subject,
+            message=plain_message,
+            from_email=smtp_settings.from_email,
+            recipient_list=[parent_email],
+            html_message=html_message,
+            connection=connection,
+            fail_silently=False
+        )
+        
+        return f"Result notification sent to {parent_email} for student {student.student_id}"
+        
+    except TermResult.DoesNotExist:
+        return f"TermResult with id {term_result_id} not found"
+    except Exception as e:
+        return f"Error sending email: {str(e)}"
@@ -1,3 +1,386 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from apps.schools.models import School
+from apps.academics.models import AcademicSession, Term, Subject, Class, TeacherAssignment
+from apps.students.models import Student
+from .generation import sync_term_results
+from .models import Result, TermResult
+from .ranking import (
+    COMPETITION, DENSE, rank_subject_results, rank_term_results, rank_values, window_ranking_supported
+)
 
-# Create your tests here.
+
+class ResultTestMixin:
+    """Builds a school with one class, term and set of subjects"""
+    
+    def create_school(self, subject_count=3):
+        self.owner = User.objects.create_user(
+            username='owner', password='owner123', role='school_owner'
+        )
+        self.school = School.objects.create(
+            name='Test Academy', address='1 School Road',
+            contact_email='info@test.com', contact_number='0800',
+            owner=self.owner
+        )
+        self.teacher = User.objects.create_user(
+            username='teacher', password='teacher123', role='teacher', school=self.school
+        )
+        session = AcademicSession.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31),
+            school=self.school
+        )
+        self.term = Term.objects.create(
+            name='First Term', academic_session=session,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20)
+        )
+        self.class_obj = Class.objects.create(
+            name='JSS 1A', level='JSS 1', school=self.school, academic_session=session
+        )
+        self.subjects = [
+            Subject.objects.create(name=f'Subject {index}', school=self.school)
+            for index in range(subject_count)
+        ]
+        self.student_count = 0
+    
+    def create_students(self, count, scores=(40, 60, 80), term_results=True):
+        students = []
+        for _ in range(count):
+            self.student_count += 1
+            user = User.objects.create_user(
+                username=f'student{self.student_count}', password='student123',
+                role='student', school=self.school,
+                first_name='Student', last_name=str(self.student_count)
+            )
+            student = Student.objects.create(
+                user=user, date_of_birth=date(2012, 1, 1), gender='female',
+                address='1 Home Road', emergency_contact='0800',
+                admission_date=date(2024, 9, 1), current_class=self.class_obj,
+                student_id=f'TES2024{self.student_count:04d}'
+            )
+            for subject in self.subjects:
+                Result.objects.create(
+                    student=student, subject=subject, term=self.term,
+                    class_for_term=self.class_obj, teacher=self.teacher,
+                    first_ca=scores[0], second_ca=scores[1], exam_marks=scores[2]
+                )
+            if term_results:
+                TermResult.objects.create(
+                    student=student, term=self.term, class_for_term=self.class_obj
+                )
+            students.append(student)
+        return students
+
+
+class TermResultListQueryTests(ResultTestMixin, TestCase):
+    """Listing term results should not issue queries per row"""
+    
+    def setUp(self):
+        self.create_school()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+    
+    def test_query_count_does_not_grow_with_rows(self):
+        url = reverse('term_result_list')
+        
+        self.create_students(2)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'term': self.term.id})
+        self.assertEqual(len(response.data), 2)
+        
+        self.create_students(8)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'term': self.term.id})
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(len(response.data[0]['subject_results']), len(self.subjects))
+        self.assertEqual(response.data[0]['subject_results'][0]['grade'], 'C')
+
+
+class SyncTermResultsTests(ResultTestMixin, TestCase):
+    """Term result generation creates, refreshes and skips rows in bulk"""
+    
+    def setUp(self):
+        self.create_school()
+    
+    def sync(self):
+        return sync_term_results(self.term, Student.objects.all())
+    
+    def test_creates_missing_term_results_from_subject_averages(self):
+        self.create_students(3, term_results=False)
+        
+        summary = self.sync()
+        
+        self.assertEqual(summary['created_count'], 3)
+        self.assertEqual(summary['updated_count'], 0)
+        term_result = TermResult.objects.first()
+        self.assertEqual(term_result.total_subjects, 3)
+        self.assertEqual(term_result.total_score, Decimal('180.00'))
+        self.assertEqual(term_result.average_score, Decimal('60.00'))
+        self.assertEqual(term_result.gpa, Decimal('3.00'))
+    
+    def test_second_run_only_updates_changed_students(self):
+        students = self.create_students(3, term_results=False)
+        self.sync()
+        
+        result = Result.objects.filter(student=students[0]).first()
+        result.exam_marks = 20
+        result.save()
+        summary = self.sync()
+        
+        self.assertEqual(
+            (summary['created_count'], summary['updated_count'], summary['unchanged_count']),
+            (0, 1, 2)
+        )
+        self.assertEqual(
+            TermResult.objects.get(student=students[0]).total_score, Decimal('160.00')
+        )
+    
+    def test_published_and_unassigned_students_are_skipped(self):
+        students = self.create_students(3, term_results=False)
+        self.sync()
+        TermResult.objects.filter(student=students[0]).update(is_published=True, total_score=0)
+        Result.objects.filter(student=students[0]).update(exam_marks=20)
+        Student.objects.filter(pk=students[1].pk).update(current_class=None)
+        
+        summary = self.sync()
+        
+        self.assertEqual(summary['skipped_published'], 1)
+        self.assertEqual(summary['skipped_unassigned'], 1)
+        self.assertEqual(summary['unchanged_count'], 1)
+        self.assertEqual(TermResult.objects.get(student=students[0]).total_score, 0)
+
+
+class RankTermResultsTests(ResultTestMixin, TestCase):
+    """The Python ranking fallback matches the RANK/DENSE_RANK window path"""
+    
+    AVERAGES = [Decimal('90'), Decimal('90'), Decimal('80'), Decimal('0'), Decimal('0')]
+    
+    def setUp(self):
+        self.create_school()
+        self.students = self.create_students(len(self.AVERAGES))
+        for student, average in zip(self.students, self.AVERAGES):
+            TermResult.objects.filter(student=student).update(average_score=average)
+    
+    def positions(self):
+        return [
+            TermResult.objects.get(student=student).position
+            for student in self.students
+        ]
+    
+    def test_rank_values_ties(self):
+        self.assertEqual(rank_values(self.AVERAGES, COMPETITION), [1, 1, 3, 4, 4])
+        self.assertEqual(rank_values(self.AVERAGES, DENSE), [1, 1, 2, 3, 3])
+        self.assertEqual(rank_values([Decimal('50'), None, None], COMPETITION), [1, 2, 2])
+        self.assertEqual(rank_values([], DENSE), [])
+    
+    def test_competition_ties_share_a_position_and_skip_the_next(self):
+        rank_term_results(self.term, method=COMPETITION, use_window=False)
+        self.assertEqual(self.positions(), [1, 1, 3, 4, 4])
+    
+    def test_dense_ties_share_a_position_without_skipping(self):
+        rank_term_results(self.term, method=DENSE, use_window=False)
+        self.assertEqual(self.positions(), [1, 1, 2, 3, 3])
+    
+    @skipUnless(window_ranking_supported(), 'window ranking runs on PostgreSQL only')
+    def test_python_fallback_matches_window_functions(self):
+        for method in (COMPETITION, DENSE):
+            rank_term_results(self.term, method=method, use_window=True)
+            window_positions = self.positions()
+            TermResult.objects.update(position=None)
+            rank_term_results(self.term, method=method, use_window=False)
+            self.assertEqual(self.positions(), window_positions)
+    
+    def test_one_bulk_update_per_class(self):
+        second_class = Class.objects.create(
+            name='JSS 1B', level='JSS 1', school=self.school,
+            academic_session=self.term.academic_session
+        )
+        self.class_obj = second_class
+        self.create_students(3)
+        
+        with CaptureQueriesContext(connection) as queries:
+            summary = rank_term_results(self.term, use_window=False)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(summary['classes_ranked'], 2)
+        self.assertEqual(summary['positions_updated'], 8)
+        self.assertEqual(len(updates), 2)
+        
+        with CaptureQueriesContext(connection) as queries:
+            summary = rank_term_results(self.term, use_window=False)
+        self.assertEqual(summary['positions_updated'], 0)
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+
+class BulkResultInputTests(ResultTestMixin, TestCase):
+    """Bulk input upserts a class's scores and recomputes the stored score columns"""
+    
+    def setUp(self):
+        self.create_school(subject_count=2)
+        self.subject = self.subjects[0]
+        TeacherAssignment.objects.create(
+            teacher=self.teacher, class_assigned=self.class_obj, subject=self.subject,
+            academic_session=self.term.academic_session
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.url = reverse('bulk_result_input')
+    
+    def submit(self, rows, response_mode='compact'):
+        return self.client.post(self.url, {
+            'class_id': self.class_obj.id,
+            'subject_id': self.subject.id,
+            'term_id': self.term.id,
+            'response_mode': response_mode,
+            'results': rows
+        }, format='json')
+    
+    def test_existing_rows_are_updated_in_place(self):
+        existing, untouched = self.create_students(2)
+        result = Result.objects.get(student=existing, subject=self.subject)
+        self.assertEqual((result.average_score, result.grade), (Decimal('60.00'), 'C'))
+        new_student = self.create_students(1, term_results=False)[0]
+        Result.objects.filter(student=new_student).delete()
+        
+        response = self.submit([
+            {'student_id': existing.id, 'first_ca': 10, 'second_ca': 20, 'exam_marks': 30},
+            {'student_id': new_student.id, 'first_ca': 90, 'second_ca': 90, 'exam_marks': 90},
+        ])
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['results_count'], 2)
+        self.assertEqual(Result.objects.filter(subject=self.subject).count(), 3)
+        updated = Result.objects.get(student=existing, subject=self.subject)
+        self.assertEqual(updated.pk, result.pk)
+        self.assertEqual(
+            (updated.exam_marks, updated.total_score, updated.average_score,
+             updated.grade, updated.grade_point),
+            (Decimal('30.00'), Decimal('60.00'), Decimal('20.00'), 'F', Decimal('0.0'))
+        )
+        created = Result.objects.get(student=new_student, subject=self.subject)
+        self.assertEqual(
+            (created.total_score, created.grade, created.grade_point),
+            (Decimal('270.00'), 'A', Decimal('5.0'))
+        )
+        self.assertEqual(Result.objects.get(student=untouched, subject=self.subject).grade, 'C')
+        
+        compact = {row['id']: row for row in response.data['results']}
+        self.assertEqual(compact[updated.pk]['grade'], 'F')
+        self.assertEqual(compact[created.pk]['grade'], 'A')
+    
+    def test_missing_components_are_left_out_of_the_average(self):
+        student = self.create_students(1)[0]
+        
+        self.submit([{'student_id': student.id, 'exam_marks': 75}])
+        
+        result = Result.objects.get(student=student, subject=self.subject)
+        self.assertIsNone(result.first_ca)
+        self.assertEqual(
+            (result.total_score, result.average_score, result.grade),
+            (Decimal('75.00'), Decimal('75.00'), 'B')
+        )
+    
+    def test_students_outside_the_class_are_rejected(self):
+        student = self.create_students(1)[0]
+        other_class = Class.objects.create(
+            name='JSS 1B', level='JSS 1', school=self.school,
+            academic_session=self.term.academic_session
+        )
+        self.class_obj = other_class
+        outsider = self.create_students(1)[0]
+        self.class_obj = student.current_class
+        
+        response = self.submit([
+            {'student_id': student.id, 'exam_marks': 10},
+            {'student_id': outsider.id, 'exam_marks': 10},
+        ])
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['invalid_student_ids'], [outsider.id])
+        self.assertEqual(
+            Result.objects.get(student=student, subject=self.subject).exam_marks, Decimal('80.00')
+        )
+
+
+class RankSubjectResultsTests(ResultTestMixin, TestCase):
+    """Subject positions and class averages are computed per (class, subject)"""
+    
+    AVERAGES = [Decimal('90'), Decimal('70'), Decimal('70'), Decimal('50')]
+    
+    def setUp(self):
+        self.create_school(subject_count=2)
+        self.subject = self.subjects[0]
+        self.students = self.create_students(len(self.AVERAGES))
+        for student, average in zip(self.students, self.AVERAGES):
+            Result.objects.filter(student=student, subject=self.subject).update(average_score=average)
+    
+    def subject_results(self, subject=None):
+        return [
+            Result.objects.get(student=student, subject=subject or self.subject)
+            for student in self.students
+        ]
+    
+    def test_competition_positions_and_class_average(self):
+        summary = rank_subject_results(self.term, method=COMPETITION, use_window=False)
+        
+        self.assertEqual(summary['results_ranked'], 8)
+        results = self.subject_results()
+        self.assertEqual([result.subject_position for result in results], [1, 2, 2, 4])
+        self.assertEqual({result.subject_class_average for result in results}, {Decimal('70.00')})
+        # Every student scored 60 in the other subject
+        other = self.subject_results(self.subjects[1])
+        self.assertEqual([result.subject_position for result in other], [1, 1, 1, 1])
+        self.assertEqual({result.subject_class_average for result in other}, {Decimal('60.00')})
+    
+    def test_dense_positions(self):
+        rank_subject_results(self.term, method=DENSE, use_window=False)
+        self.assertEqual([result.subject_position for result in self.subject_results()], [1, 2, 2, 3])
+    
+    def test_classes_are_ranked_separately(self):
+        self.class_obj = Class.objects.create(
+            name='JSS 1B', level='JSS 1', school=self.school,
+            academic_session=self.term.academic_session
+        )
+        second_class = self.create_students(2, scores=(90, 90, 100))
+        
+        rank_subject_results(self.term, use_window=False)
+        
+        self.assertEqual([result.subject_position for result in self.subject_results()], [1, 2, 2, 4])
+        top = Result.objects.get(student=second_class[0], subject=self.subject)
+        self.assertEqual((top.subject_position, top.subject_class_average), (1, Decimal('93.33')))
+    
+    def test_only_changed_rows_are_written(self):
+        rank_subject_results(self.term, use_window=False)
+        self.assertEqual(rank_subject_results(self.term, use_window=False)['positions_updated'], 0)
+        
+        Result.objects.filter(student=self.students[3], subject=self.subject).update(average_score=100)
+        summary = rank_subject_results(self.term, use_window=False)
+        
+        # Every position moves and the class average changes for the whole subject
+        self.assertEqual(summary['positions_updated'], 4)
+        self.assertEqual([result.subject_position for result in self.subject_results()], [2, 3, 3, 1])
+    
+    def test_class_ids_limit_the_ranking(self):
+        summary = rank_subject_results(self.term, class_ids=[], use_window=False)
+        self.assertEqual(summary['results_ranked'], 0)
+        self.assertIsNone(self.subject_results()[0].subject_position)
+    
+    @skipUnless(window_ranking_supported(), 'window ranking runs on PostgreSQL only')
+    def test_python_fallback_matches_window_functions(self):
+        for method in (COMPETITION, DENSE):
+            rank_subject_results(self.term, method=method, use_window=True)
+            window_rows = [
+                (result.subject_position, result.subject_class_average)
+                for result in self.subject_results()
+            ]
+            Result.objects.update(subject_position=None, subject_class_average=None)
+            rank_subject_results(self.term, method=method, use_window=False)
+            self.assertEqual(
+                [(result.subject_position, result.subject_class_average) for result in self.subject_results()],
+                window_rows
+            )
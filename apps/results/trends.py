@@ -0,0 +1,213 @@
+"""
+Longitudinal performance built on SubjectPerformanceRollup.
+
+The rollup holds one row per (student, term, subject) with the score's
+standard score, rank and percentile inside its class. It is refreshed per
+(term, class) when term results are generated, so trend reports read a
+few indexed rows per term instead of scanning raw results.
+"""
+import math
+from collections import Counter
+from decimal import Decimal
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min
+from django.utils import timezone
+
+from .models import Result, SubjectPerformanceRollup
+from .ranking import COMPETITION, rank_values
+
+BATCH_SIZE = 500
+
+DEFAULT_SESSIONS = 5
+
+ROLLUP_FIELDS = [
+    'class_for_term', 'average_score', 'normalized_score', 'class_rank',
+    'percentile', 'class_size', 'class_average', 'updated_at',
+]
+
+
+def _quantize(value, places):
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-places))
+
+
+def _place_scores(scores):
+    """
+    Return (rank, percentile, standard score) for scores sorted best-first,
+    plus the group mean.
+    """
+    count = len(scores)
+    values = [float(score) for score in scores]
+    mean = sum(values) / count
+    std = math.sqrt(sum((value - mean) ** 2 for value in values) / count)
+
+    placed = []
+    ties = Counter(scores)
+    ranks = rank_values(scores, COMPETITION)
+    for index, (score, rank) in enumerate(zip(scores, ranks)):
+        # Competition rank - 1 is the number of strictly higher scores
+        below = count - (rank - 1) - ties[score]
+        equal = ties[score]
+        percentile = (below + equal / 2) / count * 100
+        normalized = (values[index] - mean) / std if std else 0.0
+        placed.append((rank, percentile, normalized))
+    return placed, mean
+
+
+def refresh_performance_rollup(term, class_ids=None):
+    """
+    Rebuild rollup rows for a term, limited to the given classes.
+
+    Reads the stored subject averages with one query, places every score in
+    its (class, subject) group and upserts the rows. Rows whose result no
+    longer exists are removed. Returns the number of rows written.
+    """
+    results = Result.objects.filter(term=term)
+    if class_ids is not None:
+        results = results.filter(class_for_term_id__in=list(class_ids))
+    rows = results.order_by(
+        'class_for_term_id', 'subject_id', '-average_score', 'student_id'
+    ).values_list('class_for_term_id', 'subject_id', 'student_id', 'average_score')
+
+    started = timezone.now()
+    rollups = []
+    for (class_id, subject_id), group in groupby(rows, key=lambda row: row[:2]):
+        group = list(group)
+        placed, mean = _place_scores([row[3] for row in group])
+        class_average = _quantize(mean, 2)
+        for (_, _, student_id, score), (rank, percentile, normalized) in zip(group, placed):
+            rollups.append(SubjectPerformanceRollup(
+                student_id=student_id,
+                term=term,
+                subject_id=subject_id,
+                class_for_term_id=class_id,
+                average_score=score,
+                normalized_score=_quantize(normalized, 3),
+                class_rank=rank,
+                percentile=_quantize(percentile, 2),
+                class_size=len(group),
+                class_average=class_average,
+            ))
+
+    stale = SubjectPerformanceRollup.objects.filter(term=term, updated_at__lt=started)
+    if class_ids is not None:
+        stale = stale.filter(class_for_term_id__in=list(class_ids))
+
+    with transaction.atomic():
+        SubjectPerformanceRollup.objects.bulk_create(
+            rollups,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['student', 'term', 'subject'],
+            update_fields=ROLLUP_FIELDS
+        )
+        stale.delete()
+
+    return len(rollups)
+
+
+def recent_session_ids(school_id, sessions=DEFAULT_SESSIONS):
+    """Ids of a school's most recent academic sessions"""
+    from apps.academics.models import AcademicSession
+    return list(
+        AcademicSession.objects.filter(school_id=school_id)
+        .order_by('-start_date')
+        .values_list('id', flat=True)[:sessions]
+    )
+
+
+def _term_progression(rows, subject_keys):
+    """Group per-subject rows ordered by term into one entry per term"""
+    progression = []
+    for (term_id, term_name, session_name), term_rows in groupby(
+        rows, key=lambda row: (row['term_id'], row['term__name'], row['term__academic_session__name'])
+    ):
+        term_rows = list(term_rows)
+        entry = {
+            'term_id': term_id,
+            'term_name': term_name,
+            'session_name': session_name,
+            'subjects': [{key: row[source] for key, source in subject_keys.items()} for row in term_rows],
+        }
+        # Term level figures are the means over the subjects taken
+        for key in ('average_score', 'class_average', 'normalized_score', 'percentile'):
+            values = [float(subject[key]) for subject in entry['subjects'] if subject[key] is not None]
+            entry[key] = round(sum(values) / len(values), 2) if values else None
+        progression.append(entry)
+    return progression
+
+
+def student_trend(student, sessions=DEFAULT_SESSIONS, subject_id=None):
+    """
+    Per-term progression of a student's subject scores across sessions.
+
+    Each subject carries the class average, rank and percentile for the
+    term it was taken in, so the student can be compared with their cohort.
+    """
+    rows = SubjectPerformanceRollup.objects.filter(
+        student=student,
+        term__academic_session_id__in=recent_session_ids(student.user.school_id, sessions)
+    )
+    if subject_id:
+        rows = rows.filter(subject_id=subject_id)
+    rows = rows.order_by('term__start_date', 'term_id', 'subject__name').values(
+        'term_id', 'term__name', 'term__academic_session__name', 'subject_id', 'subject__name',
+        'average_score', 'normalized_score', 'class_rank', 'percentile', 'class_size', 'class_average'
+    )
+    return _term_progression(rows, {
+        'subject_id': 'subject_id',
+        'subject_name': 'subject__name',
+        'average_score': 'average_score',
+        'class_average': 'class_average',
+        'normalized_score': 'normalized_score',
+        'class_rank': 'class_rank',
+        'class_size': 'class_size',
+        'percentile': 'percentile',
+    })
+
+
+def class_trend(class_obj, sessions=DEFAULT_SESSIONS, subject_id=None):
+    """
+    Per-term progression for the students currently in a class.
+
+    Students are followed back through the classes they were in before, and
+    mean standard scores and percentiles show how the cohort compares with
+    the classes it sat in. One grouped query.
+    """
+    rows = SubjectPerformanceRollup.objects.filter(
+        student__current_class=class_obj,
+        term__academic_session_id__in=recent_session_ids(class_obj.school_id, sessions)
+    )
+    if subject_id:
+        rows = rows.filter(subject_id=subject_id)
+    rows = rows.values(
+        'term_id', 'term__name', 'term__academic_session__name', 'term__start_date',
+        'subject_id', 'subject__name'
+    ).annotate(
+        students=Count('id'),
+        mean_score=Avg('average_score'),
+        mean_class_average=Avg('class_average'),
+        mean_normalized=Avg('normalized_score'),
+        mean_percentile=Avg('percentile'),
+        best_score=Max('average_score'),
+        worst_score=Min('average_score'),
+    ).order_by('term__start_date', 'term_id', 'subject__name')
+
+    def rounded(rows):
+        for row in rows:
+            for key in ('mean_score', 'mean_class_average', 'mean_normalized', 'mean_percentile'):
+                row[key] = round(float(row[key]), 2) if row[key] is not None else None
+            yield row
+
+    return _term_progression(rounded(rows), {
+        'subject_id': 'subject_id',
+        'subject_name': 'subject__name',
+        'students': 'students',
+        'average_score': 'mean_score',
+        'class_average': 'mean_class_average',
+        'normalized_score': 'mean_normalized',
+        'percentile': 'mean_percentile',
+        'best_score': 'best_score',
+        'worst_score': 'worst_score',
+    })
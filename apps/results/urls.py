@@ -12,11 +12,24 @@ from .views import (
     # Teacher views
     bulk_result_input,
     
+    # Results import
+    import_results_csv, results_import_status,
+    
     # Admin operations
-    generate_term_results, publish_results,
+    generate_term_results, generation_status, publish_results, publish_notification_status,
+    
+    # Report cards
+    generate_report_cards, report_card_status, download_report_card, student_report_card,
+    
+    # Score review
+    ResultAnomalyListView, ResultAnomalyDetailView, detect_result_anomalies,
     
     # Analytics
-    class_result_summary, subject_performance,
+    class_result_summary, subject_performance, class_broadsheet, performance_trends,
+    grading_simulation,
+    
+    # Exports
+    export_results, export_term_results,
     
     # Result Template
     ResultTemplateView
@@ -38,13 +51,37 @@ urlpatterns = [
     # Teacher endpoints
     path('teacher/bulk-input/', bulk_result_input, name='bulk_result_input'),
     
+    # Results import
+    path('import/csv/', import_results_csv, name='import_results_csv'),
+    path('import/<int:import_id>/', results_import_status, name='results_import_status'),
+    
     # Admin operations
     path('generate/', generate_term_results, name='generate_term_results'),
+    path('generate/status/<int:job_id>/', generation_status, name='generation_status'),
     path('publish/', publish_results, name='publish_results'),
+    path('publish/status/<str:task_id>/', publish_notification_status, name='publish_notification_status'),
+    
+    # Report cards
+    path('report-cards/generate/', generate_report_cards, name='generate_report_cards'),
+    path('report-cards/status/<str:task_id>/', report_card_status, name='report_card_status'),
+    path('report-cards/<int:term_id>/<int:student_id>/', download_report_card, name='download_report_card'),
+    path('student/term/<int:term_id>/report-card/', student_report_card, name='student_report_card'),
+    
+    # Score review
+    path('anomalies/', ResultAnomalyListView.as_view(), name='result_anomaly_list'),
+    path('anomalies/<int:pk>/', ResultAnomalyDetailView.as_view(), name='result_anomaly_detail'),
+    path('anomalies/detect/', detect_result_anomalies, name='detect_result_anomalies'),
     
     # Analytics and reports
     path('analytics/class-summary/', class_result_summary, name='class_result_summary'),
     path('analytics/subject-performance/', subject_performance, name='subject_performance'),
+    path('analytics/broadsheet/', class_broadsheet, name='class_broadsheet'),
+    path('analytics/trends/', performance_trends, name='performance_trends'),
+    path('analytics/grading-simulation/', grading_simulation, name='grading_simulation'),
+    
+    # Exports
+    path('export/results/', export_results, name='export_results'),
+    path('export/term-results/', export_term_results, name='export_term_results'),
     
     # Result template
     path('template/', ResultTemplateView.as_view(), name='result_template'),
@@ -1,16 +1,37 @@
+import os
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from django.db.models import Avg, Max, Min, Count, Q
 from django.utils import timezone
 from apps.accounts.views import IsSchoolOwnerOrSuperAdmin, IsTeacher, IsStudent
-from .models import Result, TermResult, ResultTemplate
+from .models import (
+    Result, TermResult, ResultTemplate, ResultAnomaly, ResultImport, ClassTermSummary,
+    ResultGenerationJob, ResultTask
+)
+from .analytics import score_distribution, score_distribution_by
+from .anomalies import queue_anomaly_scan, unscanned_class_ids
+from .broadsheet import broadsheet_csv_rows, broadsheet_ndjson_rows, build_broadsheet
+from .exports import export_queryset, export_rows
+from .jobs import start_generation_job
+from .grading import get_grading_scale
+from .publishing import notification_progress, publish_term_results, queue_result_notifications
+from .report_cards import queue_report_card, queue_report_cards, report_card_path, report_card_progress
+from .simulation import simulate_grading
+from .snapshots import freeze_term_results, snapshot_response, student_snapshots
+from .streaming import csv_lines, json_lines, ndjson_lines, streaming_response
+from .summaries import refresh_class_summaries
+from .trends import DEFAULT_SESSIONS, class_trend, student_trend
+from .ranking import TIE_METHODS, default_tie_method
 from .serializers import (
-    ResultSerializer, ResultInputSerializer, BulkResultInputSerializer,
-    TermResultSerializer, StudentTermResultSerializer, ResultTemplateSerializer,
-    ClassResultSummarySerializer, SubjectPerformanceSerializer
+    ResultSerializer, ResultInputSerializer, BulkResultInputSerializer, CompactResultSerializer,
+    TermResultSerializer, ResultTemplateSerializer,
+    ClassResultSummarySerializer, SubjectPerformanceSerializer, ResultAnomalySerializer,
+    ResultImportSerializer, ResultGenerationJobSerializer, GradingSimulationSerializer,
+    ReportCardRequestSerializer, AnomalyScanSerializer, TermResultGenerationSerializer,
+    GRADE_BOUNDARY_FIELDS, prefetch_subject_results
 )
 
 class ResultListView(generics.ListCreateAPIView):
@@ -120,7 +141,17 @@ class TermResultListView(generics.ListCreateAPIView):
         if class_id:
             queryset = queryset.filter(class_for_term_id=class_id)
         
-        return queryset.select_related('student', 'term', 'class_for_term')
+        return queryset.select_related('student__user', 'term', 'class_for_term')
+    
+    def get_serializer(self, *args, **kwargs):
+        # Load subject results for the whole page at once
+        if kwargs.get('many') and args:
+            args = (prefetch_subject_results(args[0]),) + args[1:]
+        return super().get_serializer(*args, **kwargs)
+    
+    def perform_create(self, serializer):
+        term_result = serializer.save()
+        refresh_class_summaries(term_result.term, [term_result.class_for_term_id])
 
 class TermResultDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Get, update, or delete term result"""
@@ -136,6 +167,16 @@ class TermResultDetailView(generics.RetrieveUpdateDestroyAPIView):
         elif user.school:
             return TermResult.objects.filter(student__user__school=user.school)
         return TermResult.objects.none()
+    
+    def perform_update(self, serializer):
+        previous_class_id = serializer.instance.class_for_term_id
+        term_result = serializer.save()
+        refresh_class_summaries(term_result.term, {previous_class_id, term_result.class_for_term_id})
+    
+    def perform_destroy(self, instance):
+        term, class_id = instance.term, instance.class_for_term_id
+        instance.delete()
+        refresh_class_summaries(term, [class_id])
 
 # Student-specific views
 @api_view(['GET'])
@@ -151,9 +192,8 @@ def student_results(request):
             'fee_status': student.fee_status
         }, status=status.HTTP_403_FORBIDDEN)
     
-    term_results = student.term_results.filter(is_published=True)
-    serializer = StudentTermResultSerializer(term_results, many=True)
-    return Response(serializer.data)
+    payload, etag = student_snapshots(student)
+    return snapshot_response(request, payload, etag)
 
 @api_view(['GET'])
 @permission_classes([IsStudent])
@@ -168,15 +208,11 @@ def student_term_result(request, term_id):
             'fee_status': student.fee_status
         }, status=status.HTTP_403_FORBIDDEN)
     
-    term_result = get_object_or_404(
-        TermResult,
-        student=student,
-        term_id=term_id,
-        is_published=True
-    )
+    snapshot = student_snapshots(student, term_id=term_id)
+    if snapshot is None:
+        raise Http404
     
-    serializer = StudentTermResultSerializer(term_result)
-    return Response(serializer.data)
+    return snapshot_response(request, *snapshot)
 
 # Teacher-specific views
 @api_view(['POST'])
@@ -201,86 +237,143 @@ def bulk_result_input(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        results_created = []
+        from apps.academics.models import Term
+        if not Term.objects.filter(id=data['term_id']).exists():
+            return Response({'error': 'Term not found'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Validate the whole roster in one query
+        from apps.students.models import Student
+        submitted_ids = [result_data['student_id'] for result_data in data['results']]
+        roster = set(Student.objects.filter(
+            id__in=submitted_ids,
+            current_class_id=data['class_id'],
+            is_active=True
+        ).values_list('id', flat=True))
+        invalid_ids = [student_id for student_id in submitted_ids if student_id not in roster]
+        if invalid_ids:
+            return Response({
+                'error': 'Some students are not active members of this class',
+                'invalid_student_ids': invalid_ids
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = [
+            Result(
+                student_id=result_data['student_id'],
+                subject_id=data['subject_id'],
+                term_id=data['term_id'],
+                class_for_term_id=data['class_id'],
+                first_ca=result_data.get('first_ca'),
+                second_ca=result_data.get('second_ca'),
+                exam_marks=result_data.get('exam_marks'),
+                remarks=result_data.get('remarks', ''),
+                teacher=teacher
+            )
+            for result_data in data['results']
+        ]
         with transaction.atomic():
-            for result_data in data['results']:
-                student_id = result_data['student_id']
-                result, created = Result.objects.update_or_create(
-                    student_id=student_id,
-                    subject_id=data['subject_id'],
-                    term_id=data['term_id'],
-                    defaults={
-                        'class_for_term_id': data['class_id'],
-                        'first_ca': result_data.get('first_ca'),
-                        'second_ca': result_data.get('second_ca'),
-                        'exam_marks': result_data.get('exam_marks'),
-                        'remarks': result_data.get('remarks', ''),
-                        'teacher': teacher
-                    }
-                )
-                results_created.append(result)
+            Result.objects.upsert(results)
+        
+        saved_results = Result.objects.filter(
+            student_id__in=submitted_ids,
+            subject_id=data['subject_id'],
+            term_id=data['term_id']
+        )
+        if data['response_mode'] == 'compact':
+            results_data = CompactResultSerializer(saved_results, many=True).data
+        else:
+            results_data = ResultSerializer(
+                saved_results.select_related('student__user', 'subject', 'term', 'teacher'),
+                many=True
+            ).data
         
         return Response({
             'message': 'Results updated successfully',
-            'results': ResultSerializer(results_created, many=True).data
+            'results_count': len(results),
+            'results': results_data
         }, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-# Admin operations
 @api_view(['POST'])
 @permission_classes([IsSchoolOwnerOrSuperAdmin])
-def generate_term_results(request):
-    """Generate term results for students"""
-    term_id = request.data.get('term_id')
-    class_id = request.data.get('class_id')
+def import_results_csv(request):
+    """Queue an import of a results sheet"""
+    if 'file' not in request.FILES:
+        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
     
+    csv_file = request.FILES['file']
+    if not csv_file.name.lower().endswith('.csv'):
+        return Response({'error': 'File must be a CSV'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    term_id = request.data.get('term_id')
     if not term_id:
         return Response({'error': 'term_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
     from apps.academics.models import Term
-    from apps.students.models import Student
-    
-    term = get_object_or_404(Term, id=term_id)
-    
-    # Get students
-    if class_id:
-        students = Student.objects.filter(current_class_id=class_id, is_active=True)
-    else:
-        user = request.user
-        if user.is_school_owner:
-            students = Student.objects.filter(
-                user__school__owner=user,
-                is_active=True
-            )
-        else:
-            students = Student.objects.filter(is_active=True)
+    terms = Term.objects.select_related('academic_session')
+    if request.user.is_school_owner:
+        terms = terms.filter(academic_session__school__owner=request.user)
+    term = get_object_or_404(terms, id=term_id)
+    
+    # The sheet is saved to storage in chunks; the task reads it back as a stream
+    result_import = ResultImport.objects.create(
+        school_id=term.academic_session.school_id,
+        term=term,
+        uploaded_by=request.user,
+        file=csv_file
+    )
     
-    results_generated = []
-    with transaction.atomic():
-        for student in students:
-            # Check if term result already exists
-            term_result, created = TermResult.objects.get_or_create(
-                student=student,
-                term=term,
-                defaults={
-                    'class_for_term': student.current_class
-                }
-            )
-            
-            if created or not term_result.is_published:
-                # Calculate results
-                term_result.calculate_results()
-                results_generated.append(term_result)
-        
-        # Calculate positions for all students in each class
-        for term_result in results_generated:
-            term_result.calculate_position()
+    from .tasks import import_results_task
+    task = import_results_task.delay(result_import.id)
     
     return Response({
-        'message': f'Generated term results for {len(results_generated)} students',
-        'results_count': len(results_generated)
-    })
+        'message': 'Results import started',
+        'import_id': result_import.id,
+        'task_id': task.id
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def results_import_status(request, import_id):
+    """Check the progress of a results sheet import"""
+    imports = ResultImport.objects.select_related('term')
+    if request.user.is_school_owner:
+        imports = imports.filter(school__owner=request.user)
+    result_import = get_object_or_404(imports, id=import_id)
+    
+    return Response(ResultImportSerializer(result_import).data)
+
+# Admin operations
+@api_view(['POST'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def generate_term_results(request):
+    """Queue term result generation, joining a matching job already in progress"""
+    serializer = TermResultGenerationSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    
+    term = data['term']
+    school_id = term.academic_session.school_id
+    class_id = data['class_for_term'].id if data.get('class_for_term') else None
+    tie_method = data.get('tie_method') or default_tie_method()
+    
+    job, created = start_generation_job(term, school_id, class_id, tie_method, request.user)
+    
+    data = ResultGenerationJobSerializer(job).data
+    data['message'] = 'Term result generation started' if created else 'Term result generation already in progress'
+    data['coalesced'] = not created
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def generation_status(request, job_id):
+    """Check the progress of a term result generation job"""
+    jobs = ResultGenerationJob.objects.select_related('term', 'class_for_term')
+    if request.user.is_school_owner:
+        jobs = jobs.filter(school__owner=request.user)
+    job = get_object_or_404(jobs, id=job_id)
+    
+    return Response(ResultGenerationJobSerializer(job).data)
 
 @api_view(['POST'])
 @permission_classes([IsSchoolOwnerOrSuperAdmin])
@@ -292,138 +385,496 @@ def publish_results(request):
     if not term_id:
         return Response({'error': 'term_id is required'}, status=status.HTTP_400_BAD_REQUEST)
     
+    from apps.academics.models import Term
+    term = get_object_or_404(Term.objects.select_related('academic_session'), id=term_id)
+    
     # Get term results to publish
-    term_results = TermResult.objects.filter(term_id=term_id, is_published=False)
+    term_results = TermResult.objects.filter(term_id=term_id)
     
     if class_id:
         term_results = term_results.filter(class_for_term_id=class_id)
     
     user = request.user
+    school_ids = None
     if user.is_school_owner:
         term_results = term_results.filter(student__user__school__owner=user)
+        school_ids = list(user.owned_schools.values_list('id', flat=True))
+    class_ids = set(term_results.order_by().values_list('class_for_term_id', flat=True).distinct())
+    
+    # Flags left unreviewed by the last scan; classes never scanned get a scan queued
+    anomalies_flagged = ResultAnomaly.objects.filter(
+        term=term, class_for_term_id__in=class_ids, is_reviewed=False
+    ).count()
     
-    published_count = 0
     with transaction.atomic():
-        for term_result in term_results:
-            term_result.is_published = True
-            term_result.published_at = timezone.now()
-            term_result.save()
-            published_count += 1
-            
-            # Queue email notification
-            from celery import current_app
-            if hasattr(current_app, 'send_task'):
-                current_app.send_task(
-                    'apps.results.tasks.send_result_notification',
-                    args=[term_result.id]
-                )
+        anomaly_scan_task_id = None
+        if unscanned_class_ids(term, class_ids):
+            anomaly_scan_task_id = queue_anomaly_scan(term, class_id, school_ids, user)
+        
+        published_ids = publish_term_results(term_results)
+        # Refreshes snapshots of earlier publishes too, rewriting only changed ones
+        snapshots = freeze_term_results(term_results)
+        refresh_class_summaries(term, class_ids)
+        # Sent once the publish has committed, in chunked group messages
+        notification_task_id = queue_result_notifications(published_ids)
+        if notification_task_id:
+            ResultTask.objects.create(
+                school_id=term.academic_session.school_id,
+                term=term,
+                kind=ResultTask.NOTIFICATIONS,
+                task_id=notification_task_id,
+                requested_by=user
+            )
     
     return Response({
-        'message': f'Published {published_count} term results',
-        'published_count': published_count
+        'message': f'Published {len(published_ids)} term results',
+        'published_count': len(published_ids),
+        'snapshots': snapshots,
+        'anomalies_flagged': anomalies_flagged,
+        'anomaly_scan_task_id': anomaly_scan_task_id,
+        'notification_task_id': notification_task_id
     })
 
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def publish_notification_status(request, task_id):
+    """Check progress of the notifications queued by publish_results"""
+    tasks = ResultTask.objects.filter(kind=ResultTask.NOTIFICATIONS)
+    if request.user.is_school_owner:
+        tasks = tasks.filter(school__owner=request.user)
+    task = get_object_or_404(tasks, task_id=task_id)
+    
+    return Response(notification_progress(task.task_id))
+
+# Report cards
+def _report_card_response(request, term, class_id, student_id):
+    """Serve a student's cached report card, or queue it and answer 202 if it is not rendered yet"""
+    path = report_card_path(term, class_id, student_id)
+    if path is None:
+        return Response({'error': 'Report card not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if not os.path.exists(path):
+        task_id = queue_report_card(term, class_id, student_id, path, request.user)
+        return Response({
+            'message': 'Report card is being prepared, please try again shortly',
+            'task_id': task_id
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    filename = f"report_card_{term.id}_{student_id}.pdf"
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/pdf')
+
+@api_view(['POST'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def generate_report_cards(request):
+    """Queue report card rendering for a class"""
+    serializer = ReportCardRequestSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    
+    task_id = queue_report_cards(data['term'], data['class_for_term'].id, request.user)
+    
+    return Response({
+        'message': 'Report card rendering started',
+        'task_id': task_id
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def report_card_status(request, task_id):
+    """Check progress of a report card rendering task"""
+    tasks = ResultTask.objects.filter(kind=ResultTask.REPORT_CARDS)
+    if request.user.is_school_owner:
+        tasks = tasks.filter(school__owner=request.user)
+    task = get_object_or_404(tasks, task_id=task_id)
+    
+    return Response(report_card_progress(task.task_id))
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def download_report_card(request, term_id, student_id):
+    """Download a student's report card"""
+    term_results = TermResult.objects.select_related('term__academic_session')
+    if request.user.is_school_owner:
+        term_results = term_results.filter(student__user__school__owner=request.user)
+    term_result = get_object_or_404(term_results, term_id=term_id, student_id=student_id)
+    
+    return _report_card_response(request, term_result.term, term_result.class_for_term_id, term_result.student_id)
+
+@api_view(['GET'])
+@permission_classes([IsStudent])
+def student_report_card(request, term_id):
+    """Download the student's own report card for a published term"""
+    student = request.user.student_profile
+    
+    # Check fee status
+    if student.fee_status != 'cleared':
+        return Response({
+            'message': 'Results not available. Please clear your fees.',
+            'fee_status': student.fee_status
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    term_result = get_object_or_404(
+        TermResult.objects.select_related('term__academic_session'),
+        student=student,
+        term_id=term_id,
+        is_published=True
+    )
+    
+    return _report_card_response(request, term_result.term, term_result.class_for_term_id, student.id)
+
 # Analytics and reports
 @api_view(['GET'])
 @permission_classes([IsSchoolOwnerOrSuperAdmin])
 def class_result_summary(request):
-    """Get class result summary"""
+    """Get the stored result summary for one class or every class in a term"""
     user = request.user
     term_id = request.query_params.get('term')
     class_id = request.query_params.get('class')
     
-    if not term_id or not class_id:
+    if not term_id:
         return Response(
-            {'error': 'term and class parameters are required'},
+            {'error': 'term parameter is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from apps.academics.models import Term
+    term = get_object_or_404(Term, id=term_id)
+    
+    summaries = ClassTermSummary.objects.filter(term=term).select_related('class_for_term', 'term')
+    if class_id:
+        summaries = summaries.filter(class_for_term_id=class_id)
+    if user.is_school_owner:
+        summaries = summaries.filter(class_for_term__school__owner=user)
+    
+    # Built on generation and publishing; older terms are filled in by rebuild_class_summaries
+    rows = list(summaries.order_by('class_for_term__name'))
+    
+    if class_id:
+        if not rows:
+            return Response({'error': 'No results for this class and term'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ClassResultSummarySerializer(rows[0]).data)
+    
+    return Response({
+        'term_id': term.id,
+        'term_name': term.name,
+        'classes': ClassResultSummarySerializer(rows, many=True).data
+    })
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def subject_performance(request):
+    """Get subject performance analysis for one subject or every subject in a term"""
+    user = request.user
+    term_id = request.query_params.get('term')
+    subject_id = request.query_params.get('subject')
+    
+    if not term_id:
+        return Response(
+            {'error': 'term parameter is required'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
     # Build queryset
-    term_results = TermResult.objects.filter(
-        term_id=term_id,
-        class_for_term_id=class_id
-    )
+    results = Result.objects.filter(term_id=term_id)
     
     if user.is_school_owner:
-        term_results = term_results.filter(student__user__school__owner=user)
+        results = results.filter(student__user__school__owner=user)
+    
+    if subject_id:
+        from apps.academics.models import Subject
+        subject_obj = get_object_or_404(Subject.objects.only('id', 'name', 'school_id'), id=subject_id)
+        scale = get_grading_scale(subject_obj.school_id)
+        
+        performance_data = score_distribution(results.filter(subject_id=subject_id), scale)
+        performance_data['subject_id'] = subject_obj.id
+        performance_data['subject_name'] = subject_obj.name
+        
+        serializer = SubjectPerformanceSerializer(performance_data)
+        return Response(serializer.data)
     
-    # Calculate summary
-    summary_data = term_results.aggregate(
-        total_students=Count('id'),
-        results_published=Count('id', filter=Q(is_published=True)),
-        average_class_score=Avg('average_score'),
-        highest_score=Max('average_score'),
-        lowest_score=Min('average_score')
+    # Every subject taken in the term, one grouped query
+    from apps.academics.models import Term
+    term_obj = get_object_or_404(Term.objects.select_related('academic_session'), id=term_id)
+    scale = get_grading_scale(term_obj.academic_session.school_id)
+    
+    subjects = score_distribution_by(
+        results, scale, 'subject_id', extra_values=('subject__name',)
     )
+    for performance_data in subjects:
+        performance_data['subject_name'] = performance_data.pop('subject__name')
+    subjects.sort(key=lambda performance_data: performance_data['subject_name'])
+    
+    serializer = SubjectPerformanceSerializer(subjects, many=True)
+    return Response({
+        'term_id': term_obj.id,
+        'term_name': term_obj.name,
+        'subjects': serializer.data
+    })
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def class_broadsheet(request):
+    """Students x subjects score sheet for a class in a term"""
+    term_id = request.query_params.get('term')
+    class_id = request.query_params.get('class')
+    output = request.query_params.get('output', 'json')
     
-    # Calculate pass rate (assuming 50% is pass)
-    pass_count = term_results.filter(average_score__gte=50).count()
-    total_count = summary_data['total_students']
-    pass_rate = (pass_count / total_count * 100) if total_count > 0 else 0
+    if not term_id or not class_id:
+        return Response(
+            {'error': 'term and class parameters are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if output not in ('json', 'csv', 'ndjson'):
+        return Response(
+            {'error': 'output must be one of json, csv, ndjson'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    summary_data['pass_rate'] = round(pass_rate, 2)
+    tie_method = request.query_params.get('tie_method') or default_tie_method()
+    if tie_method not in TIE_METHODS:
+        return Response(
+            {'error': f"tie_method must be one of {', '.join(TIE_METHODS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    # Get class and term names
     from apps.academics.models import Class, Term
-    class_obj = get_object_or_404(Class, id=class_id)
+    classes = Class.objects.all()
+    if request.user.is_school_owner:
+        classes = classes.filter(school__owner=request.user)
+    class_obj = get_object_or_404(classes, id=class_id)
     term_obj = get_object_or_404(Term, id=term_id)
     
-    summary_data['class_name'] = class_obj.name
-    summary_data['term_name'] = term_obj.name
+    broadsheet = build_broadsheet(term_obj, class_obj.id, method=tie_method)
+    filename = f"broadsheet_{class_obj.name}_{term_obj.name}".replace(' ', '_')
     
-    serializer = ClassResultSummarySerializer(summary_data)
-    return Response(serializer.data)
+    if output == 'csv':
+        header, rows = broadsheet_csv_rows(broadsheet)
+        return streaming_response(csv_lines(header, rows), 'csv', filename)
+    if output == 'ndjson':
+        return streaming_response(ndjson_lines(broadsheet_ndjson_rows(broadsheet)), 'ndjson', filename)
+    
+    broadsheet['class_name'] = class_obj.name
+    broadsheet['term_name'] = term_obj.name
+    return streaming_response(json_lines(broadsheet, 'rows'), 'json')
 
 @api_view(['GET'])
 @permission_classes([IsSchoolOwnerOrSuperAdmin])
-def subject_performance(request):
-    """Get subject performance analysis"""
+def performance_trends(request):
+    """Term by term progression for a student or the students of a class"""
     user = request.user
-    term_id = request.query_params.get('term')
+    student_id = request.query_params.get('student')
+    class_id = request.query_params.get('class')
     subject_id = request.query_params.get('subject')
     
-    if not term_id or not subject_id:
+    if bool(student_id) == bool(class_id):
         return Response(
-            {'error': 'term and subject parameters are required'},
+            {'error': 'Provide exactly one of the student or class parameters'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        sessions = int(request.query_params.get('sessions', DEFAULT_SESSIONS))
+    except ValueError:
+        sessions = 0
+    if sessions < 1:
+        return Response(
+            {'error': 'sessions must be a positive integer'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Build queryset
-    results = Result.objects.filter(
-        term_id=term_id,
-        subject_id=subject_id
-    )
-    
+    if student_id:
+        from apps.students.models import Student
+        students = Student.objects.select_related('user')
+        if user.is_school_owner:
+            students = students.filter(user__school__owner=user)
+        student = get_object_or_404(students, id=student_id)
+        
+        return Response({
+            'student_id': student.id,
+            'student_name': student.user.get_full_name(),
+            'sessions': sessions,
+            'terms': student_trend(student, sessions, subject_id)
+        })
+    
+    from apps.academics.models import Class
+    classes = Class.objects.all()
     if user.is_school_owner:
-        results = results.filter(student__user__school__owner=user)
+        classes = classes.filter(school__owner=user)
+    class_obj = get_object_or_404(classes, id=class_id)
+    
+    return Response({
+        'class_id': class_obj.id,
+        'class_name': class_obj.name,
+        'sessions': sessions,
+        'terms': class_trend(class_obj, sessions, subject_id)
+    })
+
+@api_view(['POST'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def grading_simulation(request):
+    """Preview how candidate grade boundaries would change a term, without saving anything"""
+    serializer = GradingSimulationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
     
-    # Calculate performance metrics
-    performance_data = results.aggregate(
-        total_students=Count('id'),
-        average_score=Avg('average_score'),
-        highest_score=Max('average_score'),
-        lowest_score=Min('average_score')
+    from apps.academics.models import Class, Term
+    
+    terms = Term.objects.select_related('academic_session')
+    if request.user.is_school_owner:
+        terms = terms.filter(academic_session__school__owner=request.user)
+    term = get_object_or_404(terms, id=data['term_id'])
+    school_id = term.academic_session.school_id
+    
+    class_id = data.get('class_id')
+    if class_id:
+        get_object_or_404(Class, id=class_id, school_id=school_id)
+    
+    candidates = [
+        (scale.get('name') or f'scale_{index}', {
+            field[len('grade_')].upper(): scale[field] for field in GRADE_BOUNDARY_FIELDS
+        })
+        for index, scale in enumerate(data['scales'], 1)
+    ]
+    simulation = simulate_grading(
+        term, school_id, get_grading_scale(school_id), candidates,
+        class_id=class_id, method=data.get('tie_method') or default_tie_method()
+    )
+    simulation['term_id'] = term.id
+    simulation['term_name'] = term.name
+    return Response(simulation)
+
+# Exports
+def _export_response(request, kind):
+    """Stream a results export as CSV or NDJSON, gzipped when compress=gzip"""
+    params = request.query_params
+    output = params.get('output', 'csv')
+    compress = params.get('compress', '')
+    
+    if output not in ('csv', 'ndjson'):
+        return Response(
+            {'error': 'output must be one of csv, ndjson'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if compress not in ('', 'gzip'):
+        return Response(
+            {'error': 'compress must be gzip when given'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not all((params.get(name) or '0').isdigit() for name in ('term', 'class', 'subject')):
+        return Response(
+            {'error': 'term, class and subject must be ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    queryset = export_queryset(
+        kind,
+        owner=request.user if request.user.is_school_owner else None,
+        term_id=params.get('term'),
+        class_id=params.get('class'),
+        subject_id=params.get('subject')
     )
+    header, rows = export_rows(kind, queryset)
+    
+    if output == 'csv':
+        lines = csv_lines(header, (row.values() for row in rows))
+    else:
+        lines = ndjson_lines(rows)
+    
+    filename = '_'.join([kind.replace('-', '_')] + [
+        f'{name}_{params[name]}' for name in ('term', 'class', 'subject') if params.get(name)
+    ])
+    return streaming_response(lines, output, filename, compress=bool(compress))
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def export_results(request):
+    """Stream subject results filtered by term, class and subject"""
+    return _export_response(request, 'results')
+
+@api_view(['GET'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def export_term_results(request):
+    """Stream term results filtered by term, class and subject taken"""
+    return _export_response(request, 'term-results')
+
+# Score review
+class ResultAnomalyListView(generics.ListAPIView):
+    """List scores flagged for review"""
+    serializer_class = ResultAnomalySerializer
+    permission_classes = [IsSchoolOwnerOrSuperAdmin]
     
-    # Grade distribution
-    grade_distribution = {
-        'A': results.filter(average_score__gte=80).count(),
-        'B': results.filter(average_score__gte=70, average_score__lt=80).count(),
-        'C': results.filter(average_score__gte=60, average_score__lt=70).count(),
-        'D': results.filter(average_score__gte=50, average_score__lt=60).count(),
-        'E': results.filter(average_score__gte=40, average_score__lt=50).count(),
-        'F': results.filter(average_score__lt=40).count(),
-    }
-    
-    performance_data['grade_distribution'] = grade_distribution
-    
-    # Get subject name
-    from apps.academics.models import Subject
-    subject_obj = get_object_or_404(Subject, id=subject_id)
-    performance_data['subject_name'] = subject_obj.name
-    
-    serializer = SubjectPerformanceSerializer(performance_data)
-    return Response(serializer.data)
+    def get_queryset(self):
+        user = self.request.user
+        params = self.request.query_params
+        
+        queryset = ResultAnomaly.objects.all()
+        if user.is_school_owner:
+            queryset = queryset.filter(class_for_term__school__owner=user)
+        
+        # Apply filters
+        if params.get('term'):
+            queryset = queryset.filter(term_id=params['term'])
+        if params.get('class'):
+            queryset = queryset.filter(class_for_term_id=params['class'])
+        if params.get('subject'):
+            queryset = queryset.filter(subject_id=params['subject'])
+        if params.get('kind'):
+            queryset = queryset.filter(kind=params['kind'])
+        if params.get('reviewed') in ('true', 'false'):
+            queryset = queryset.filter(is_reviewed=params['reviewed'] == 'true')
+        
+        return queryset.select_related(
+            'class_for_term', 'subject', 'teacher', 'result__student__user'
+        ).order_by('class_for_term__name', 'subject__name', 'kind', 'id')
+
+class ResultAnomalyDetailView(generics.RetrieveUpdateAPIView):
+    """Review a flagged score"""
+    serializer_class = ResultAnomalySerializer
+    permission_classes = [IsSchoolOwnerOrSuperAdmin]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ResultAnomaly.objects.select_related(
+            'class_for_term', 'subject', 'teacher', 'result__student__user'
+        )
+        if user.is_school_owner:
+            queryset = queryset.filter(class_for_term__school__owner=user)
+        return queryset
+    
+    def perform_update(self, serializer):
+        if serializer.validated_data.get('is_reviewed'):
+            serializer.save(reviewed_by=self.request.user, reviewed_at=timezone.now())
+        else:
+            serializer.save(reviewed_by=None, reviewed_at=None)
+
+@api_view(['POST'])
+@permission_classes([IsSchoolOwnerOrSuperAdmin])
+def detect_result_anomalies(request):
+    """Queue an anomaly scan of a term's results"""
+    serializer = AnomalyScanSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    
+    from apps.academics.models import Class, Term
+    
+    terms = Term.objects.select_related('academic_session')
+    if request.user.is_school_owner:
+        terms = terms.filter(academic_session__school__owner=request.user)
+    term = get_object_or_404(terms, id=data['term_id'])
+    
+    class_id = data.get('class_id')
+    if class_id:
+        get_object_or_404(Class, id=class_id, school_id=term.academic_session.school_id)
+    
+    school_ids = None
+    if request.user.is_school_owner:
+        school_ids = list(request.user.owned_schools.values_list('id', flat=True))
+    
+    task_id = queue_anomaly_scan(term, class_id, school_ids, request.user)
+    
+    return Response({
+        'message': 'Anomaly scan started',
+        'task_id': task_id
+    }, status=status.HTTP_202_ACCEPTED)
 
 # Result Template
 class ResultTemplateView(generics.RetrieveUpdateAPIView):
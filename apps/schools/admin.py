@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import School, SchoolGroup, SMTPSettings
+from .models import NumberSequence, School, SchoolGroup, SMTPSettings
 
 @admin.register(SchoolGroup)
 class SchoolGroupAdmin(admin.ModelAdmin):
@@ -52,4 +52,12 @@ class SMTPSettingsAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('is_active',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(NumberSequence)
+class NumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ['school', 'kind', 'year', 'last_value', 'updated_at']
+    list_filter = ['kind', 'year']
+    search_fields = ['school__name']
+    ordering = ['school', 'kind', '-year']
+    readonly_fields = ['last_value', 'updated_at']
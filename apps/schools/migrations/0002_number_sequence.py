@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schools', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('invoice', 'Invoice Number'), ('student', 'Student ID')], max_length=20)),
+                ('year', models.IntegerField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='number_sequences', to='schools.school')),
+            ],
+            options={
+                'unique_together': {('school', 'kind', 'year')},
+            },
+        ),
+    ]
@@ -114,4 +114,34 @@ class SMTPSettings(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"SMTP Settings for {self.school.name}"
\ No newline at end of file
+        return f"SMTP Settings for {self.school.name}"
+
+class NumberSequence(models.Model):
+    """
+    Last number handed out for one kind of identifier, per school and year
+    """
+    INVOICE = 'invoice'
+    STUDENT = 'student'
+    
+    school = models.ForeignKey(
+        School,
+        on_delete=models.CASCADE,
+        related_name='number_sequences'
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            (INVOICE, 'Invoice Number'),
+            (STUDENT, 'Student ID')
+        ]
+    )
+    year = models.IntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['school', 'kind', 'year']
+    
+    def __str__(self):
+        return f"{self.school.name} - {self.get_kind_display()} {self.year}: {self.last_value}"
@@ -0,0 +1,136 @@
+"""
+Per-school number sequences for invoice numbers and student IDs.
+
+Each (school, kind, year) has one NumberSequence row holding the last
+number handed out. Reserving numbers is a single
+UPDATE ... SET last_value = last_value + n on that row, so a block of any
+size costs the same one statement, and concurrent reservations queue on
+the row lock instead of reading the same "last" number. The counter is
+part of the caller's transaction: if the transaction rolls back, so does
+the reservation, which keeps the numbers gap-free.
+
+A counter row is created the first time a school needs one for a year,
+seeded from the highest number already in use so existing numbering
+carries on. Formatted numbers include the school id, because invoice
+numbers and student IDs are unique across all schools while each school
+counts from 1.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import NumberSequence
+
+INVOICE_PREFIX = 'INV{year}'
+INVOICE_FORMAT = 'INV{year}{school:04d}{number:06d}'
+STUDENT_PREFIX = '{code}{year}'
+STUDENT_FORMAT = '{code}{year}{school:04d}{number:04d}'
+
+
+def _highest_in_use(school_id, kind, year):
+    """Highest number already issued by the school, counting numbers written before sequences existed"""
+    from apps.financials.models import Invoice
+    from apps.students.models import Student
+    from .models import School
+
+    if kind == NumberSequence.INVOICE:
+        numbers = Invoice.objects.filter(
+            student__user__school_id=school_id,
+            invoice_number__startswith=INVOICE_PREFIX.format(year=year)
+        ).values_list('invoice_number', flat=True)
+        digits = 6
+    else:
+        code = student_code(School.objects.get(id=school_id))
+        numbers = Student.objects.filter(
+            user__school_id=school_id,
+            student_id__startswith=STUDENT_PREFIX.format(code=code, year=year)
+        ).values_list('student_id', flat=True)
+        digits = 4
+
+    return max((int(number[-digits:]) for number in numbers if number[-digits:].isdigit()), default=0)
+
+
+def reserve_numbers(school_id, kind, year, count=1):
+    """
+    Reserve the next count numbers of a school's sequence.
+
+    Returns them as a range. The counter row stays locked until the
+    surrounding transaction ends, so callers should save whatever the
+    numbers are for in that same transaction.
+    """
+    if count < 1:
+        return range(0)
+
+    sequences = NumberSequence.objects.filter(school_id=school_id, kind=kind, year=year)
+    with transaction.atomic():
+        if not sequences.update(last_value=F('last_value') + count):
+            # First number of the year: create the row, losing any race to create it
+            NumberSequence.objects.bulk_create(
+                [NumberSequence(
+                    school_id=school_id,
+                    kind=kind,
+                    year=year,
+                    last_value=_highest_in_use(school_id, kind, year)
+                )],
+                ignore_conflicts=True
+            )
+            sequences.update(last_value=F('last_value') + count)
+        last_value = sequences.values_list('last_value', flat=True).get()
+
+    return range(last_value - count + 1, last_value + 1)
+
+
+def student_code(school):
+    """Three letter school code that starts its student IDs"""
+    return school.name[:3].upper()
+
+
+def format_invoice_number(school_id, year, number):
+    """Invoice number; the school id keeps it unique across schools"""
+    return INVOICE_FORMAT.format(year=year, school=school_id, number=number)
+
+
+def format_student_id(school, year, number):
+    """Student ID; the school id keeps it unique across schools sharing a code"""
+    return STUDENT_FORMAT.format(code=student_code(school), year=year, school=school.id, number=number)
+
+
+def assign_invoice_numbers(invoices):
+    """
+    Give numbers to unsaved invoices that lack one, ready for bulk_create.
+
+    Invoices are numbered in list order, with one reservation per school
+    and year. Call inside the transaction that saves them.
+    """
+    groups = {}
+    for invoice in invoices:
+        if not invoice.invoice_number:
+            year = (invoice.issue_date or date.today()).year
+            groups.setdefault((invoice.student.user.school_id, year), []).append(invoice)
+
+    for (school_id, year), group in groups.items():
+        numbers = reserve_numbers(school_id, NumberSequence.INVOICE, year, len(group))
+        for invoice, number in zip(group, numbers):
+            invoice.invoice_number = format_invoice_number(school_id, year, number)
+    return invoices
+
+
+def assign_student_ids(students):
+    """
+    Give IDs to unsaved students that lack one, ready for bulk_create.
+
+    Students are numbered in list order, with one reservation per school
+    and admission year. Call inside the transaction that saves them.
+    """
+    groups = {}
+    for student in students:
+        if not student.student_id:
+            school = student.user.school
+            groups.setdefault((school.id, student.admission_date.year), (school, []))[1].append(student)
+
+    for (school_id, year), (school, group) in groups.items():
+        numbers = reserve_numbers(school_id, NumberSequence.STUDENT, year, len(group))
+        for student, number in zip(group, numbers):
+            student.student_id = format_student_id(school, year, number)
+    return students
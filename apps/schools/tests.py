@@ -1,3 +1,99 @@
+from datetime import date
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from apps.accounts.models import User
+from apps.students.models import Student
+from .models import NumberSequence, School
+from .sequences import assign_student_ids, format_student_id, reserve_numbers
 
-# Create your tests here.
+
+class NumberSequenceTests(TestCase):
+    """Invoice numbers and student IDs are reserved in gap-free, per-school blocks"""
+    
+    def setUp(self):
+        self.school = self.create_school('Test Academy', 'owner')
+    
+    def create_school(self, name, owner_username):
+        owner = User.objects.create_user(
+            username=owner_username, password='owner123', role='school_owner'
+        )
+        return School.objects.create(
+            name=name, address='1 School Road', contact_email='info@test.com',
+            contact_number='0800', owner=owner
+        )
+    
+    def new_student(self, school, username, student_id=''):
+        user = User.objects.create_user(
+            username=username, password='student123', role='student', school=school
+        )
+        return Student(
+            user=user, date_of_birth=date(2012, 1, 1), gender='female',
+            address='1 Home Road', emergency_contact='0800',
+            admission_date=date(2024, 9, 1), student_id=student_id
+        )
+    
+    def reserve(self, count, kind=NumberSequence.STUDENT, year=2024, school=None):
+        return list(reserve_numbers((school or self.school).id, kind, year, count))
+    
+    def test_blocks_follow_on_without_gaps(self):
+        self.assertEqual(self.reserve(5), [1, 2, 3, 4, 5])
+        
+        with CaptureQueriesContext(connection) as queries:
+            block = self.reserve(3)
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        
+        # An UPDATE ... SET last_value = last_value + 3 and one read back
+        self.assertEqual(block, [6, 7, 8])
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(NumberSequence.objects.get().last_value, 8)
+    
+    def test_empty_reservation_does_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.reserve(0), [])
+        self.assertFalse(NumberSequence.objects.exists())
+    
+    def test_first_reservation_carries_on_from_existing_ids(self):
+        # Written before sequences existed: code, year and a four digit number
+        self.new_student(self.school, 'legacy', student_id='TES20240042').save()
+        
+        self.assertEqual(self.reserve(2), [43, 44])
+        self.assertEqual(self.reserve(1, year=2025), [1])
+    
+    def test_sequences_are_separate_per_school_kind_and_year(self):
+        other = self.create_school('Other Academy', 'other_owner')
+        
+        self.assertEqual(self.reserve(2), [1, 2])
+        self.assertEqual(self.reserve(2, school=other), [1, 2])
+        self.assertEqual(self.reserve(2, kind=NumberSequence.INVOICE), [1, 2])
+        self.assertEqual(self.reserve(2, year=2025), [1, 2])
+        self.assertEqual(NumberSequence.objects.count(), 4)
+    
+    def test_rolled_back_reservation_is_reused(self):
+        self.reserve(3)
+        try:
+            with transaction.atomic():
+                self.assertEqual(self.reserve(10), list(range(4, 14)))
+                raise RuntimeError('import failed')
+        except RuntimeError:
+            pass
+        
+        self.assertEqual(self.reserve(1), [4])
+    
+    def test_assigned_ids_do_not_collide_across_schools_sharing_a_code(self):
+        # Both schools' IDs start with TES2024
+        other = self.create_school('Testing College', 'other_owner')
+        students = [self.new_student(self.school, f'student{index}') for index in range(3)]
+        students += [self.new_student(other, f'other{index}') for index in range(2)]
+        students.append(self.new_student(self.school, 'kept', student_id='KEEP0001'))
+        
+        assign_student_ids(students)
+        
+        ids = [student.student_id for student in students]
+        self.assertEqual(ids[:3], [format_student_id(self.school, 2024, number) for number in (1, 2, 3)])
+        self.assertEqual(ids[3:5], [format_student_id(other, 2024, number) for number in (1, 2)])
+        self.assertEqual(ids[5], 'KEEP0001')
+        self.assertEqual(len(set(ids)), len(ids))
+        
+        Student.objects.bulk_create(students)
+        self.assertEqual(Student.objects.count(), 6)
@@ -8,7 +8,7 @@ class StudentAdmin(admin.ModelAdmin):
         'admission_date', 'fee_status', 'is_active'
     ]
     list_filter = [
-        'is_active', 'gender', 'current_class__school', 'current_class',
+        'is_active', 'gender', 'fee_status', 'current_class__school', 'current_class',
         'admission_date'
     ]
     search_fields = [
@@ -32,10 +32,14 @@ class StudentAdmin(admin.ModelAdmin):
             'fields': ('parent', 'guardian_name', 'guardian_relationship',
                       'guardian_phone', 'guardian_email')
         }),
+        ('Fees', {
+            'fields': ('fee_status', 'outstanding_balance')
+        }),
         ('Status', {
             'fields': ('is_active',)
         }),
     )
+    readonly_fields = ('fee_status', 'outstanding_balance')
     
     def get_full_name(self, obj):
         return obj.user.get_full_name()
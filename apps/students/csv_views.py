@@ -8,6 +8,7 @@ from django.db import transaction
 from django.shortcuts import get_object_or_404
 from apps.accounts.views import IsSchoolOwnerOrSuperAdmin
 from apps.accounts.models import User
+from apps.schools.sequences import assign_student_ids
 from apps.students.models import Student
 from apps.students.serializers import StudentCSVImportSerializer, StudentCSVExportSerializer
 from apps.academics.models import Class
@@ -145,14 +146,17 @@ def import_students_csv(request):
                             'current_class': current_class
                         }
                         
-                        student = Student.objects.create(**student_data)
-                        created_students.append(student)
+                        created_students.append(Student(**student_data))
                         
                     else:
                         errors.append(f"Row {row_num}: {serializer.errors}")
                         
                 except Exception as e:
                     errors.append(f"Row {row_num}: {str(e)}")
+            
+            # One ID reservation per school and admission year for the whole sheet
+            assign_student_ids(created_students)
+            Student.objects.bulk_create(created_students)
         
         return Response({
             'message': f'Successfully imported {len(created_students)} students',
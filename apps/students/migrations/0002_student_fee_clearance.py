@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:47
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def store_fee_clearance(apps, schema_editor):
+    from apps.financials.clearance import ZERO, clearance
+
+    Student = apps.get_model('students', 'Student')
+    FeeRecord = apps.get_model('financials', 'FeeRecord')
+
+    totals = {
+        row['student_id']: (row['due'], row['paid'], row['records'])
+        for row in FeeRecord.objects.exclude(status='waived').order_by().values('student_id')
+        .annotate(due=Sum('amount_due'), paid=Sum('amount_paid'), records=Count('id'))
+    }
+    students = []
+    for student in Student.objects.only('id').iterator():
+        student.fee_status, student.outstanding_balance = clearance(*totals.get(student.id, (ZERO, ZERO, 0)))
+        students.append(student)
+    Student.objects.bulk_update(students, ['fee_status', 'outstanding_balance'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+        ('financials', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='fee_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('partial', 'Partial Payment'), ('cleared', 'Cleared')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='outstanding_balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.RunPython(store_fee_clearance, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from decimal import Decimal
+from apps.financials.clearance import CLEARANCE_FIELDS
+from apps.schools.sequences import assign_student_ids
 
 class Student(models.Model):
     """
@@ -62,6 +65,24 @@ class Student(models.Model):
         related_name='students'
     )
     
+    # Fee clearance over all unwaived fee records, kept current by
+    # apps.financials.clearance whenever fee records change
+    fee_status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('partial', 'Partial Payment'),
+            ('cleared', 'Cleared')
+        ],
+        default='pending',
+        db_index=True
+    )
+    outstanding_balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    
     # Status
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -71,24 +92,24 @@ class Student(models.Model):
         return f"{self.user.get_full_name()} ({self.student_id})"
     
     def save(self, *args, **kwargs):
-        # Auto-generate student ID if not provided
-        if not self.student_id:
-            school = self.user.school
-            year = self.admission_date.year
-            last_student = Student.objects.filter(
-                user__school=school,
-                student_id__startswith=f"{school.name[:3].upper()}{year}"
-            ).order_by('student_id').last()
-            
-            if last_student:
-                last_number = int(last_student.student_id[-4:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            
-            self.student_id = f"{school.name[:3].upper()}{year}{new_number:04d}"
+        # Fee clearance is only written by apps.financials.clearance, so a
+        # save from a copy loaded before a payment can't overwrite it
+        if (
+            not self._state.adding and not args
+            and not kwargs.get('force_insert') and kwargs.get('update_fields') is None
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in CLEARANCE_FIELDS
+                and field.attname not in deferred
+            ]
         
-        super().save(*args, **kwargs)
+        # Auto-generate student ID if not provided
+        with transaction.atomic():
+            if not self.student_id:
+                assign_student_ids([self])
+            super().save(*args, **kwargs)
     
     @property
     def age(self):
@@ -98,13 +119,6 @@ class Student(models.Model):
         return today.year - self.date_of_birth.year - (
             (today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day)
         )
-    
-    @property
-    def fee_status(self):
-        """Get current fee payment status"""
-        from apps.financials.models import FeeRecord
-        latest_fee = FeeRecord.objects.filter(student=self).order_by('-created_at').first()
-        return latest_fee.status if latest_fee else 'pending'
 
 class Enrollment(models.Model):
     """
@@ -22,9 +22,9 @@ class StudentSerializer(serializers.ModelSerializer):
             'medical_conditions', 'parent', 'guardian_name', 
             'guardian_relationship', 'guardian_phone', 'guardian_email',
             'admission_date', 'current_class', 'current_class_name',
-            'age', 'fee_status', 'school_name', 'is_active', 'created_at'
+            'age', 'fee_status', 'outstanding_balance', 'school_name', 'is_active', 'created_at'
         ]
-        read_only_fields = ['id', 'student_id', 'created_at']
+        read_only_fields = ['id', 'student_id', 'outstanding_balance', 'created_at']
 
 class StudentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new students"""
@@ -157,9 +157,10 @@ class StudentDashboardSerializer(serializers.ModelSerializer):
         model = Student
         fields = [
             'id', 'user_details', 'student_id', 'current_class_name',
-            'school_name', 'fee_status', 'recent_attendance',
+            'school_name', 'fee_status', 'outstanding_balance', 'recent_attendance',
             'attendance_summary'
         ]
+        read_only_fields = ['fee_status', 'outstanding_balance']
     
     def get_recent_attendance(self, obj):
         """Get recent attendance records"""
@@ -5,6 +5,7 @@ import csv
 import io
 import json
 from apps.accounts.models import User
+from apps.schools.sequences import assign_student_ids
 from apps.students.models import Student
 from apps.academics.models import Class
 from apps.financials.models import FeeRecord, FeeStructure
@@ -61,6 +62,13 @@ def process_student_csv_import(file_content, school_id, field_mapping, user_id):
                         if source_field in row:
                             mapped_data[target_field] = row[source_field].strip() if row[source_field] else ''
                     
+                    # Parsed here so a bad date is reported against its row, not the whole batch
+                    admission_date = Student._meta.get_field('admission_date').to_python(
+                        mapped_data.get('admission_date')
+                    )
+                    if admission_date is None:
+                        raise ValueError('admission_date is required')
+                    
                     # Create user
                     user_data = {
                         'username': mapped_data.get('username'),
@@ -105,15 +113,18 @@ def process_student_csv_import(file_content, school_id, field_mapping, user_id):
                         'guardian_relationship': mapped_data.get('guardian_relationship', ''),
                         'guardian_phone': mapped_data.get('guardian_phone', ''),
                         'guardian_email': mapped_data.get('guardian_email', ''),
-                        'admission_date': mapped_data.get('admission_date'),
+                        'admission_date': admission_date,
                         'current_class': current_class
                     }
                     
-                    student = Student.objects.create(**student_data)
-                    created_students.append(student)
+                    created_students.append(Student(**student_data))
                     
                 except Exception as e:
                     errors.append(f"Row {row_num}: {str(e)}")
+            
+            # One ID reservation per school and admission year for the whole sheet
+            assign_student_ids(created_students)
+            Student.objects.bulk_create(created_students)
         
         # Send completion email
         subject = f"CSV Import Complete - {len(created_students)} students imported"
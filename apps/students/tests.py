@@ -1,3 +1,85 @@
+from datetime import date
+from decimal import Decimal
 from django.test import TestCase
+from apps.accounts.models import User
+from apps.schools.models import School
+from apps.academics.models import AcademicSession, Term
+from apps.financials.models import FeeRecord, FeeStructure
+from .models import Student
 
-# Create your tests here.
+
+class StudentSaveTests(TestCase):
+    """Saving a student never writes the fee clearance kept by apps.financials"""
+    
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='owner123', role='school_owner')
+        self.school = School.objects.create(
+            name='Test Academy', address='1 School Road', contact_email='info@test.com',
+            contact_number='0800', owner=owner
+        )
+        self.session = AcademicSession.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1), end_date=date(2025, 7, 31),
+            school=self.school
+        )
+        self.term = Term.objects.create(
+            name='First Term', academic_session=self.session,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20)
+        )
+        user = User.objects.create_user(
+            username='student1', password='student123', role='student', school=self.school
+        )
+        self.student = Student.objects.create(
+            user=user, date_of_birth=date(2012, 1, 1), gender='female',
+            address='1 Home Road', emergency_contact='0800', admission_date=date(2024, 9, 1)
+        )
+    
+    def bill(self, amount_due, amount_paid):
+        structure = FeeStructure.objects.create(
+            school=self.school, academic_session=self.session, name='Tuition', amount=amount_due
+        )
+        return FeeRecord.objects.create(
+            student=self.student, fee_structure=structure, term=self.term,
+            amount_due=amount_due, amount_paid=amount_paid, due_date=date(2024, 10, 1)
+        )
+    
+    def test_new_student_gets_an_id_and_default_clearance(self):
+        self.assertTrue(self.student.student_id.startswith('TES2024'))
+        self.assertEqual(
+            (self.student.fee_status, self.student.outstanding_balance), ('pending', Decimal('0.00'))
+        )
+    
+    def test_stale_copy_does_not_overwrite_clearance(self):
+        stale = Student.objects.get(pk=self.student.pk)
+        self.bill(Decimal('5000.00'), Decimal('2000.00'))
+        
+        stale.address = '2 New Road'
+        stale.save()
+        
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.address, '2 New Road')
+        self.assertEqual(
+            (self.student.fee_status, self.student.outstanding_balance), ('partial', Decimal('3000.00'))
+        )
+    
+    def test_clearance_fields_are_ignored_on_generic_saves(self):
+        self.student.fee_status = 'cleared'
+        self.student.outstanding_balance = Decimal('0.00')
+        self.student.save()
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.fee_status, 'pending')
+        
+        # Explicit update_fields are still honoured
+        self.student.fee_status = 'cleared'
+        self.student.save(update_fields=['fee_status'])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.fee_status, 'cleared')
+    
+    def test_deferred_fields_are_not_loaded_to_save(self):
+        student = Student.objects.only('id', 'student_id', 'address').get(pk=self.student.pk)
+        student.address = '3 Other Road'
+        
+        with self.assertNumQueries(3):
+            student.save()
+        
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.address, '3 Other Road')
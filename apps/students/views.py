@@ -37,7 +37,7 @@ class StudentListView(generics.ListCreateAPIView):
         if class_id:
             queryset = queryset.filter(current_class_id=class_id)
         
-        return queryset.select_related('user', 'current_class')
+        return queryset.select_related('user__school', 'current_class')
     
     def perform_create(self, serializer):
         user = self.request.user
@@ -277,7 +277,7 @@ def get_class_students(request, class_id):
     students = Student.objects.filter(
         current_class_id=class_id,
         is_active=True
-    ).select_related('user')
+    ).select_related('user__school', 'current_class')
     
     serializer = StudentSerializer(students, many=True)
     return Response(serializer.data)
@@ -24,79 +24,9 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from apps.results.models import TermResult
+from apps.results.tasks import send_result_notification
 from apps.schools.models import SMTPSettings
 
-@shared_task
-def send_result_notification(term_result_id):
-    """
-    Send email notification to parent when student's result is published
-    """
-    try:
-        term_result = TermResult.objects.get(id=term_result_id)
-        student = term_result.student
-        school = student.user.school
-        
-        # Get parent email
-        parent_email = None
-        if student.parent:
-            parent_email = student.parent.email
-        elif student.guardian_email:
-            parent_email = student.guardian_email
-        
-        if not parent_email:
-            return f"No parent email found for student {student.student_id}"
-        
-        # Get school SMTP settings
-        smtp_settings = SMTPSettings.objects.filter(school=school, is_active=True).first()
-        
-        if not smtp_settings:
-            return f"No SMTP settings configured for school {school.name}"
-        
-        # Prepare email content
-        subject = f"Result Notification - {student.user.get_full_name()} - {term_result.term.name}"
-        
-        # Email context
-        context = {
-            'student': student,
-            'term_result': term_result,
-            'school': school,
-            'results': student.results.filter(term=term_result.term)
-        }
-        
-        # Render email templates
-        html_message = render_to_string('emails/result_notification.html', context)
-        plain_message = render_to_string('emails/result_notification.txt', context)
-        
-        # Configure email backend with school's SMTP settings
-        from django.core.mail import get_connection
-        
-        connection = get_connection(
-            host=smtp_settings.host,
-            port=smtp_settings.port,
-            username=smtp_settings.username,
-            password=smtp_settings.password,
-            use_tls=smtp_settings.use_tls,
-            use_ssl=smtp_settings.use_ssl,
-        )
-        
-        # Send email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=smtp_settings.from_email,
-            recipient_list=[parent_email],
-            html_message=html_message,
-            connection=connection,
-            fail_silently=False
-        )
-        
-        return f"Result notification sent to {parent_email} for student {student.student_id}"
-        
-    except TermResult.DoesNotExist:
-        return f"TermResult with id {term_result_id} not found"
-    except Exception as e:
-        return f"Error sending email: {str(e)}"
-
 @shared_task
 def send_fee_reminder(student_id, fee_record_ids):
     """
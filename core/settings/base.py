@@ -155,6 +155,16 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Cache shared by web and worker processes. Recompute debouncing, job locks,
+# report card render dedupe and cache version tokens rely on every process
+# seeing the same keys, so this must not be a per-process cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/1')),
+    }
+}
+
 # Email Settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
@@ -162,4 +172,39 @@ EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Results processing
+# Tie handling for class positions: 'competition' (1, 1, 3) or 'dense' (1, 1, 2)
+RESULTS_POSITION_TIE_METHOD = os.getenv('RESULTS_POSITION_TIE_METHOD', 'competition')
+# Seconds score edits are collected before stale term results are recomputed
+RESULTS_RECOMPUTE_DELAY = int(os.getenv('RESULTS_RECOMPUTE_DELAY', 30))
+# Term results notified per Celery message when results are published
+RESULTS_NOTIFICATION_CHUNK_SIZE = int(os.getenv('RESULTS_NOTIFICATION_CHUNK_SIZE', 100))
+# Rendered report card PDFs, named by a hash of their contents
+RESULTS_REPORT_CARD_DIR = os.getenv('RESULTS_REPORT_CARD_DIR', str(MEDIA_ROOT / 'report_cards'))
+# Report cards rendered per Celery task when a class is queued
+RESULTS_REPORT_CARD_CHUNK_SIZE = int(os.getenv('RESULTS_REPORT_CARD_CHUNK_SIZE', 25))
+# Anomaly checks run before publishing: score outliers (standard scores),
+# smallest class checked, and teacher mean shifts (historical standard deviations)
+RESULTS_ANOMALY_Z_THRESHOLD = float(os.getenv('RESULTS_ANOMALY_Z_THRESHOLD', 2.5))
+RESULTS_ANOMALY_MIN_GROUP_SIZE = int(os.getenv('RESULTS_ANOMALY_MIN_GROUP_SIZE', 5))
+RESULTS_ANOMALY_SHIFT_THRESHOLD = float(os.getenv('RESULTS_ANOMALY_SHIFT_THRESHOLD', 1.0))
+RESULTS_ANOMALY_MIN_HISTORY = int(os.getenv('RESULTS_ANOMALY_MIN_HISTORY', 20))
+# Term average counted as a pass in class summaries
+RESULTS_PASS_MARK = int(os.getenv('RESULTS_PASS_MARK', 50))
+# Seconds a generation waits for another holding the same class, and after
+# which an unfinished generation job is treated as abandoned
+RESULTS_GENERATION_LOCK_TIMEOUT = int(os.getenv('RESULTS_GENERATION_LOCK_TIMEOUT', 600))
+RESULTS_GENERATION_JOB_TIMEOUT = int(os.getenv('RESULTS_GENERATION_JOB_TIMEOUT', 3600))
+# Rows staged and upserted per batch when importing a results sheet
+RESULTS_IMPORT_CHUNK_SIZE = int(os.getenv('RESULTS_IMPORT_CHUNK_SIZE', 1000))
+# Rows fetched per server-side cursor round trip when streaming results exports
+RESULTS_EXPORT_CHUNK_SIZE = int(os.getenv('RESULTS_EXPORT_CHUNK_SIZE', 2000))
+
+# Fees processing
+# Fee records and payments written per bulk INSERT or UPDATE
+FEES_BULK_CREATE_BATCH_SIZE = int(os.getenv('FEES_BULK_CREATE_BATCH_SIZE', 1000))
+# Seconds a fee analytics response is cached; recording fees or payments
+# for a term retires its cached responses straight away
+FEES_ANALYTICS_CACHE_TTL = int(os.getenv('FEES_ANALYTICS_CACHE_TTL', 300))